@@ -1,6 +1,6 @@
 "Main Flask app for RUL package"
 
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify
 from flask import send_file, session
 from flask import url_for, redirect
 from flask_cors import cross_origin
@@ -9,8 +9,10 @@ from werkzeug.utils import secure_filename
 import os
 import pandas as pd
 
-from rul.pipeline.batch_prediction import start_batch_prediction
-from rul.pipeline.training_pipeline import start_training_pipeline
+from rul.job_queue import JobQueue, TRAINING_JOB, SUCCEEDED, FAILED
+from rul.pipeline.online_prediction import MicroBatcher, parse_sensor_rows
+from rul.predictor import ModelServer
+from rul.pipeline.training_pipeline import MODEL_PUSHED
 
 
 # APP configuration and global variables
@@ -20,6 +22,17 @@ app.config['UPLOAD_FOLDER'] =  UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 30 * 1000 * 1000
 app.secret_key ="xy"
 
+# Resident model server, warm loaded at startup and hot swapped when a new model is pushed,
+# serving memory mapped flat forest for the small online batches it predicts faster than sklearn, sklearn model for bigger ones
+model_server = ModelServer(model_registry="saved_models", use_flat_model=True)
+model_server.start()
+
+# Coalesces concurrent /predict requests into one model call
+micro_batcher = MicroBatcher(model_server=model_server)
+
+# Background workers for retraining and batch prediction
+job_queue = JobQueue()
+
 
 @app.route('/', methods=['GET'])  
 @cross_origin()
@@ -43,17 +56,15 @@ def run_batch_prediction():
     input: 
     - `None`
     -------------------------------------------------------------------------------
-    return: `render_template("output.html")` else `render_template("warning.html")`
+    return: `render_template("jobstatus.html")` else `render_template("warning.html")`
     """
 
     if request.method == "POST":
         try:
-            # Running batch prediction on base dataset
-            run_batch_prediction.prediction_file_path = start_batch_prediction(input_file_path='rul.csv')
+            # Submitting batch prediction on base dataset as background job
+            job_id = job_queue.submit_batch_prediction(input_file_path='rul.csv')
 
-            prediction_df = pd.read_csv(run_batch_prediction.prediction_file_path).head(1000)
-
-            return render_template("output.html", tables=[prediction_df.to_html(classes="dataframe", header=True)], titles=prediction_df.columns.values)
+            return render_template("jobstatus.html", message=f"Batch Prediction started! Job id: {job_id}", job_id=job_id)
 
         except Exception as e:
             message = "Batch Prediction Failed! Issue occurred at our end!"
@@ -145,7 +156,9 @@ def custom_batch_prediction():
         renamed_uploaded_file_path = os.path.join(UPLOAD_FOLDER, rename_as)
 
         # Performing batch prediction for custom dataset
-        custom_batch_prediction.prediction_file_path = start_batch_prediction(input_file_path=renamed_uploaded_file_path)
+        from rul.pipeline.batch_prediction import start_batch_prediction
+
+        custom_batch_prediction.prediction_file_path = start_batch_prediction(input_file_path=renamed_uploaded_file_path, model_server=model_server)
 
         custom_prediction_df = pd.read_csv(custom_batch_prediction.prediction_file_path).head(1000)
 
@@ -173,6 +186,31 @@ def download_custom_batch_prediction():
     )
 
 
+@app.route('/predict', methods=['POST'])
+@cross_origin()
+def predict():
+    """
+    JSON API to predict RUL for one or more sensor rows
+    ----------------------------------------------------------------------------------
+    input:
+    - JSON body: a row, list of rows or `{"instances": [rows]}` of sensors `s_2`...`s_21`
+    ----------------------------------------------------------------------------------
+    return: `{"RUL": [...], "model": model directory}`
+    """
+
+    try:
+        features = parse_sensor_rows(request.get_json(force=True))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        prediction = micro_batcher.predict(features)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({"RUL": prediction.tolist(), "model": model_server.model_dir_path})
+
+
 @app.route('/retrain', methods=['POST', 'GET'])
 def retrain():
     """
@@ -181,19 +219,82 @@ def retrain():
     input: 
     - `None`
     ------------------------------------------------------------
-    return: `render_template("trainingreport.html")`
+    return: `render_template("jobstatus.html")`
     """
 
     try:
-        start_training_pipeline()
-        message = "Current trained model is better than previous model! Saving the current model!"
+        # Submitting training pipeline as background job, only one training runs at a time
+        job_id = job_queue.submit_training()
+
+        return render_template("jobstatus.html", message=f"Retraining started! Job id: {job_id}", job_id=job_id)
+
     except Exception as e:
-        message = "Current trained model is not better than previous model"
-    
-    return render_template("trainingreport.html", message=message)
+        message = "Retraining could not be started! Issue occurred at our end!"
+        return render_template("warning.html", message=message)
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+@cross_origin()
+def job_status(job_id):
+    """
+    JSON API for status, progress and result of a background job
+    ------------------------------------------------------------
+    input: 
+    - `job_id`: id returned when job was submitted
+    ------------------------------------------------------------
+    return: job as JSON
+    """
+
+    job = job_queue.get_job(job_id)
+
+    if job is None:
+        return jsonify({"error": f"No job with id: {job_id}"}), 404
+
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """
+    Route for result of a background job
+    ------------------------------------------------------------------------------------------------------
+    input: 
+    - `job_id`: id returned when job was submitted
+    ------------------------------------------------------------------------------------------------------
+    return: `render_template("output.html")` or `render_template("trainingreport.html")` when job is done
+    else `render_template("jobstatus.html")`
+    """
+
+    job = job_queue.get_job(job_id)
+
+    if job is None:
+        return render_template("warning.html", message=f"No job with id: {job_id}")
+
+    # => Job still queued or running
+    if job["status"] not in (SUCCEEDED, FAILED):
+        return render_template("jobstatus.html", message=f"Job {job_id} is {job['status']}! Progress: {job['progress']:.0%}", job_id=job_id)
+
+    # => Training job done
+    if job["kind"] == TRAINING_JOB:
+        if job["status"] == SUCCEEDED:
+            # Swapping newly pushed model in without waiting for the watcher
+            if job["result"]["outcome"] == MODEL_PUSHED:
+                model_server.load_latest()
+            message = job["result"]["message"]
+        else:
+            message = f"Training Failed! {job['error']}"
+
+        return render_template("trainingreport.html", message=message)
+
+    # => Batch prediction job done
+    if job["status"] == FAILED:
+        return render_template("warning.html", message=f"Batch Prediction Failed! {job['error']}")
 
+    run_batch_prediction.prediction_file_path = job["result"]["prediction_file_path"]
 
+    prediction_df = pd.read_csv(run_batch_prediction.prediction_file_path).head(1000)
 
+    return render_template("output.html", tables=[prediction_df.to_html(classes="dataframe", header=True)], titles=prediction_df.columns.values)
 
 
 if __name__ == '__main__':
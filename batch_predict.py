@@ -1,7 +1,7 @@
 "Execution of Batch Prediction Pipeline"
 
 
-from rul.pipeline.batch_prediction import start_batch_prediction
+from rul.pipeline.batch_prediction import start_batch_prediction, PREDICTION_CHUNK_SIZE
 from rul.logger import logging
 
 
@@ -10,7 +10,7 @@ FILE_PATH_FOR_BATCH_PREDICTION = "rul.csv"
 if __name__ == "__main__":
     try:
         logging.info(f"------------------Initiating Batch Prediction------------------")
-        start_batch_prediction(input_file_path=FILE_PATH_FOR_BATCH_PREDICTION)
+        start_batch_prediction(input_file_path=FILE_PATH_FOR_BATCH_PREDICTION, chunk_size=PREDICTION_CHUNK_SIZE)
 
     except Exception as e:
         print(e)
\ No newline at end of file
@@ -0,0 +1,17 @@
+"Execution of Benchmark Evaluation Pipeline"
+
+
+from rul.pipeline.benchmark_evaluation import start_benchmark_evaluation
+from rul.logger import logging
+from rul import utils
+
+
+if __name__ == "__main__":
+    try:
+        logging.info(f"---------------Initiating Benchmark Evaluation---------------")
+        report_file_path = start_benchmark_evaluation()
+
+        print(utils.read_yaml_file(file_path=report_file_path))
+
+    except Exception as e:
+        print(e)
\ No newline at end of file
@@ -0,0 +1,89 @@
+"Benchmark of DataTransformation.add_RUL_feature against the previous groupby-merge implementation"
+
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rul.components.data_transformation import DataTransformation
+
+
+DATA_FILE_PATH = "./CMaps/train_FD001.txt"
+
+index_names = ["unit_number", "time_cycles"]
+setting_names = ["setting_1", "setting_2", "setting_3"]
+sensor_names = ["s_{}".format(i+1) for i in range(0, 21)]
+col_names = index_names + setting_names + sensor_names
+
+
+def add_RUL_feature_merge(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Previous implementation: per unit max via groupby then a full merge copy of the dataframe
+    """
+    max_time_cycles = df.groupby(by='unit_number')['time_cycles'].max()
+    merged = df.merge(max_time_cycles.to_frame(name='max_time_cycle'), left_on='unit_number', right_index=True)
+    merged["RUL"] = merged["max_time_cycle"] - merged['time_cycles']
+    return merged.drop("max_time_cycle", axis=1)
+
+
+def synthetic_fleet(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Builds a fleet of run to failure trajectories of 128 to 362 cycles with train_FD001 columns (float32 settings and sensors to fit in memory)
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(128, 363, size=rows // 128 + 1)
+    lengths = lengths[np.cumsum(lengths) <= rows]
+
+    unit_number = np.repeat(np.arange(1, len(lengths) + 1), lengths)
+    time_cycles = np.arange(len(unit_number)) - np.repeat(np.cumsum(lengths) - lengths, lengths) + 1
+
+    df = pd.DataFrame(rng.standard_normal((len(unit_number), len(col_names) - 2), dtype=np.float32), columns=col_names[2:])
+    df.insert(0, "time_cycles", time_cycles.astype("float"))
+    df.insert(0, "unit_number", unit_number.astype("float"))
+
+    return df
+
+
+def best_time(function, df: pd.DataFrame, repeat: int) -> float:
+    """
+    Returns best wall clock seconds of `repeat` runs, each on a fresh copy since the new implementation works in place
+    """
+    timings = []
+    for _ in range(repeat):
+        df_copy = df.copy()
+        start_time = time.perf_counter()
+        function(df_copy)
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+def run(name: str, df: pd.DataFrame, repeat: int) -> None:
+    """
+    Checks both implementations agree and prints their timings
+    """
+    expected_rul = add_RUL_feature_merge(df.copy())["RUL"].to_numpy()
+    actual_rul = DataTransformation.add_RUL_feature(df.copy())["RUL"].to_numpy()
+    assert np.array_equal(expected_rul, actual_rul)
+
+    merge_time = best_time(add_RUL_feature_merge, df, repeat)
+    transform_time = best_time(DataTransformation.add_RUL_feature, df, repeat)
+
+    print(f"{name:<24} rows: {len(df):>10}  groupby-merge: {merge_time:8.4f}s  groupby-transform: {transform_time:8.4f}s  speedup: {merge_time / transform_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleet-rows", type=int, default=10_000_000, help="rows of the synthetic fleet")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation, best is reported")
+    args = parser.parse_args()
+
+    train_df = pd.read_csv(DATA_FILE_PATH, sep=r'\s+', header=None, index_col=False, names=col_names)
+    run("train_FD001", train_df, args.repeat)
+
+    run("synthetic fleet", synthetic_fleet(args.fleet_rows), args.repeat)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"Benchmark of dataframe artifact formats: write time, full and projected read time and disk size of CSV, Parquet and Feather (Arrow IPC)"
+
+
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rul import utils
+from rul.config import INPUT_FEATURE_COLUMNS
+from rul.entity.config_entity import ARTIFACT_FORMATS
+from rul.components.data_ingestion import DataIngestion
+
+
+DATA_FILE_PATH = "./CMaps/train_FD001.txt"
+
+index_names = ["unit_number", "time_cycles"]
+setting_names = ["setting_1", "setting_2", "setting_3"]
+sensor_names = ["s_{}".format(i+1) for i in range(0, 21)]
+col_names = index_names + setting_names + sensor_names
+
+
+def replicate(df: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """
+    Repeats train_FD001 with renumbered units until it has at least `rows` rows
+    """
+    copies = -(-rows // len(df))
+    replicated = pd.concat([df] * copies, ignore_index=True)
+    replicated["unit_number"] = replicated["unit_number"] + np.repeat(np.arange(copies), len(df)) * df["unit_number"].max()
+
+    return replicated
+
+
+def best_time(function, repeat: int) -> float:
+    """
+    Returns best wall clock seconds of `repeat` runs
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="rows of the benchmark dataset (train_FD001 replicated)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    df = replicate(pd.read_csv(DATA_FILE_PATH, sep=r'\s+', header=None, index_col=False, names=col_names), args.rows)
+    float32_columns = DataIngestion.get_sensor_columns(df)
+    projected_columns = index_names + INPUT_FEATURE_COLUMNS
+
+    benchmark_dir = tempfile.mkdtemp()
+    try:
+        print(f"rows: {len(df)}  columns: {len(df.columns)}  projected columns: {len(projected_columns)}")
+        for artifact_format in ARTIFACT_FORMATS:
+            file_path = os.path.join(benchmark_dir, f"train.{artifact_format}")
+
+            write_time = best_time(lambda: utils.write_dataframe(df=df, file_path=file_path, float32_columns=float32_columns), args.repeat)
+            read_time = best_time(lambda: utils.read_dataframe(file_path=file_path), args.repeat)
+            projected_read_time = best_time(lambda: utils.read_dataframe(file_path=file_path, columns=projected_columns), args.repeat)
+
+            print(f"{artifact_format:<8} size: {os.path.getsize(file_path) / 2**20:8.1f} MiB  write: {write_time:7.3f}s  "
+                  f"read: {read_time:7.3f}s  projected read: {projected_read_time:7.3f}s")
+
+    finally:
+        shutil.rmtree(benchmark_dir)
\ No newline at end of file
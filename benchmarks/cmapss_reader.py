@@ -0,0 +1,51 @@
+"Benchmark of CMAPSS file reading: pandas python and C parsers against rul.cmapss reader, parsing into float32 and memory mapping its binary copy"
+
+
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from rul import cmapss
+
+
+def best_time(function, repeat: int) -> float:
+    """
+    Returns best wall clock seconds of `repeat` runs
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default="./CMaps", help="directory of CMAPSS files")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    for file_path, dataset, fd in cmapss.find_cmapss_files(args.data_dir):
+        if dataset == "RUL":
+            continue
+
+        # Binary copy written by first cached read, later reads memory map it
+        cache_path = cmapss.cache_file_path(file_path, "float32")
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        cmapss.read_cmapss_file(file_path)
+
+        timings = {
+            "python engine": best_time(lambda: pd.read_csv(file_path, sep=r"\s+", engine="python", header=None, index_col=False, names=cmapss.col_names), args.repeat),
+            "c engine": best_time(lambda: pd.read_csv(file_path, sep=r"\s+", engine="c", header=None, index_col=False, names=cmapss.col_names), args.repeat),
+            "parse float32": best_time(lambda: cmapss.read_cmapss_file(file_path, cache=False), args.repeat),
+            "binary copy": best_time(lambda: cmapss.read_cmapss_file(file_path), args.repeat)
+        }
+
+        print(f"{os.path.basename(file_path):<16} " + "  ".join(f"{name}: {seconds * 1000:7.2f}ms" for name, seconds in timings.items()))
\ No newline at end of file
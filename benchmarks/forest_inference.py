@@ -0,0 +1,60 @@
+"Benchmark of flat forest inference against sklearn model.predict at several batch sizes"
+
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rul import utils
+from rul.forest import FlatForest
+from rul.predictor import ModelResolver
+from rul.entity.config_entity import MODEL_FILE_NAME, FLAT_MODEL_FILE_NAME
+
+
+def best_time(function, X: np.array, repeat: int) -> float:
+    """
+    Returns best wall clock seconds of `repeat` runs
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function(X)
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default=None, help="model registry sub directory, latest in saved_models by default")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 100_000], help="rows per predict call")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    model_dir_path = args.model_dir or ModelResolver(model_registry="saved_models").get_latest_dir_path()
+
+    model = utils.load_object(file_path=os.path.join(model_dir_path, "model", MODEL_FILE_NAME))
+
+    flat_model_path = os.path.join(model_dir_path, "model", FLAT_MODEL_FILE_NAME)
+    flat_forest = FlatForest.load(file_path=flat_model_path) if os.path.exists(flat_model_path) else FlatForest.from_estimator(model=model)
+
+    rng = np.random.default_rng(42)
+
+    print(f"model directory: {model_dir_path}  trees: {flat_forest.n_estimators}  nodes: {len(flat_forest.nodes)}")
+    for n_jobs in [1, -1]:
+        model.set_params(n_jobs=n_jobs)
+
+        for batch_size in args.batch_sizes:
+            X = rng.random((batch_size, model.n_features_in_))
+
+            if n_jobs == 1:
+                assert np.array_equal(model.predict(X), flat_forest.predict(X))
+
+            sklearn_time = best_time(model.predict, X, args.repeat)
+            flat_time = best_time(flat_forest.predict, X, args.repeat)
+
+            print(f"n_jobs: {n_jobs:>2}  batch size: {batch_size:>7}  model.predict: {sklearn_time * 1000:10.2f}ms  flat forest: {flat_time * 1000:10.2f}ms  speedup: {sklearn_time / flat_time:6.2f}x")
@@ -0,0 +1,99 @@
+"Benchmark of entry point startup: import time, heaviest imported packages, threads started and scoring cold start (import + latest model load), each entry point in a fresh process"
+
+
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(script_path: str) -> dict:
+    """
+    Imports entry point script without running its `__main__` block, then creates the MongoDB client it used to create at import time
+    """
+    import runpy
+
+    start_time = time.perf_counter()
+    runpy.run_path(script_path, run_name="__benchmark__")
+    import_time = time.perf_counter() - start_time
+
+    result = {"import_time": import_time, "threads": threading.active_count(), "pymongo_imported": "pymongo" in sys.modules,
+              "sklearn_imported": "sklearn" in sys.modules, "scipy_imported": "scipy" in sys.modules}
+
+    # Loading latest transformer and model as the scoring CLI does, unpickling sklearn model imports sklearn
+    from rul import utils
+    from rul.predictor import ModelResolver
+    model_resolver = ModelResolver(model_registry="saved_models")
+
+    result["model_load_time"] = None
+    if model_resolver.get_latest_dir_path() is not None:
+        start_time = time.perf_counter()
+        utils.load_object(file_path=model_resolver.get_latest_transformer_path())
+        model_resolver.load_model(dir_path=model_resolver.get_latest_dir_path())
+        result["model_load_time"] = time.perf_counter() - start_time
+
+    # Cost the entry point no longer pays at startup, client construction doesn't wait for a server
+    os.environ.setdefault("MONGO_DB_URL", "mongodb://localhost:27017")
+    from rul import config
+    config.env_var.mongo_db_url = config.env_var.mongo_db_url or os.environ["MONGO_DB_URL"]
+
+    start_time = time.perf_counter()
+    config.get_mongo_client()
+    result["mongo_client_time"] = time.perf_counter() - start_time
+    result["threads_with_mongo_client"] = threading.active_count()
+
+    return result
+
+
+def top_imports(script_path: str, count: int) -> list:
+    """
+    Returns (seconds, package) of heaviest top level packages imported by entry point, self import time of all their modules from `python -X importtime`
+    """
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import runpy; runpy.run_path({script_path!r}, run_name='__benchmark__')"],
+                            check=True, capture_output=True, text=True).stderr
+
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_time) / 1e6
+
+    return sorted(((seconds, package) for package, seconds in packages.items()), reverse=True)[:count]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("scripts", nargs="*", default=["train.py", "batch_predict.py", "app.py"], help="entry point scripts to import")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per entry point, best is reported")
+    parser.add_argument("--top", type=int, default=8, help="heaviest imported packages listed per entry point")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(script_path=args.child)))
+        sys.exit(0)
+
+    for script_path in args.scripts:
+        results = []
+        for _ in range(args.repeat):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", script_path],
+                                    check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        best = min(results, key=lambda result: result["import_time"])
+        print(f"{script_path:<18} import: {best['import_time']:7.3f}s  threads: {best['threads']}  "
+              f"imported pymongo: {best['pymongo_imported']}  sklearn: {best['sklearn_imported']}  scipy: {best['scipy_imported']}  "
+              f"(mongo client on first use: {min(result['mongo_client_time'] for result in results):.3f}s, threads: {best['threads_with_mongo_client']})")
+
+        if best["model_load_time"] is not None:
+            print(f"{'':<18} cold start to model loaded: {min(result['import_time'] + result['model_load_time'] for result in results):7.3f}s")
+
+        for seconds, name in top_imports(script_path=script_path, count=args.top):
+            print(f"    {seconds:7.3f}s  {name}")
@@ -0,0 +1,75 @@
+"Benchmark of model formats: load time and memory of pickled sklearn forest against memory mapped flat forest, each loaded in a fresh process"
+
+
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def memory_status() -> dict:
+    """
+    Returns private (anonymous) and file backed resident memory of this process in MiB, file backed pages are shared through page cache
+    """
+    status = dict(line.split(":", 1) for line in open("/proc/self/status").read().splitlines() if ":" in line)
+    return {key: int(status[key].split()[0]) / 1024 for key in ("RssAnon", "RssFile")}
+
+
+def measure(model_dir_path: str, use_flat_model: bool, rows: int) -> dict:
+    """
+    Loads model of a registry sub directory and predicts `rows` random rows, reporting time and memory growth
+    """
+    from rul.predictor import ModelResolver
+
+    model_resolver = ModelResolver(model_registry=os.path.dirname(model_dir_path))
+
+    before = memory_status()
+    start_time = time.perf_counter()
+    model = model_resolver.load_model(dir_path=model_dir_path, use_flat_model=use_flat_model)
+    load_time = time.perf_counter() - start_time
+    after_load = memory_status()
+
+    if hasattr(model, "set_params"):
+        model.set_params(n_jobs=1)
+
+    model.predict(np.random.default_rng(42).random((rows, 14)))
+    after_predict = memory_status()
+
+    return {
+        "load_time": load_time,
+        "anon_after_load": after_load["RssAnon"] - before["RssAnon"],
+        "file_after_load": after_load["RssFile"] - before["RssFile"],
+        "anon_after_predict": after_predict["RssAnon"] - before["RssAnon"],
+        "file_after_predict": after_predict["RssFile"] - before["RssFile"]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default=None, help="model registry sub directory, latest in saved_models by default")
+    parser.add_argument("--rows", type=int, default=1000, help="rows predicted after loading")
+    parser.add_argument("--child", choices=["pickle", "flat"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(model_dir_path=args.model_dir, use_flat_model=args.child == "flat", rows=args.rows)))
+        sys.exit(0)
+
+    if args.model_dir is None:
+        from rul.predictor import ModelResolver
+        args.model_dir = ModelResolver(model_registry="saved_models").get_latest_dir_path()
+
+    print(f"model directory: {args.model_dir}  rows predicted: {args.rows}  (memory in MiB, file backed memory is shared between processes)")
+    for model_format in ["pickle", "flat"]:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", model_format, "--model-dir", args.model_dir, "--rows", str(args.rows)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        print(f"{model_format:<8} load: {result['load_time']:7.3f}s  "
+              f"after load private: {result['anon_after_load']:7.1f}  shared: {result['file_after_load']:7.1f}  "
+              f"after predict private: {result['anon_after_predict']:7.1f}  shared: {result['file_after_predict']:7.1f}")
\ No newline at end of file
@@ -0,0 +1,91 @@
+"Benchmark of MongoDB dump of CMAPSS files: old JSON round trip with one insert_many against batched unordered inserts built from NumPy values, into mongomock or a local mongod"
+
+
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_dump
+from rul import cmapss
+
+
+def new_client(mongo_url: str):
+    """
+    Returns an empty mongomock client, or a client of `mongo_url` with the benchmark collection dropped
+    """
+    if mongo_url is None:
+        import mongomock
+        return mongomock.MongoClient()
+
+    import pymongo
+    client = pymongo.MongoClient(mongo_url)
+    client[data_dump.DATABASE_NAME].drop_collection(data_dump.COLLECTION_NAME)
+    return client
+
+
+def json_round_trip_documents(file_path: str) -> list:
+    """
+    Documents as the old data_dump.py built them: transpose, JSON serialization and parsing
+    """
+    df = cmapss.read_cmapss_file(file_path, dtype="float64", cache=False)
+    df.reset_index(drop=True, inplace=True)
+    return list(json.loads(df.T.to_json()).values())
+
+
+def numpy_documents(file_path: str, batch_size: int) -> list:
+    """
+    Documents as data_dump.py builds them now, straight from NumPy values
+    """
+    return [document for documents in data_dump.make_batches(cmapss.read_cmapss_file(file_path, dtype="float64", cache=False), "train", "FD001", batch_size) for document in documents]
+
+
+def timed(function) -> float:
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=data_dump.DATA_DIR, help="directory of CMAPSS files")
+    parser.add_argument("--mongo-url", default=None, help="local mongod to dump into, mongomock by default (collection is dropped)")
+    parser.add_argument("--batch-size", type=int, default=data_dump.BATCH_SIZE, help="documents per insert_many call")
+    args = parser.parse_args()
+
+    train_file_path = os.path.join(args.data_dir, "train_FD001.txt")
+    rows = len(cmapss.read_cmapss_file(train_file_path, dtype="float64", cache=False))
+    print(f"backend: {args.mongo_url or 'mongomock'}  train_FD001 rows: {rows}")
+
+    # Building documents only, no database
+    print(f"build documents   json round trip: {timed(lambda: json_round_trip_documents(train_file_path)):7.3f}s  "
+          f"numpy: {timed(lambda: numpy_documents(train_file_path, args.batch_size)):7.3f}s")
+
+    # Old dump of train_FD001: documents through JSON, one ordered insert_many
+    client = new_client(args.mongo_url)
+    old_time = timed(lambda: client[data_dump.DATABASE_NAME][data_dump.COLLECTION_NAME].insert_many(json_round_trip_documents(train_file_path)))
+    print(f"dump train_FD001  old: {old_time:7.3f}s ({rows / old_time:9.0f} rows/s)")
+
+    # New dump of train_FD001 alone, with one and several insert workers
+    train_dir = tempfile.mkdtemp()
+    try:
+        shutil.copy(train_file_path, train_dir)
+        for workers in [1, 4]:
+            client = new_client(args.mongo_url)
+            new_time = timed(lambda: data_dump.dump_data_files(client=client, data_dir=train_dir, batch_size=args.batch_size, workers=workers))
+            print(f"dump train_FD001  new, workers {workers}: {new_time:7.3f}s ({rows / new_time:9.0f} rows/s)")
+    finally:
+        shutil.rmtree(train_dir)
+
+    # Every CMAPSS file, then a rerun which finds all of them already dumped
+    client = new_client(args.mongo_url)
+    all_time = timed(lambda: data_dump.dump_data_files(client=client, data_dir=args.data_dir, batch_size=args.batch_size))
+    total_rows = client[data_dump.DATABASE_NAME][data_dump.COLLECTION_NAME].count_documents({})
+    resume_time = timed(lambda: data_dump.dump_data_files(client=client, data_dir=args.data_dir, batch_size=args.batch_size))
+    print(f"dump all files    new: {all_time:7.3f}s ({total_rows} documents)  rerun: {resume_time:7.3f}s  "
+          f"documents after rerun: {client[data_dump.DATABASE_NAME][data_dump.COLLECTION_NAME].count_documents({})}")
\ No newline at end of file
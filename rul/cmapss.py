@@ -0,0 +1,137 @@
+"CMAPSS dataset reader for RUL package"
+
+
+import os
+import re
+import sys
+from glob import glob
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from rul.config import TARGET_COLUMN
+from rul.exception import RULException
+from rul.logger import logging
+
+
+# CMAPSS files are train_FD00x (run to failure), test_FD00x (truncated trajectories) and RUL_FD00x (true RUL at end of test trajectories)
+DATA_FILE_PATTERN = re.compile(r"^(train|test|RUL)_(FD\d{3})\.txt$")
+
+# Canonical column names of train and test files
+index_names = ["unit_number", "time_cycles"]
+setting_names = ["setting_1", "setting_2", "setting_3"]
+sensor_names = ["s_{}".format(i+1) for i in range(0, 21)]
+col_names = index_names + setting_names + sensor_names
+
+# Columns of RUL files, unit number is the row position in the file
+rul_col_names = ["unit_number", TARGET_COLUMN]
+
+
+def parse_file_name(file_path: str) -> Tuple[str, str]:
+    """
+    Returns (dataset, fd) of a CMAPSS file, e.g. ("train", "FD001") for "./CMaps/train_FD001.txt"
+    """
+    match = DATA_FILE_PATTERN.match(os.path.basename(file_path))
+    if match is None:
+        raise Exception(f"File: {file_path} is not a CMAPSS train, test or RUL file")
+
+    return match.group(1), match.group(2)
+
+
+def find_cmapss_files(data_dir: str) -> List[Tuple[str, str, str]]:
+    """
+    Returns (file path, dataset, fd) of every CMAPSS file of data directory, e.g. ("./CMaps/train_FD001.txt", "train", "FD001")
+    """
+    return [(file_path, *parse_file_name(file_path)) for file_path in sorted(glob(os.path.join(data_dir, "*.txt")))
+            if DATA_FILE_PATTERN.match(os.path.basename(file_path)) is not None]
+
+
+def cache_file_path(file_path: str, dtype: str) -> str:
+    """
+    Returns path of binary cache of a CMAPSS file, next to the source, e.g. "./CMaps/train_FD001.float32.npy"
+    """
+    return f"{os.path.splitext(file_path)[0]}.{np.dtype(dtype).name}.npy"
+
+
+def read_cmapss_file(file_path: str, dtype: str = "float32", cache: bool = True, mmap_mode: Optional[str] = "c") -> pd.DataFrame:
+    """
+    Reads a whitespace separated CMAPSS file into a dataframe of canonical column names, all columns of `dtype`
+    - Text is parsed by the C parser straight into `dtype`, then kept as a `.npy` copy next to the source: later reads memory map
+      the copy instead of parsing, the copy is reparsed when the source is newer
+    - RUL files get the unit number of every row
+    ---------------------------------------------------------------------------------------------------------------------------
+    input:
+    - `file_path`: path of train, test or RUL file
+    - `dtype`: dtype of all columns, `"float32"` halves memory, `"float64"` keeps values exactly as written in the file
+    - `cache`: read and write binary copy next to the source, skipped with a warning if the directory isn't writable
+    - `mmap_mode`: `np.load` memory map mode of binary copy, default `"c"` (copy on write) never modifies the copy
+    ---------------------------------------------------------------------------------------------------------------------------
+    return: `pd.DataFrame`
+    """
+
+    try:
+        dataset, fd = parse_file_name(file_path)
+        columns = rul_col_names if dataset == "RUL" else col_names
+        cache_path = cache_file_path(file_path, dtype)
+
+        if cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+            logging.info(f"Loading binary copy of {dataset}_{fd}: {cache_path}")
+            return pd.DataFrame(np.load(cache_path, mmap_mode=mmap_mode), columns=columns)
+
+        logging.info(f"Parsing {dataset}_{fd}: {file_path}")
+        df = pd.read_csv(file_path, sep=r"\s+", engine="c", header=None, index_col=False, names=columns[-1:] if dataset == "RUL" else columns, dtype=dtype)
+
+        if dataset == "RUL":
+            df.insert(0, "unit_number", np.arange(1, len(df) + 1, dtype=dtype))
+
+        if cache:
+            # Written to a temporary file and renamed, a concurrent reader never sees a partial copy
+            try:
+                with open(f"{cache_path}.tmp", "wb") as cache_file:
+                    np.save(cache_file, df.to_numpy(dtype=dtype))
+                os.replace(f"{cache_path}.tmp", cache_path)
+            except OSError as e:
+                logging.info(f"Binary copy of {dataset}_{fd} not written: {e}")
+
+        return df
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def read_test_with_truth(data_dir: str, fd: str, dtype: str = "float32", cache: bool = True) -> pd.DataFrame:
+    """
+    Reads test trajectories of a subset joined with their true RUL
+    - RUL_FD00x holds true RUL at the last cycle of every test unit, row n for unit n, RUL of earlier cycles counts up from it:
+      RUL = true RUL of unit + last cycle of unit - time cycle
+    - Raises if a test unit has no row in RUL_FD00x
+    ----------------------------------------------------------------------------------------------------------
+    input:
+    - `data_dir`: directory of CMAPSS files
+    - `fd`: subset, e.g. "FD001"
+    - `dtype`: dtype of all columns
+    - `cache`: read and write binary copies next to the sources
+    ----------------------------------------------------------------------------------------------------------
+    return: `pd.DataFrame` of test file columns and `RUL`
+    """
+
+    try:
+        test_df = read_cmapss_file(os.path.join(data_dir, f"test_{fd}.txt"), dtype=dtype, cache=cache)
+        truth_df = read_cmapss_file(os.path.join(data_dir, f"RUL_{fd}.txt"), dtype=dtype, cache=cache)
+
+        unit_numbers = test_df["unit_number"].to_numpy()
+        last_cycles = test_df.groupby("unit_number")["time_cycles"].transform("max").to_numpy()
+
+        # Unit number n is row n of RUL file, a unit without a row is an error instead of taking a neighbour's RUL
+        unit_rows = unit_numbers.astype("int64") - 1
+        unknown_units = np.unique(unit_numbers[(unit_rows < 0) | (unit_rows >= len(truth_df)) | (unit_rows + 1 != unit_numbers)])
+        if len(unknown_units) > 0:
+            raise Exception(f"Test units {unknown_units.tolist()} of {fd} have no true RUL in RUL_{fd}.txt of {len(truth_df)} units")
+
+        true_rul = truth_df[TARGET_COLUMN].to_numpy()[unit_rows]
+
+        test_df[TARGET_COLUMN] = (true_rul + last_cycles - test_df["time_cycles"].to_numpy()).astype(dtype)
+
+        return test_df
+
+    except Exception as e:
+        raise RULException(e, sys)
\ No newline at end of file
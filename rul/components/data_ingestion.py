@@ -3,14 +3,15 @@
 
 import os
 import sys
+import shutil
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 from rul.entity import config_entity
 from rul.entity import artifact_entity
 from rul.exception import RULException
 from rul.logger import logging
 from rul import utils
+from rul.config import DATASET_FIELD, FD_FIELD
 
 
 class DataIngestion:
@@ -30,47 +31,286 @@ class DataIngestion:
         except Exception as e:
             raise RULException(e, sys)
         
+    @staticmethod
+    def get_sensor_columns(df: pd.DataFrame) -> list:
+        """
+        Returns setting and sensor columns, stored as float32 in columnar artifact formats
+        """
+        return [column for column in df.columns if column.startswith(("setting_", "s_"))]
+
+    def get_persistent_stores(self) -> dict:
+        """
+        Returns size key of high water mark to path of every persistent store, feature store first
+        """
+        return {
+            "feature_store_size": self.data_ingestion_config.persistent_feature_store_file_path,
+            "train_size": self.data_ingestion_config.persistent_train_file_path,
+            "test_size": self.data_ingestion_config.persistent_test_file_path
+        }
+
+    def load_high_water_mark(self) -> dict:
+        """
+        Loads high water mark of incremental ingestion and rolls back store appends left unfinished by a failed run
+        -----------------------------------------------------------------------------------------------------------------------
+        input:
+        - `None`
+        -----------------------------------------------------------------------------------------------------------------------
+        return: `dict` with size in bytes of every persistent store and `last_run`, number of last completed ingestion run
+                (0 if nothing ingested yet)
+        """
+
+        try:
+            high_water_mark_file_path = self.data_ingestion_config.high_water_mark_file_path
+            stores = self.get_persistent_stores()
+
+            empty_mark = {**{size_key: 0 for size_key in stores}, "last_run": 0}
+
+            if not os.path.exists(high_water_mark_file_path):
+                logging.info(f"No high water mark found, ingesting whole collection")
+                return empty_mark
+
+            high_water_mark = utils.read_yaml_file(file_path=high_water_mark_file_path)
+
+            # Mark of an older layout (per unit max cycles or `_id` mark) or a store lost since: stores can't be trusted, starting over
+            if "last_run" not in high_water_mark or any(high_water_mark[size_key] > 0 and not os.path.exists(file_path) for size_key, file_path in stores.items()):
+                logging.info(f"High water mark doesn't match persistent stores, rebuilding them from whole collection")
+                for file_path in list(stores.values()) + [high_water_mark_file_path]:
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                return empty_mark
+
+            # Rows appended after high water mark was last written were never recorded, they are pulled again
+            for size_key, file_path in stores.items():
+                if os.path.exists(file_path) and os.path.getsize(file_path) > high_water_mark[size_key]:
+                    logging.info(f"Truncating unrecorded rows of: {file_path} to {high_water_mark[size_key]} bytes")
+                    os.truncate(file_path, high_water_mark[size_key])
+
+            return high_water_mark
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def write_high_water_mark(self, last_run: int) -> None:
+        """
+        Records current sizes of persistent stores and last completed run, replacing mark file atomically so a failed write never leaves a partial mark
+        """
+        high_water_mark_file_path = self.data_ingestion_config.high_water_mark_file_path
+        utils.write_yaml_file(file_path=f"{high_water_mark_file_path}.tmp", data={
+            **{size_key: os.path.getsize(file_path) if os.path.exists(file_path) else 0 for size_key, file_path in self.get_persistent_stores().items()},
+            "last_run": last_run
+        })
+        os.replace(f"{high_water_mark_file_path}.tmp", high_water_mark_file_path)
+
+    def get_subset_query(self) -> dict:
+        """
+        Returns MongoDB filter of documents of the configured CMAPSS subset, untagged documents of older dumps are tagged by `data_dump.py`
+        """
+        return {
+            DATASET_FIELD: self.data_ingestion_config.dataset,
+            FD_FIELD: self.data_ingestion_config.fd
+        }
+
+    def pull_new_cycles(self) -> pd.DataFrame:
+        """
+        Pulls documents not ingested yet from database, appends them to persistent stores and moves the high water mark
+        - Documents without ingest run field are stamped with the number of this run, then every document stamped after the
+          last completed run is pulled: one range filter whatever the fleet size, documents committed late by any writer are
+          stamped by the next run instead of being skipped
+        - Documents stamped by a run which failed before moving the mark are pulled again
+        - New cycles are split by unit hash into persistent train and test stores, rows already stored are never re-split
+        -----------------------------------------------------------------------------------------------------------------------
+        input:
+        - `None`
+        -----------------------------------------------------------------------------------------------------------------------
+        return: `pd.DataFrame` of new cycles
+        """
+
+        try:
+            high_water_mark = self.load_high_water_mark()
+            last_run = high_water_mark["last_run"]
+
+            database_name, collection_name = self.data_ingestion_config.database_name, self.data_ingestion_config.collection_name
+            run_field = self.data_ingestion_config.ingest_run_field
+
+            # Run number above every stamp, so stamps of failed runs or of stores rebuilt from scratch are never reused
+            last_stamp = utils.get_collection_max_value(database_name=database_name, collection_name=collection_name, field=run_field, query=self.get_subset_query())
+            run = max(last_run, last_stamp or 0) + 1
+
+            stamped = utils.stamp_new_documents(database_name=database_name, collection_name=collection_name, field=run_field, value=run, query=self.get_subset_query())
+            logging.info(f"Stamped {stamped} new documents with {run_field}: {run}")
+
+            logging.info(f"Exporting documents with {run_field} after last completed run: {last_run}")
+            df: pd.DataFrame = utils.get_collection_as_dataframe(database_name=database_name, collection_name=collection_name,
+                                                                 query={"$and": [self.get_subset_query(), {run_field: {"$gt": last_run}}]},
+                                                                 exclude_fields=[DATASET_FIELD, FD_FIELD, run_field])
+
+            if len(df) == 0:
+                logging.info(f"No documents after last completed run: {last_run}")
+                return df
+
+            df.replace(to_replace="na", value=np.nan, inplace=True)
+
+            # Unit decides the set of every row, same split as whole dataset ingestion
+            is_test_row = utils.unit_split_mask(unit_numbers=df["unit_number"].to_numpy(), test_size=self.data_ingestion_config.test_size, seed=self.data_ingestion_config.split_seed)
+
+            stores = self.get_persistent_stores()
+            for size_key, part_df in [("feature_store_size", df), ("train_size", df[~is_test_row]), ("test_size", df[is_test_row])]:
+                self.append_to_store(df=part_df, file_path=stores[size_key], store_size=high_water_mark[size_key])
+
+            # Moving high water mark only after new cycles are stored
+            self.write_high_water_mark(last_run=run)
+
+            return df
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    @staticmethod
+    def append_to_store(df: pd.DataFrame, file_path: str, store_size: int) -> None:
+        """
+        Appends rows to a persistent CSV store with the column order of the stored ones, header only for a new store
+        """
+        if len(df) == 0:
+            return
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        if store_size > 0:
+            stored_columns = list(pd.read_csv(file_path, nrows=0).columns)
+
+            dropped_columns = [column for column in df.columns if column not in stored_columns]
+            if len(dropped_columns) > 0:
+                logging.info(f"Columns not in store: {file_path} are not stored: {dropped_columns}")
+
+            df = df.reindex(columns=stored_columns)
+
+        logging.info(f"Appending {len(df)} new cycles to: {file_path}")
+        df.to_csv(path_or_buf=file_path, mode="a", index=False, header=store_size == 0)
+
+    def get_incremental_artifact(self, new_rows: int, changed_units: list) -> artifact_entity.DataIngestionArtifact:
+        """
+        Prepares Data Ingestion Artifact of incremental ingestion from persistent train and test stores
+        - Stores already hold the split of every earlier run, only a copy in the artifact format is written
+        - No new rows: artifact points at the persistent stores and nothing is written, training pipeline stops there
+        -------------------------------------------------------------------------------------------------------------
+        input:
+        - `new_rows`: number of rows pulled in this run
+        - `changed_units`: unit numbers which got new cycles in this run
+        -------------------------------------------------------------------------------------------------------------
+        return: `DataIngestionArtifact`
+        """
+        persistent_train_file_path = self.data_ingestion_config.persistent_train_file_path
+        persistent_test_file_path = self.data_ingestion_config.persistent_test_file_path
+
+        if new_rows == 0:
+            return artifact_entity.DataIngestionArtifact(
+                feature_store_file_path = self.data_ingestion_config.persistent_feature_store_file_path,
+                train_file_path = persistent_train_file_path,
+                test_file_path = persistent_test_file_path,
+                new_rows = new_rows,
+                changed_units = changed_units
+            )
+
+        if not (os.path.exists(persistent_train_file_path) and os.path.exists(persistent_test_file_path)):
+            raise Exception(f"Unit split left train or test store empty, change `split_seed` or `test_size` and remove: {self.data_ingestion_config.persistent_feature_store_dir}")
+
+        # Creating dataset directory
+        logging.info(f"Creating dataset directory if not exist")
+        os.makedirs(os.path.dirname(self.data_ingestion_config.train_file_path), exist_ok=True)
+
+        for persistent_file_path, file_path in [(persistent_train_file_path, self.data_ingestion_config.train_file_path),
+                                                (persistent_test_file_path, self.data_ingestion_config.test_file_path)]:
+            logging.info(f"Saving {persistent_file_path} to dataset directory")
+            if file_path.endswith(".csv"):
+                shutil.copyfile(persistent_file_path, file_path)
+            else:
+                df = pd.read_csv(persistent_file_path)
+                utils.write_dataframe(df=df, file_path=file_path, float32_columns=self.get_sensor_columns(df))
+
+        # Prepare artifacts
+        logging.info(f"Preparing Data Ingestion Artifacts")
+        return artifact_entity.DataIngestionArtifact(
+            feature_store_file_path = self.data_ingestion_config.persistent_feature_store_file_path,
+            train_file_path = self.data_ingestion_config.train_file_path,
+            test_file_path = self.data_ingestion_config.test_file_path,
+            new_rows = new_rows,
+            changed_units = changed_units
+        )
+
     def initiate_data_ingestion(self)->artifact_entity.DataIngestionArtifact:
         try:
-            # Collecting MongoDB collection as dataframe
-            logging.info(f"Exporting MongoDB collection to dataframe")
-            df: pd.DataFrame = utils.get_collection_as_dataframe(database_name=self.data_ingestion_config.database_name, collection_name=self.data_ingestion_config.collection_name)
+            if self.data_ingestion_config.incremental:
+                # Collecting only new cycles, they are split and appended to persistent train and test stores
+                logging.info(f"Pulling new cycles from MongoDB collection into persistent stores")
+                new_df = self.pull_new_cycles()
+
+                new_rows = len(new_df)
+                changed_units = sorted(new_df["unit_number"].unique().tolist()) if new_rows > 0 else []
+
+                logging.info(f"New rows: {new_rows}, changed units: {len(changed_units)}")
+
+                return self.get_incremental_artifact(new_rows=new_rows, changed_units=changed_units)
+
+            else:
+                # Collecting MongoDB collection as dataframe
+                logging.info(f"Exporting MongoDB collection to dataframe")
+                df: pd.DataFrame = utils.get_collection_as_dataframe(database_name=self.data_ingestion_config.database_name, collection_name=self.data_ingestion_config.collection_name,
+                                                                     query=self.get_subset_query(), exclude_fields=[DATASET_FIELD, FD_FIELD])
 
-            # Replace na with Nan
-            logging.info(f"Replacing na values with NAN values")
-            df.replace(to_replace="na", value=np.NAN, inplace=True)
+                if len(df) == 0:
+                    raise Exception(f"No documents of {self.data_ingestion_config.dataset}_{self.data_ingestion_config.fd} in collection, run data_dump.py to dump or tag them")
 
-            # Creating feature store
-            logging.info(f"Creating feature directory if not exist")
-            feature_store_dir = os.path.dirname(self.data_ingestion_config.feature_store_file_path)
-            os.makedirs(feature_store_dir, exist_ok=True)
+                new_rows = len(df)
+                changed_units = sorted(df["unit_number"].unique().tolist())
 
-            # Saving dataframe as csv to feature store
-            logging.info(f"Saving feature to feature directory")
-            df.to_csv(path_or_buf=self.data_ingestion_config.feature_store_file_path, index=False, header=True)
+                feature_store_file_path = self.data_ingestion_config.feature_store_file_path
+
+                # Replace na with Nan
+                logging.info(f"Replacing na values with NAN values")
+                df.replace(to_replace="na", value=np.nan, inplace=True)
+
+                # Creating feature store
+                logging.info(f"Creating feature directory if not exist")
+                feature_store_dir = os.path.dirname(feature_store_file_path)
+                os.makedirs(feature_store_dir, exist_ok=True)
+
+                # Saving dataframe to feature store
+                logging.info(f"Saving feature to feature directory")
+                utils.write_dataframe(df=df, file_path=feature_store_file_path, float32_columns=self.get_sensor_columns(df))
+
+            logging.info(f"New rows: {new_rows}, changed units: {len(changed_units)}")
 
             # Creating dataset directory
             logging.info(f"Creating dataset director y if not exist")
             dataset_dir = os.path.dirname(self.data_ingestion_config.train_file_path)
             os.makedirs(dataset_dir, exist_ok=True)
 
-            # Splitting dataset into train and test set
-            logging.info(f"Performing Train Test Split")
-            train_df, test_df = train_test_split(df, test_size=self.data_ingestion_config.test_size, random_state=42)
+            # Splitting dataset into train and test set by unit, so no engine has cycles in both sets
+            logging.info(f"Performing Train Test Split by unit number")
+            is_test_row = utils.unit_split_mask(unit_numbers=df["unit_number"].to_numpy(), test_size=self.data_ingestion_config.test_size, seed=self.data_ingestion_config.split_seed)
+            train_df, test_df = df[~is_test_row], df[is_test_row]
+
+            train_units, test_units = train_df["unit_number"].nunique(), test_df["unit_number"].nunique()
+            if train_units == 0 or test_units == 0:
+                raise Exception(f"Unit split left train set with {train_units} units and test set with {test_units} units, change `split_seed` or `test_size`")
+
+            logging.info(f"Train units: {train_units}, test units: {test_units}")
 
             # Save train and test dataframe to dataset directory
             logging.info(f"Saving Train Set to dataset directory")
-            train_df.to_csv(path_or_buf=self.data_ingestion_config.train_file_path, index=False, header=True)
+            utils.write_dataframe(df=train_df, file_path=self.data_ingestion_config.train_file_path, float32_columns=self.get_sensor_columns(df))
 
             logging.info(f"Saving Test Set to dataset directory")
-            test_df.to_csv(path_or_buf=self.data_ingestion_config.test_file_path, index=False, header=True)
+            utils.write_dataframe(df=test_df, file_path=self.data_ingestion_config.test_file_path, float32_columns=self.get_sensor_columns(df))
 
             # Prepare artifacts
             logging.info(f"Preparing Data Ingestion Artifacts")
             data_ingestion_artifact = artifact_entity.DataIngestionArtifact(
-                feature_store_file_path = self.data_ingestion_config.feature_store_file_path,
+                feature_store_file_path = feature_store_file_path,
                 train_file_path = self.data_ingestion_config.train_file_path,
-                test_file_path = self.data_ingestion_config.test_file_path
+                test_file_path = self.data_ingestion_config.test_file_path,
+                new_rows = new_rows,
+                changed_units = changed_units
             )
 
             return data_ingestion_artifact
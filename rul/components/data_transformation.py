@@ -13,6 +13,8 @@ from rul.entity import artifact_entity
 from rul.exception import RULException
 from rul.logger import logging
 from rul import utils
+from rul.config import INPUT_FEATURE_COLUMNS
+from rul.preprocessing import FusedTransformer
 
 
 class DataTransformation:
@@ -62,28 +64,28 @@ class DataTransformation:
         except Exception as e:
             raise RULException(e, sys)
     
-    def add_RUL_feature(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def add_RUL_feature(df: pd.DataFrame, max_rul: Optional[int] = None) -> pd.DataFrame:
         """"
-        Adds target feature RUL to the dataframe
-        ---------------------------------------------
+        Adds target feature RUL to the dataframe in place
+        -----------------------------------------------------------------------------------------
         input:
         -  `df`: dataframe in which to add RUL
-        ----------------------------------------------
+        -  `max_rul`: if given, RUL is clipped to it (piecewise linear RUL), else RUL is linear
+        -----------------------------------------------------------------------------------------
         return: `pd.Dataframe`
         """
 
         try:
-            train_grouped_by_unit = df.groupby(by='unit_number') 
-
-            max_time_cycles = train_grouped_by_unit['time_cycles'].max() 
-
-            merged = df.merge(max_time_cycles.to_frame(name='max_time_cycle'), left_on='unit_number',right_index=True)
+            # Broadcasting max time cycle of every unit to its rows without merging a copy of dataframe
+            max_time_cycles = df.groupby(by='unit_number', sort=False)['time_cycles'].transform('max')
 
-            merged["RUL"] = merged["max_time_cycle"] - merged['time_cycles']
+            df["RUL"] = max_time_cycles - df['time_cycles']
 
-            merged = merged.drop("max_time_cycle", axis=1) 
+            if max_rul is not None:
+                df["RUL"] = df["RUL"].clip(upper=max_rul)
 
-            return merged
+            return df
         
         except Exception as e:
             raise RULException(e, sys)
@@ -99,21 +101,24 @@ class DataTransformation:
         """
 
         try:
+            # Only index columns (for RUL) and input features are read, other columns are dropped anyway
+            required_columns = ["unit_number", "time_cycles"] + INPUT_FEATURE_COLUMNS
+
             # Reading train file
             logging.info(f"Reading train file")
-            train_df = pd.read_csv(self.data_ingestion_artifact.train_file_path)
+            train_df = utils.read_dataframe(file_path=self.data_ingestion_artifact.train_file_path, columns=required_columns)
 
             # Reading test file 
             logging.info(f"Reading test file")
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            test_df = utils.read_dataframe(file_path=self.data_ingestion_artifact.test_file_path, columns=required_columns)
 
             # Adding RUL feature to train dataFrame
             logging.info(f"Adding RUL to train dataFrame")
-            train_df = self.add_RUL_feature(train_df)
+            train_df = self.add_RUL_feature(train_df, max_rul=self.data_transformation_config.max_rul)
             
             # Adding RUL feature to test dataFrame
             logging.info(f"Adding RUL to test dataFrame")
-            test_df = self.add_RUL_feature(test_df)
+            test_df = self.add_RUL_feature(test_df, max_rul=self.data_transformation_config.max_rul)
 
             # Defining irrelevant features aka: index, setting and constant sensor 
             logging.info(f"Proceeding to drop irrelevant index, setting and constant sensor features")
@@ -121,7 +126,7 @@ class DataTransformation:
             setting_names = ["setting_1", "setting_2", "setting_3"]
             constant_sensors = ["s_1", "s_5",'s_6', "s_10", "s_16", "s_18", "s_19"]
 
-            drop_labels = index_names + setting_names + constant_sensors
+            drop_labels = [column for column in index_names + setting_names + constant_sensors if column in train_df.columns]
 
             # Dropping irrelevant features from train dataFrame
             logging.info(f"Dropping irrelevant features from train dataFrame")
@@ -136,6 +141,11 @@ class DataTransformation:
             transformation_pipeline = DataTransformation.get_data_transformer_object()
             transformation_pipeline.fit(train_df)
 
+            # Folding fitted pipeline into fused transformer
+            if self.data_transformation_config.fuse_transformer:
+                logging.info(f"Fusing fitted transformation pipeline into one {self.data_transformation_config.transformer_dtype} transform")
+                transformation_pipeline = FusedTransformer.from_pipeline(pipeline=transformation_pipeline, dtype=self.data_transformation_config.transformer_dtype)
+
             # Transforming train dataFrame
             logging.info(f"Transforming train dataFrame")
             train_arr = transformation_pipeline.transform(train_df)
@@ -160,7 +170,8 @@ class DataTransformation:
             data_transformation_artifact = artifact_entity.DataTransformationArtifact(
                                                                         transformer_object_path=self.data_transformation_config.data_transformer_object_path,
                                                                         transformed_train_path=self.data_transformation_config.data_transformed_train_path,
-                                                                        transformed_test_path=self.data_transformation_config.data_transformed_test_path
+                                                                        transformed_test_path=self.data_transformation_config.data_transformed_test_path,
+                                                                        max_rul=self.data_transformation_config.max_rul
                                                                         )
             
             return data_transformation_artifact
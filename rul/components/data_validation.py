@@ -6,7 +6,7 @@ import sys
 import numpy as np
 import pandas as pd
 from typing import Optional
-from scipy.stats import ks_2samp
+from rul.drift import DriftEngine, sort_columns
 from rul.entity import config_entity
 from rul.entity import artifact_entity
 from rul.config import TARGET_COLUMN
@@ -78,12 +78,12 @@ class DataValidation:
         except Exception as e:
             raise RULException(e, sys)
 
-    def is_required_columns_exist(self, base_df: pd.DataFrame, current_df: pd.DataFrame, report_key: str) -> bool:
+    def is_required_columns_exist(self, base_columns: list, current_df: pd.DataFrame, report_key: str) -> bool:
         """
         Drops the columns from DataFrame which have null value percent more than threshold
         ---------------------------------------------------------------------
         input:
-        - `base_df`: DataFrame from which we are validating(base info)
+        - `base_columns`: columns of DataFrame from which we are validating(base info)
         - `current_df`: DataFrame which we are validating
         - `report_key`: Name of the key with which ot save report in self.validation_error attribute
         ---------------------------------------------------------------------
@@ -91,9 +91,8 @@ class DataValidation:
         """
 
         try:
-            # Initializing columns of base and current data frame
-            logging.info(f"Initializing columns of base and current data frame")
-            base_columns = base_df.columns
+            # Initializing columns of current data frame
+            logging.info(f"Initializing columns of current data frame")
             current_columns = current_df.columns
 
             # Initializing missing columns to store missing column names
@@ -117,13 +116,13 @@ class DataValidation:
         except Exception as e:
             raise RULException(e, sys)
         
-    def data_drift(self, base_df: pd.DataFrame, current_df: pd.DataFrame, report_key: str) ->None:
+    def data_drift(self, drift_engine: DriftEngine, current_df: pd.DataFrame, report_key: str) ->None:
         """
         Calculates Data Drift in base and current DataFrame
         - Null Hypothesis is that both column data are drawn from same distribution
         ---------------------------------------------------------------------------------------------
         input:
-        - `base_df`: DataFrame from which we are validating(base info)
+        - `drift_engine`: Drift engine holding the sorted columns of DataFrame from which we are validating(base info)
         - `current_df`: DataFrame which we are validating
         - `report_key`: Name of the key with which to save report in self.validation_error attribute
         ---------------------------------------------------------------------------------------------
@@ -131,52 +130,134 @@ class DataValidation:
         """
 
         try:
-            # Initializing data drift dict to store drift stats
-            logging.info(f"Initializing data drift dictionary")
-            drift_report = dict()
+            # Comparing all the base columns with current columns in one pass
+            logging.info(f"Calculating stats for distribution analysis of columns: {drift_engine.columns}")
+            drift = drift_engine.compare(current_df=current_df)
 
-            # Initializing columns of base and current data frame
-            logging.info(f"Initializing columns of base and current data frame")
-            base_columns = base_df.columns
-            current_columns = current_df.columns
+            drifted_columns = [column for column, report in drift["drift_report"].items() if not report["same_distribution"]]
+            logging.info(f"Rejecting Null Hypothesis for columns: {drifted_columns}")
 
-            # Collecting for each column in base dataframe
-            for base_column in base_columns:
-                # ----NULL HYPOTHESIS----
-                # Creating base_data and current_data DataFrame only for all the columns which are common in base and current DataFrame
-                logging.info(f"Creating base and current data")
-                base_data, current_data = base_df[base_column], current_df[base_column]
-
-                logging.info(f"Hypothesis {base_column}: {base_data.dtype}, {current_data.dtype}")
-
-                # Checking distribution
-                logging.info(f"Calculating stats for distribution analysis")
-                same_distribution = ks_2samp(base_data, current_data)
-
-                # Updating drift report based on same distribution
-                logging.info(f"Creating drift report for distribution")
-                if same_distribution.pvalue > 0.05:
-                    # -----Accepting NULL HYPOTHESIS------
-                    logging.info(f"Accepting Null Hypothesis")
-                    drift_report[base_column] = {
-                        "pvalues": float(same_distribution.pvalue),
-                        "same_distribution": True
-                        }
-                else:
-                    # -------Rejecting NULL HYPOTHESIS-----
-                    logging.info(f"Rejecting Null Hypothesis")
-                    drift_report[base_column] = {
-                        "pvalues": float(same_distribution.pvalue),
-                        "same_distribution": False
-                    }
+            # Adding report about distribution
+            logging.info(f"Adding report about drift in validation error")
+            self.validation_error[report_key] = drift["drift_report"]
 
-                # Adding report about distribution
-                logging.info(f"Adding report about drift in validation error")
-                self.validation_error[report_key] = drift_report
+            # Adding sample size and error bound when drift was calculated on a sample
+            if drift["sample"] is not None:
+                self.validation_error[f"{report_key}_sample"] = drift["sample"]
 
         except Exception as e:
             raise RULException(e, sys)
         
+    def write_base_profile_file(self, profile: dict) -> None:
+        """
+        Replaces base profile file atomically, a concurrent run reads either the old or the new profile
+        """
+        temp_profile_file_path = f"{self.data_validation_config.base_profile_file_path}.{os.getpid()}.tmp"
+        utils.write_yaml_file(file_path=temp_profile_file_path, data=profile)
+        os.replace(temp_profile_file_path, self.data_validation_config.base_profile_file_path)
+
+    def get_base_profile(self) -> dict:
+        """
+        Returns profile of base dataset: columns, null ratios, dropped columns and column wise sorted values
+        - Profile is built from base file once and persisted, later runs memory map it until base file changes
+        ------------------------------------------------------------------------------------------------------------
+        input:
+        - `None`
+        ------------------------------------------------------------------------------------------------------------
+        return: `dict` with `columns`, `null_ratios`, `dropped_columns` and memory mapped `sorted_columns`
+        """
+
+        try:
+            base_file_path = self.data_validation_config.base_file_path
+            base_file_stat = os.stat(base_file_path)
+
+            # => Reusing persisted profile if base file, missing value threshold and drift dtype are unchanged
+            if os.path.exists(self.data_validation_config.base_profile_file_path) and os.path.exists(self.data_validation_config.base_sorted_columns_file_path):
+                profile = utils.read_yaml_file(file_path=self.data_validation_config.base_profile_file_path)
+
+                # Checksum is only recomputed when size is same but modification time moved
+                if profile["file_size"] != base_file_stat.st_size:
+                    is_base_file_unchanged = False
+                elif profile["file_mtime"] == base_file_stat.st_mtime:
+                    is_base_file_unchanged = True
+                else:
+                    is_base_file_unchanged = profile["checksum"] == utils.file_checksum(file_path=base_file_path)
+
+                    # Recording modification time of unchanged content, so later runs don't hash the base file again
+                    if is_base_file_unchanged:
+                        logging.info(f"Base file touched but content unchanged, refreshing modification time of base profile")
+                        profile["file_mtime"] = base_file_stat.st_mtime
+                        self.write_base_profile_file(profile=profile)
+
+                if (is_base_file_unchanged and profile["missing_value_threshold"] == self.data_validation_config.missing_value_threshold
+                        and profile.get("drift_dtype") == self.data_validation_config.drift_dtype):
+                    logging.info(f"Memory mapping cached base profile from: {self.data_validation_config.base_profile_dir}")
+                    profile["sorted_columns"] = np.load(self.data_validation_config.base_sorted_columns_file_path, mmap_mode="r")
+
+                    self.validation_error["missing_values_within_base_dataset"] = profile["dropped_columns"]
+
+                    return profile
+
+                logging.info(f"Base file, missing value threshold or drift dtype changed, rebuilding base profile")
+
+            # => Building profile from base file
+            logging.info(f"Reading base DataFrame")
+            base_df = pd.read_csv(base_file_path)
+
+            # Replace Na values in base dataframe with Nan
+            logging.info(f"Replace Na values in base dataFrame with Nan")
+            base_df.replace({"na": np.nan}, inplace=True)
+
+            null_ratios = {column: float(ratio) for column, ratio in (base_df.isna().sum() / base_df.shape[0]).items()}
+
+            # Drop missing values from base dataFrame
+            logging.info(f"Drop missing values columns from base dataFrame")
+            base_df = self.drop_missing_values_columns(df=base_df, report_key="missing_values_within_base_dataset")
+
+            # Converting input feature columns of base dataFrame to float
+            logging.info(f"Converting input feature columns of base dataFrame to float")
+            base_df = utils.convert_columns_float(df=base_df, exclude_columns=[TARGET_COLUMN])
+
+            profile = {
+                "checksum": utils.file_checksum(file_path=base_file_path),
+                "file_size": base_file_stat.st_size,
+                "file_mtime": base_file_stat.st_mtime,
+                "missing_value_threshold": self.data_validation_config.missing_value_threshold,
+                "drift_dtype": self.data_validation_config.drift_dtype,
+                "rows": int(base_df.shape[0]),
+                "columns": list(base_df.columns),
+                "null_ratios": null_ratios,
+                "dropped_columns": self.validation_error["missing_values_within_base_dataset"]
+            }
+
+            sorted_columns = sort_columns(base_df.to_numpy(dtype="float64"), dtype=self.data_validation_config.drift_dtype)
+
+            # Persisting profile, sorted values first and profile file last so a readable profile file means a complete profile
+            logging.info(f"Saving base profile to: {self.data_validation_config.base_profile_dir}")
+            os.makedirs(self.data_validation_config.base_profile_dir, exist_ok=True)
+
+            temp_sorted_columns_file_path = f"{self.data_validation_config.base_sorted_columns_file_path}.{os.getpid()}.tmp"
+            with open(temp_sorted_columns_file_path, "wb") as sorted_columns_file:
+                np.save(sorted_columns_file, sorted_columns)
+            os.replace(temp_sorted_columns_file_path, self.data_validation_config.base_sorted_columns_file_path)
+
+            self.write_base_profile_file(profile=profile)
+
+            profile["sorted_columns"] = sorted_columns
+
+            return profile
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    @staticmethod
+    def get_base_columns_in_file(base_columns: list, file_path: str) -> list:
+        """
+        Returns base dataset columns present in a dataframe file, read from its header or schema only
+        """
+        file_columns = set(utils.read_dataframe_columns(file_path=file_path))
+        return [column for column in base_columns if column in file_columns]
+
     def initiate_data_validation(self) -> artifact_entity.DataValidationArtifact:
         """
         Initiates Data Validation Component
@@ -187,22 +268,17 @@ class DataValidation:
         """
 
         try:
-            # Reading base DataFrame
-            logging.info(f"Reading base DataFrame")
-            base_df = pd.read_csv(self.data_validation_config.base_file_path)
+            # Loading base profile, built from base file only when base file changed
+            logging.info(f"Loading base profile")
+            base_profile = self.get_base_profile()
 
-            # Reading train DataFrame
-            train_df = pd.read_csv(self.data_ingestion_artifact.train_file_path)
+            # Reading train DataFrame, only columns known to base dataset are validated
+            train_df = utils.read_dataframe(file_path=self.data_ingestion_artifact.train_file_path,
+                                            columns=self.get_base_columns_in_file(base_columns=base_profile["columns"], file_path=self.data_ingestion_artifact.train_file_path))
 
             # Reading test DataFrame
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
-
-            # Replace Na values in base dataframe with Nan
-            logging.info(f"Replace Na values in base dataFrame with Nan")
-            base_df.replace({"na": np.NAN}, inplace=True)
-            # Drop missing values from base dataFrame
-            logging.info(f"Drop missing values columns from base dataFrame")
-            base_df = self.drop_missing_values_columns(df=base_df, report_key="missing_values_within_base_dataset")
+            test_df = utils.read_dataframe(file_path=self.data_ingestion_artifact.test_file_path,
+                                           columns=self.get_base_columns_in_file(base_columns=base_profile["columns"], file_path=self.data_ingestion_artifact.test_file_path))
 
             # Drop missing values from train dataFrame
             logging.info(f"Drop missing values columns from train dataFrame")
@@ -212,12 +288,8 @@ class DataValidation:
             logging.info(f"Drop missing values columns from test dataFrame")
             test_df = self.drop_missing_values_columns(df=test_df, report_key="missing_values_within_test_dataset")
 
-            # Converting input feature columns of base dataFrame to float
             excluded_columns = [TARGET_COLUMN]
 
-            logging.info(f"Converting input feature columns of base dataFrame to float")
-            base_df = utils.convert_columns_float(df=base_df, exclude_columns=excluded_columns)
-
             # Converting input feature columns of train dataframe to float
             logging.info(f"Converting input feature columns of train dataFrame to float")
             train_df = utils.convert_columns_float(df=train_df, exclude_columns=excluded_columns)
@@ -228,21 +300,30 @@ class DataValidation:
 
             # Checking required columns in train dataFrame
             logging.info(f"Checking required columns present in train dataFrame or not")
-            train_df_columns_status = self.is_required_columns_exist(base_df=base_df, current_df=train_df, report_key="missing_columns_within_train_dataset")
+            train_df_columns_status = self.is_required_columns_exist(base_columns=base_profile["columns"], current_df=train_df, report_key="missing_columns_within_train_dataset")
 
             # Checking required columns in test dataFrame
             logging.info(f"Checking required columns present in test dataFrame or not")
-            test_df_columns_status = self.is_required_columns_exist(base_df=base_df, current_df=test_df, report_key="missing_columns_within_test_dataset")
+            test_df_columns_status = self.is_required_columns_exist(base_columns=base_profile["columns"], current_df=test_df, report_key="missing_columns_within_test_dataset")
+
+            # Sorted base columns are shared by train and test drift
+            logging.info(f"Creating drift engine from base profile")
+            drift_engine = DriftEngine.from_sorted(columns=base_profile["columns"],
+                                                   base_sorted=base_profile["sorted_columns"],
+                                                   metrics=self.data_validation_config.drift_metrics,
+                                                   max_sample_size=self.data_validation_config.drift_max_sample_size,
+                                                   dtype=self.data_validation_config.drift_dtype
+                                                   )
 
             # Creating Data drift report for train data
             if train_df_columns_status:
                 logging.info(f"Required columns present in train dataFrame so detecting data drift for it")
-                self.data_drift(base_df=base_df, current_df=train_df, report_key="data_drift_within_train_dataset")
+                self.data_drift(drift_engine=drift_engine, current_df=train_df, report_key="data_drift_within_train_dataset")
 
             # Creating Data drift report for test data
             if test_df_columns_status:
                 logging.info(f"Required columns present in test dataFrame so detecting data drift for it")
-                self.data_drift(base_df=base_df, current_df=test_df, report_key="data_drift_within_test_dataset")
+                self.data_drift(drift_engine=drift_engine, current_df=test_df, report_key="data_drift_within_test_dataset")
 
             # Writing complete validation report
             logging.info(f"Creating validation report")
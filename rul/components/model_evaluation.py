@@ -2,14 +2,24 @@
 
 
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+import numpy as np
 import pandas as pd
-from sklearn.metrics import r2_score
 from rul.entity import config_entity
 from rul.entity import artifact_entity
 from rul.exception import RULException
 from rul.logger import logging
 from rul.predictor import ModelResolver
+from rul.config import INPUT_FEATURE_COLUMNS, TARGET_COLUMN
+from rul.components.data_transformation import DataTransformation
 from rul import utils
+from rul import metrics
+
+
+# Start of the error raised when the trained model is rejected, told apart from failures by the job queue
+MODEL_REJECTED_MESSAGE = "Current trained model(model saved in this pipeline) is not better than previous model(already deployed one)"
 
 
 class ModelEvaluation:
@@ -40,6 +50,56 @@ class ModelEvaluation:
         except Exception as e:
             raise RULException(e, sys)
         
+    @staticmethod
+    def predict_rul(transformer: object, model: object, test_df: pd.DataFrame) -> Tuple[np.array, float]:
+        """
+        Predicts RUL in cycles for raw test dataframe through given transformer and model
+        --------------------------------------------------------------------------------------
+        input:
+        - `transformer`: fitted transformer the model was trained with
+        - `model`: trained model object
+        - `test_df`: raw test dataframe of input features and RUL as last column
+        --------------------------------------------------------------------------------------
+        return: predicted RUL and wall clock seconds taken to transform, predict and unscale it
+        """
+
+        try:
+            start_time = time.perf_counter()
+
+            input_arr = transformer.transform(test_df)[:,:-1]
+
+            y_pred = utils.inverse_transform_target(transformer=transformer, y=model.predict(input_arr))
+
+            return y_pred, time.perf_counter() - start_time
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def get_model_report(self, y_true: np.array, y_pred: np.array, units: np.array, predict_time: float) -> dict:
+        """
+        Builds evaluation report of one model: overall metrics, metrics per true RUL band and per unit, and prediction speed
+        ------------------------------------------------------------------------------------------------------------------------
+        input:
+        - `y_true`: true RUL of test set
+        - `y_pred`: predicted RUL of test set
+        - `units`: unit number of every test row
+        - `predict_time`: wall clock seconds taken to predict test set
+        ------------------------------------------------------------------------------------------------------------------------
+        return: `dict`
+        """
+
+        try:
+            return {
+                "overall": metrics.regression_metrics(y_true=y_true, y_pred=y_pred),
+                "rul_band": metrics.sliced_metrics(y_true=y_true, y_pred=y_pred, groups=metrics.rul_bands(y_true=y_true, edges=self.model_evaluation_config.rul_band_edges)),
+                "unit": metrics.sliced_metrics(y_true=y_true, y_pred=y_pred, groups=units),
+                "predict_time": float(predict_time),
+                "throughput": float(len(y_true) / predict_time)
+            }
+
+        except Exception as e:
+            raise RULException(e, sys)
+
     def initiate_model_evaluation(self) -> artifact_entity.ModelEvaluationArtifact:
         """
         Initiate MOdel Evaluation Artifact
@@ -51,32 +111,18 @@ class ModelEvaluation:
         """
 
         try:
-            # --------FOR LATEST MODEL (ALREADY DEPLOYED ONE)--------
-            logging.info(f"Fetching path of latest model, transformer")
-
-            # latest model directory path
-            latest_dir_path = self.model_resolver.get_latest_dir_path()
+            # --------Raw test set, shared by both models--------
+            logging.info(f"Loading raw test dataframe")
+            test_df = utils.read_dataframe(file_path=self.data_ingestion_artifact.test_file_path, columns=["unit_number", "time_cycles"] + INPUT_FEATURE_COLUMNS)
 
-            # => Case I: If their is no model, accept the current trained model (model trained in this pipeline run)
-            if  latest_dir_path == None:
-                logging.info(f"Their is no model already saved, accepting the current trained model (model trained in this pipeline run)")
-                model_eval_artifact = artifact_entity.ModelEvaluationArtifact(is_model_accepted=True, improved_accuracy=None)
-
-                return model_eval_artifact
-            
-
-            # => CASE II: If their are previously saved model then compare it to current trained model
-
-            # Fetching the path of latest model, transformer (Already deployed ones)
-            latest_transformer_path = self.model_resolver.get_latest_transformer_path()
+            # Same RUL target the models were trained on, clipped when training clipped it
+            test_df = DataTransformation.add_RUL_feature(df=test_df, max_rul=self.data_transformation_artifact.max_rul)
 
-            latest_model_path = self.model_resolver.get_latest_model_path()
+            units = test_df["unit_number"].to_numpy()
 
-            # Loading the latest model, transformer (Already deployed ones)
-            logging.info(f"Loading latest model, transformer objects")
-            transformer = utils.load_object(file_path=latest_transformer_path)
+            test_df = test_df[INPUT_FEATURE_COLUMNS + [TARGET_COLUMN]]
 
-            model = utils.load_object(file_path=latest_model_path)
+            y_true = test_df[TARGET_COLUMN].to_numpy()
 
 
             # --------FOR LATEST SAVED MODEL (MODEL SAVED IN THIS RUN OF PIPELINE)----------------
@@ -91,57 +137,95 @@ class ModelEvaluation:
 
             current_model = utils.load_object(file_path=current_model_path)
 
+            current_model.set_params(n_jobs=self.model_trainer_artifact.n_jobs)
 
-            # --------Evaluation--------
-            
-            # Loading test dataFrame
-            logging.info(f"Loading test dataframe")
-            test_arr = utils.load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_path)
 
+            # --------FOR LATEST MODEL (ALREADY DEPLOYED ONE)--------
+            logging.info(f"Fetching path of latest model, transformer")
+
+            # latest model directory path
+            latest_dir_path = self.model_resolver.get_latest_dir_path()
+
+            transformer, model = None, None
 
-            # ** Accuracy using latest model(already deployed one)
-            logging.info(f"Calculating accuracy for latest model(already deployed one)")
-            test_arr = transformer.transform(test_arr)
+            # => CASE II: If their are previously saved model then compare it to current trained model
+            if latest_dir_path is not None:
+                # Fetching the path of latest model, transformer (Already deployed ones)
+                latest_transformer_path = self.model_resolver.get_latest_transformer_path()
 
-            logging.info(f"Splitting test dataframe in target and input feature")
-            input_arr = test_arr[:,:-1]
-            y_true = test_arr[:,-1]
+                latest_model_path = self.model_resolver.get_latest_model_path()
 
+                # Loading the latest model, transformer (Already deployed ones)
+                logging.info(f"Loading latest model, transformer objects")
+                transformer = utils.load_object(file_path=latest_transformer_path)
 
-            y_pred = model.predict(input_arr)
+                model = utils.load_object(file_path=latest_model_path)
 
-            latest_model_score = r2_score(y_true=y_true, y_pred=y_pred)
+                # Predicting with as many cores as model trainer used
+                model.set_params(n_jobs=self.model_trainer_artifact.n_jobs)
 
 
-            # ** Accuracy using the current model(model saved in this run of pipeline)
-            logging.info(f"Calculating accuracy for latest saved model(current trained model)")
-            test_arr = current_transformer.transform(test_arr)
+            # --------Evaluation--------
 
-            logging.info(f"Splitting test dataframe in target and input feature")
-            input_arr = test_arr[:,:-1]
-            y_true = test_arr[:,-1]
+            # Every model sees the raw test set through its own transformer, champion and challenger predicted at once
+            logging.info(f"Predicting test set with current model and latest(already deployed one) model if any")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                current_prediction = executor.submit(self.predict_rul, current_transformer, current_model, test_df)
+                latest_prediction = executor.submit(self.predict_rul, transformer, model, test_df) if model is not None else None
 
+                current_y_pred, current_predict_time = current_prediction.result()
 
-            y_pred = current_model.predict(input_arr)
+            logging.info(f"Calculating metrics for current model(model saved in this run of pipeline)")
+            report = {"change_threshold": self.model_evaluation_config.change_threshold,
+                      "current_model": self.get_model_report(y_true=y_true, y_pred=current_y_pred, units=units, predict_time=current_predict_time),
+                      "latest_model": None}
 
-            current_model_score = r2_score(y_true=y_true, y_pred=y_pred)
+            current_model_score = report["current_model"]["overall"]["r2_score"]
 
+            logging.info(f"Current model metrics:: {report['current_model']['overall']}, prediction time:: {current_predict_time:.3f}s")
 
-            # ** Comparing models
-            logging.info(f"Comparing accuracy of latest(already deployed one) and current model(model saved in this run of pipeline)")
-            if current_model_score <= latest_model_score:
-                raise Exception("Current trained model(model saved in this pipeline) is not better than previous model(already deployed one)")
-            
+            # => Case I: If their is no model, accept the current trained model (model trained in this pipeline run)
+            if latest_prediction is None:
+                logging.info(f"Their is no model already saved, accepting the current trained model (model trained in this pipeline run)")
+                latest_model_score, latest_predict_time, diff, is_model_accepted = None, None, None, True
+
+            else:
+                latest_y_pred, latest_predict_time = latest_prediction.result()
 
-            logging.info(f"Latest model accuracy:: {latest_model_score}, Current model accuracy:: {current_model_score}")
+                logging.info(f"Calculating metrics for latest model(already deployed one)")
+                report["latest_model"] = self.get_model_report(y_true=y_true, y_pred=latest_y_pred, units=units, predict_time=latest_predict_time)
 
-            # Calculating accuracy score diff
-            diff = current_model_score - latest_model_score
+                latest_model_score = report["latest_model"]["overall"]["r2_score"]
+
+                logging.info(f"Latest model metrics:: {report['latest_model']['overall']}, prediction time:: {latest_predict_time:.3f}s")
+
+                # ** Comparing models, current model has to beat latest one by change threshold
+                logging.info(f"Comparing accuracy of latest(already deployed one) and current model(model saved in this run of pipeline)")
+                diff = current_model_score - latest_model_score
+
+                is_model_accepted = diff > self.model_evaluation_config.change_threshold
+
+            report["improved_accuracy"] = diff
+            report["is_model_accepted"] = is_model_accepted
+
+            # Writing evaluation report before acceptance decision so rejected models can be inspected too
+            logging.info(f"Writing evaluation report")
+            utils.write_yaml_file(file_path=self.model_evaluation_config.report_file_path, data=report)
+
+            if not is_model_accepted:
+                raise Exception(f"{MODEL_REJECTED_MESSAGE} by change threshold {self.model_evaluation_config.change_threshold}: {current_model_score} vs {latest_model_score}")
 
 
             # Preparing artifact
             logging.info(f"Preparing Model Evaluation artifacts")
-            model_eval_artifact = artifact_entity.ModelEvaluationArtifact(is_model_accepted=True, improved_accuracy=diff)
+            model_eval_artifact = artifact_entity.ModelEvaluationArtifact(
+                is_model_accepted=is_model_accepted, improved_accuracy=diff,
+                current_model_score=current_model_score, latest_model_score=latest_model_score,
+                current_model_predict_time=current_predict_time, latest_model_predict_time=latest_predict_time,
+                current_model_throughput=report["current_model"]["throughput"],
+                latest_model_throughput=None if report["latest_model"] is None else report["latest_model"]["throughput"],
+                report_file_path=self.model_evaluation_config.report_file_path
+            )
         
             return model_eval_artifact
 
@@ -149,4 +233,3 @@ class ModelEvaluation:
         except Exception as e:
             raise RULException(e, sys)
         
-
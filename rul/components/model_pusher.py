@@ -2,7 +2,11 @@
 
 
 import sys
+import os
+import shutil
+from typing import Optional
 from rul.entity import config_entity
+from rul.entity.config_entity import TRANSFORMER_OBJECT_FILE_NAME, MODEL_FILE_NAME, FLAT_MODEL_FILE_NAME
 from rul.entity import artifact_entity
 from rul.predictor import ModelResolver
 from rul.exception import RULException
@@ -18,9 +22,10 @@ class ModelPusher:
     - `model_pusher_config`: Model Pusher Configuration
     - `data_transformation_artifact`: Data Transformation Artifact
     - `model_trainer_artifact`: Model Trainer Artifact
+    - `model_evaluation_artifact`: Model Evaluation Artifact, its scores are recorded in registry index
     """
 
-    def __init__(self, model_pusher_config: config_entity.ModelPusherConfig, data_transformation_artifact: artifact_entity.DataTransformationArtifact, model_trainer_artifact: artifact_entity.ModelTrainerArtifact) -> None:
+    def __init__(self, model_pusher_config: config_entity.ModelPusherConfig, data_transformation_artifact: artifact_entity.DataTransformationArtifact, model_trainer_artifact: artifact_entity.ModelTrainerArtifact, model_evaluation_artifact: Optional[artifact_entity.ModelEvaluationArtifact] = None) -> None:
         try:
             self.model_pusher_config = model_pusher_config
 
@@ -28,6 +33,8 @@ class ModelPusher:
 
             self.model_trainer_artifact = model_trainer_artifact
 
+            self.model_evaluation_artifact = model_evaluation_artifact
+
             # Initializing Model Resolver
             self.model_resolver = ModelResolver(model_registry=self.model_pusher_config.saved_model_dir)
         
@@ -37,38 +44,60 @@ class ModelPusher:
     def initiate_model_pusher(self) -> artifact_entity.ModelPusherArtifact:
         try:
             # => For model_pusher directory
-            # Load Transformer and Model Object
-            logging.info(f"Loading transformer object")
-            transformer = utils.load_object(file_path=self.data_transformation_artifact.transformer_object_path)
-
-            logging.info(f"Loading model object")
-            model = utils.load_object(file_path=self.model_trainer_artifact.model_path)
+            # Linking transformer and model files written by earlier components, objects are never serialized again
+            logging.info(f"Linking model, transformer files to model pusher directory as artifacts")
+            utils.link_or_copy_file(src_file_path=self.data_transformation_artifact.transformer_object_path, dst_file_path=self.model_pusher_config.pusher_transformer_path)
 
-            # Save Model, Transformer to model pusher directory in artifacts
-            logging.info(f"Saving model, transformer object model pusher directory as artifacts")
-            utils.save_object(file_path=self.model_pusher_config.pusher_transformer_path, obj=transformer)
+            utils.link_or_copy_file(src_file_path=self.model_trainer_artifact.model_path, dst_file_path=self.model_pusher_config.pusher_model_path)
 
-            utils.save_object(file_path=self.model_pusher_config.pusher_model_path, obj=model)
+            if self.model_trainer_artifact.flat_model_path is not None:
+                utils.link_or_copy_file(src_file_path=self.model_trainer_artifact.flat_model_path, dst_file_path=self.model_pusher_config.pusher_flat_model_path)
 
             
             # => For saved_model directory
-            # Fetch path of latest Model, Transformer 
-            logging.info(f"Fetching path of latest model, transformer object")
-            transformer_path = self.model_resolver.get_latest_save_transformer_path()
+            # Fetch directory path of new version
+            logging.info(f"Fetching directory path of new model version")
+            save_dir_path = self.model_resolver.get_latest_save_dir_path()
+
+            # Filling a temporary directory (non numeric so never resolved) and renaming it into place in one step,
+            # so readers of saved_models never see a partially written version
+            temp_dir_path = os.path.join(self.model_pusher_config.saved_model_dir, f".tmp_{os.path.basename(save_dir_path)}_{os.getpid()}")
+            shutil.rmtree(temp_dir_path, ignore_errors=True)
+
+            logging.info(f"Linking model, transformer files to temporary directory: {temp_dir_path}")
+            utils.link_or_copy_file(src_file_path=self.model_pusher_config.pusher_transformer_path,
+                                    dst_file_path=os.path.join(temp_dir_path, self.model_resolver.transformer_dir_name, TRANSFORMER_OBJECT_FILE_NAME))
+
+            utils.link_or_copy_file(src_file_path=self.model_pusher_config.pusher_model_path,
+                                    dst_file_path=os.path.join(temp_dir_path, self.model_resolver.model_dir_name, MODEL_FILE_NAME))
 
-            model_path = self.model_resolver.get_latest_save_model_path()
+            if self.model_trainer_artifact.flat_model_path is not None:
+                utils.link_or_copy_file(src_file_path=self.model_pusher_config.pusher_flat_model_path,
+                                        dst_file_path=os.path.join(temp_dir_path, self.model_resolver.model_dir_name, FLAT_MODEL_FILE_NAME))
 
-            # Save latest Model, Transformer to saved_model directory
-            logging.info(f"Saving model, transformer object save_models directory")
-            utils.save_object(file_path=transformer_path, obj=transformer)
+            logging.info(f"Publishing model version directory: {save_dir_path}")
+            os.rename(temp_dir_path, save_dir_path)
 
-            utils.save_object(file_path=model_path, obj=model)
+            # Registering pushed version as latest in registry index
+            logging.info(f"Registering pushed model in registry index")
+            metrics = {
+                "r2_train_score": float(self.model_trainer_artifact.r2_train_score),
+                "r2_test_score": float(self.model_trainer_artifact.r2_test_score)
+            }
+
+            if self.model_evaluation_artifact is not None:
+                metrics["evaluation_r2_score"] = float(self.model_evaluation_artifact.current_model_score)
+                metrics["evaluation_report_file_path"] = self.model_evaluation_artifact.report_file_path
+
+            self.model_resolver.register_version(version_dir_path=save_dir_path, metrics=metrics, keep_versions=self.model_pusher_config.keep_versions)
 
             # Prepare artifacts
             logging.info(f"Preparing Pusher artifacts")
             model_pusher_artifact = artifact_entity.ModelPusherArtifact(pusher_model_dir=self.model_pusher_config.pusher_model_dir,
                                                                         saved_model_dir=self.model_pusher_config.saved_model_dir
                                                                         )
+
+            return model_pusher_artifact
             
         except Exception as e:
-            raise RULException(e, sys)
+            raise RULException(e, sys)
\ No newline at end of file
@@ -3,6 +3,7 @@
 
 import os
 import sys
+import time
 from typing import Optional
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
@@ -12,6 +13,7 @@ from rul.entity import artifact_entity
 from rul.logger import logging
 from rul.exception import RULException
 from rul import utils
+from rul.forest import FlatForest
 
 
 class ModelTrainer:
@@ -49,7 +51,8 @@ class ModelTrainer:
             logging.info(f"Creating instance of RandomForestRegressor")
             rfr = RandomForestRegressor(
                                         criterion="poisson", max_features="sqrt",
-                                        ccp_alpha=0.0, n_estimators=100
+                                        ccp_alpha=0.0, n_estimators=100,
+                                        n_jobs=self.model_trainer_config.n_jobs
                                         )
             
             logging.info(f"Fitting the RandomForestRegressor model")
@@ -88,11 +91,15 @@ class ModelTrainer:
 
             # Calling model trainer method
             logging.info(f"Calling the Model Trainer method")
+            start_time = time.perf_counter()
             model = self.train_model(x=x_train, y=y_train)
+            fit_time = time.perf_counter() - start_time
 
             # Predict the value of target using model for train array
             logging.info(f"Predicting the value of target feature for train array")
+            start_time = time.perf_counter()
             y_hat_train = model.predict(x_train)
+            train_predict_time = time.perf_counter() - start_time
 
             # Calculate  r2 score for train array
             logging.info(f"Calculating r2 score for train array")
@@ -100,7 +107,11 @@ class ModelTrainer:
 
             # Predict the value of target using model for test array
             logging.info(f"Predicting the value of target feature for test array")
+            start_time = time.perf_counter()
             y_hat_test = model.predict(x_test)
+            test_predict_time = time.perf_counter() - start_time
+
+            logging.info(f"Timing with n_jobs:: {self.model_trainer_config.n_jobs} Fit:: {fit_time:.3f}s Train predict:: {train_predict_time:.3f}s Test predict:: {test_predict_time:.3f}s")
 
             # Calculate  r2 score for test array
             logging.info(f"Calculating r2 score for train array")
@@ -131,14 +142,24 @@ class ModelTrainer:
             logging.info(f"Model is not Overfitting")
 
 
-            # Save the trained model object
-            logging.info(f"Saving the model object")
+            # Save the trained model object with its prediction setting instead of the training one
+            logging.info(f"Saving the model object with n_jobs:: {self.model_trainer_config.predict_n_jobs}")
+            model.set_params(n_jobs=self.model_trainer_config.predict_n_jobs)
             utils.save_object(file_path=self.model_trainer_config.model_path, obj=model)
 
+            # Save flat forest copy of the model
+            flat_model_path = None
+            if self.model_trainer_config.export_flat_model:
+                logging.info(f"Exporting flat forest copy of the model")
+                FlatForest.from_estimator(model=model).save(file_path=self.model_trainer_config.flat_model_path)
+                flat_model_path = self.model_trainer_config.flat_model_path
+
             # Prepare the artifact
             logging.info(f"Preparing Model Trainer artifacts")
             model_trainer_artifact  = artifact_entity.ModelTrainerArtifact(model_path=self.model_trainer_config.model_path, 
-            r2_train_score=r2_score_train, r2_test_score=r2_score_test)
+            r2_train_score=r2_score_train, r2_test_score=r2_score_test, n_jobs=self.model_trainer_config.n_jobs,
+            fit_time=fit_time, train_predict_time=train_predict_time, test_predict_time=test_predict_time,
+            flat_model_path=flat_model_path)
 
             return model_trainer_artifact
 
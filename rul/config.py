@@ -3,8 +3,9 @@
 
 import os
 import json
-import pymongo
+import threading
 import pandas as pd
+from typing import Optional
 from dataclasses import dataclass
 
 
@@ -16,13 +17,81 @@ class EnvironmentVariable:
 
     mongo_db_url: str = os.getenv("MONGO_DB_URL")
 
+    # MongoDB client pool and timeout settings, unset ones keep pymongo defaults
+    mongo_max_pool_size: Optional[str] = os.getenv("MONGO_MAX_POOL_SIZE")
+
+    mongo_min_pool_size: Optional[str] = os.getenv("MONGO_MIN_POOL_SIZE")
+
+    mongo_server_selection_timeout_ms: Optional[str] = os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS")
+
+    mongo_connect_timeout_ms: Optional[str] = os.getenv("MONGO_CONNECT_TIMEOUT_MS")
+
+    mongo_socket_timeout_ms: Optional[str] = os.getenv("MONGO_SOCKET_TIMEOUT_MS")
+
+    # e.g. "primary", "primaryPreferred", "secondaryPreferred", "nearest"
+    mongo_read_preference: Optional[str] = os.getenv("MONGO_READ_PREFERENCE")
+
+    def mongo_client_options(self) -> dict:
+        """
+        Returns `pymongo.MongoClient` keyword arguments of the set MongoDB client settings
+        """
+        options = {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms
+        }
+        options = {key: int(value) for key, value in options.items() if value is not None}
+
+        if self.mongo_read_preference is not None:
+            options["readPreference"] = self.mongo_read_preference
+
+        return options
+
 
 
 # instance of environment variable
 env_var = EnvironmentVariable()
 
-# creating MongoDb client
-mongo_client  = pymongo.MongoClient(env_var.mongo_db_url)
+# MongoDb client, created on first use by get_mongo_client (pymongo import, client construction and its monitor threads are not paid at import time)
+_mongo_client = None
+_mongo_client_lock = threading.Lock()
+
+
+def get_mongo_client():
+    """
+    Returns the process wide pooled MongoDB client, creating it on first call
+    -------------------------------------------------------------------------------------------------
+    Client is configured from environment variables: `MONGO_DB_URL`, `MONGO_MAX_POOL_SIZE`, `MONGO_MIN_POOL_SIZE`,
+    `MONGO_SERVER_SELECTION_TIMEOUT_MS`, `MONGO_CONNECT_TIMEOUT_MS`, `MONGO_SOCKET_TIMEOUT_MS` and `MONGO_READ_PREFERENCE`
+    -------------------------------------------------------------------------------------------------
+    return: `pymongo.MongoClient`
+    """
+    global _mongo_client
+
+    if _mongo_client is None:
+        with _mongo_client_lock:
+            if _mongo_client is None:
+                if env_var.mongo_db_url is None:
+                    raise Exception("Environment variable MONGO_DB_URL is not set, can't connect to MongoDB")
+
+                import pymongo
+
+                # creating MongoDb client
+                _mongo_client = pymongo.MongoClient(env_var.mongo_db_url, **env_var.mongo_client_options())
+
+    return _mongo_client
 
 # declaring the target column
-TARGET_COLUMN = "RUL"
\ No newline at end of file
+TARGET_COLUMN = "RUL"
+
+# declaring the fields tagging every MongoDB document with its CMAPSS source file (e.g. "train", "FD001"), so several subsets coexist in one collection
+DATASET_FIELD = "dataset"
+FD_FIELD = "fd"
+
+# declaring the input feature columns (sensors kept after dropping index, setting and constant sensor features)
+INPUT_FEATURE_COLUMNS = ['s_2', 's_3', 's_4', 's_7', 's_8', 's_9',
+                         's_11', 's_12', 's_13', 's_14', 's_15',
+                         's_17', 's_20', 's_21'
+                         ]
\ No newline at end of file
@@ -0,0 +1,245 @@
+"Data drift engine for RUL package"
+
+
+import sys
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+from scipy.stats import kstwo
+from rul.exception import RULException
+from rul.logger import logging
+
+
+# Supported drift metrics, KS test is always computed
+DRIFT_METRICS = ("ks", "psi", "wasserstein")
+
+
+def sort_columns(arr: np.array, dtype: str = "float64") -> np.array:
+    """
+    Sorts every column of a 2D array independently, missing values go to the end of each column
+    -------------------------------------------------------------------------------------------------
+    input:
+    - `arr`: 2D array of shape (rows, columns)
+    - `dtype`: precision values are rounded to before sorting, e.g. `"float32"` so float64 values
+      compare equal to the same values stored as float32
+    -------------------------------------------------------------------------------------------------
+    return: `np.array` of float64 of shape (columns, rows), every column sorted and contiguous in memory
+    """
+
+    try:
+        return np.sort(np.ascontiguousarray(np.asarray(arr, dtype=dtype).astype("float64").T), axis=1)
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def dkw_error_bound(sample_size: int, alpha: float = 0.05) -> float:
+    """
+    Dvoretzky-Kiefer-Wolfowitz bound: with probability 1 - alpha the empirical CDF of a random sample of
+    `sample_size` rows is within this distance of the CDF of the full dataset at every point, so a KS
+    statistic computed on the sample is within it of the statistic of the full dataset
+    """
+    return float(np.sqrt(np.log(2 / alpha) / (2 * sample_size)))
+
+
+def ks_2samp_sorted(base_sorted: np.array, current_sorted: np.array, wasserstein: bool = False) -> dict:
+    """
+    Two sample KS test for all columns at once on column wise sorted arrays
+    ----------------------------------------------------------------------------------------------------
+    Both sorted arrays are stacked and merged with one stable column wise argsort (linear work on two
+    presorted runs), the distance between the two empirical CDFs is tracked along the merged order and
+    evaluated at the last element of every run of tied values.
+    ----------------------------------------------------------------------------------------------------
+    input:
+    - `base_sorted`: column wise sorted base array of shape (columns, n) from `sort_columns`
+    - `current_sorted`: column wise sorted current array of shape (columns, m) from `sort_columns`
+    - `wasserstein`: also compute Wasserstein-1 distance (area between the two CDFs)
+    ----------------------------------------------------------------------------------------------------
+    return: `dict` of arrays `statistic`, `pvalue` and optionally `wasserstein`, one value per column
+    """
+
+    try:
+        # Missing values are excluded per column like separate dropna of every column
+        n = np.maximum((~np.isnan(base_sorted)).sum(axis=1, keepdims=True), 1)
+        m = np.maximum((~np.isnan(current_sorted)).sum(axis=1, keepdims=True), 1)
+
+        stacked = np.concatenate([base_sorted, current_sorted], axis=1)
+        order = np.argsort(stacked, axis=1, kind="stable")
+        merged = np.take_along_axis(stacked, order, axis=1)
+
+        valid = ~np.isnan(merged)
+
+        # Running count of base values, running count of current values is position minus it,
+        # integer counts keep both CDFs exact at every position
+        base_count = np.cumsum(order < base_sorted.shape[1], axis=1, dtype=np.int32)
+        current_count = np.arange(1, merged.shape[1] + 1, dtype=np.int32) - base_count
+        cdf_distance = np.abs(base_count / n - current_count / m)
+
+        # CDFs are only comparable after the last of tied values, missing values sorted last are never compared
+        run_end = valid
+        run_end[:, :-1] &= merged[:, 1:] != merged[:, :-1]
+
+        statistic = np.max(cdf_distance, axis=1, where=run_end, initial=0.0)
+
+        # Asymptotic two sided p value, same as scipy.stats.ks_2samp(method="asymp")
+        n, m = n[:, 0], m[:, 0]
+        pvalue = kstwo.sf(statistic, np.round(n * m / (n + m)))
+
+        result = {"statistic": statistic, "pvalue": pvalue}
+
+        if wasserstein:
+            widths = np.nan_to_num(np.diff(merged, axis=1))
+            result["wasserstein"] = np.sum(cdf_distance[:, :-1] * widths, axis=1)
+
+        return result
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def psi_sorted(base_sorted: np.array, current_sorted: np.array, bins: int = 10) -> np.array:
+    """
+    Population stability index of every column, bins are base dataset quantiles
+    ---------------------------------------------------------------------------------
+    input:
+    - `base_sorted`: column wise sorted base array of shape (columns, n) from `sort_columns`
+    - `current_sorted`: column wise sorted current array of shape (columns, m) from `sort_columns`
+    - `bins`: number of quantile bins
+    ---------------------------------------------------------------------------------
+    return: `np.array` of PSI, one value per column
+    """
+
+    try:
+        psi = np.empty(len(base_sorted))
+        quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+
+        for j in range(len(base_sorted)):
+            base = base_sorted[j][~np.isnan(base_sorted[j])]
+            current = current_sorted[j][~np.isnan(current_sorted[j])]
+
+            # Both columns are sorted so bin counts are differences of binary search positions
+            edges = np.unique(np.quantile(base, quantiles))
+            base_share = np.diff(np.searchsorted(base, edges, side="right"), prepend=0, append=len(base)) / len(base)
+            current_share = np.diff(np.searchsorted(current, edges, side="right"), prepend=0, append=len(current)) / len(current)
+
+            base_share = np.clip(base_share, 1e-6, None)
+            current_share = np.clip(current_share, 1e-6, None)
+
+            psi[j] = np.sum((current_share - base_share) * np.log(current_share / base_share))
+
+        return psi
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+class DriftEngine:
+    """
+    Drift Engine
+    -----------------------------------------------------------------------------------------------------------------------------------------------------
+    Sorts base dataset columns once and compares any number of current datasets against them, all columns per comparison in one vectorized pass.
+    Current datasets larger than `max_sample_size` rows are compared on a random sample, with the DKW error bound of the sample reported.
+    ------------------------------------------------------------------------------------------------------------------------------------------------------
+    input:
+     - `base_df`: DataFrame from which we are validating(base info), `None` when created with `from_sorted`
+     - `metrics`: drift metrics to compute out of `DRIFT_METRICS`
+     - `max_sample_size`: max rows of current dataset to compare, `None` compares all rows
+     - `significance`: p value below which null hypothesis of same distribution is rejected
+     - `dtype`: precision both datasets are compared at, see `sort_columns`
+    -------------------------------------------------------------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    def __init__(self, base_df: Optional[pd.DataFrame], metrics: Sequence[str] = ("ks",), max_sample_size: Optional[int] = None, significance: float = 0.05, dtype: str = "float64") -> None:
+        try:
+            unknown_metrics = set(metrics) - set(DRIFT_METRICS)
+            if len(unknown_metrics) > 0:
+                raise Exception(f"Unknown drift metrics: {unknown_metrics}, supported: {DRIFT_METRICS}")
+
+            self.metrics = metrics
+
+            self.max_sample_size = max_sample_size
+
+            self.significance = significance
+
+            self.dtype = dtype
+
+            if base_df is not None:
+                logging.info(f"Sorting {len(base_df.columns)} base dataset columns for drift detection")
+                self.columns = list(base_df.columns)
+                self.base_sorted = sort_columns(base_df.to_numpy(dtype="float64"), dtype=self.dtype)
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    @classmethod
+    def from_sorted(cls, columns: Sequence[str], base_sorted: np.array, **kwargs) -> "DriftEngine":
+        """
+        Creates drift engine from already sorted base dataset columns (e.g. memory mapped base profile)
+        ----------------------------------------------------------------------------------------------------
+        input:
+        - `columns`: base dataset column names
+        - `base_sorted`: column wise sorted base array of shape (columns, n) from `sort_columns`, sorted with `dtype`
+        - `kwargs`: `metrics`, `max_sample_size`, `significance`, `dtype` of `DriftEngine`
+        ----------------------------------------------------------------------------------------------------
+        return: `DriftEngine`
+        """
+
+        try:
+            drift_engine = cls(base_df=None, **kwargs)
+            drift_engine.columns = list(columns)
+            drift_engine.base_sorted = base_sorted
+
+            return drift_engine
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def compare(self, current_df: pd.DataFrame, seed: int = 42) -> dict:
+        """
+        Compares base dataset columns with same columns of current dataset
+        ------------------------------------------------------------------------------------------------------
+        input:
+        - `current_df`: DataFrame which we are validating, must contain every base dataset column
+        - `seed`: seed of random sample taken when current dataset exceeds `max_sample_size`
+        ------------------------------------------------------------------------------------------------------
+        return: `dict` with `drift_report` per column and `sample` info (`None` when all rows were compared)
+        """
+
+        try:
+            current_arr = current_df[self.columns].to_numpy(dtype="float64")
+
+            sample = None
+            if self.max_sample_size is not None and len(current_arr) > self.max_sample_size:
+                logging.info(f"Sampling {self.max_sample_size} of {len(current_arr)} rows for drift detection")
+                rows = np.random.default_rng(seed).choice(len(current_arr), size=self.max_sample_size, replace=False)
+                current_arr = current_arr[rows]
+                sample = {
+                    "sample_size": int(self.max_sample_size),
+                    "error_bound": dkw_error_bound(self.max_sample_size, alpha=self.significance)
+                }
+
+            current_sorted = sort_columns(current_arr, dtype=self.dtype)
+
+            ks = ks_2samp_sorted(self.base_sorted, current_sorted, wasserstein="wasserstein" in self.metrics)
+
+            psi = psi_sorted(self.base_sorted, current_sorted) if "psi" in self.metrics else None
+
+            drift_report = dict()
+            for j, column in enumerate(self.columns):
+                drift_report[column] = {
+                    "pvalues": float(ks["pvalue"][j]),
+                    "statistic": float(ks["statistic"][j]),
+                    "same_distribution": bool(ks["pvalue"][j] > self.significance)
+                }
+
+                if "wasserstein" in ks:
+                    drift_report[column]["wasserstein"] = float(ks["wasserstein"][j])
+
+                if psi is not None:
+                    drift_report[column]["psi"] = float(psi[j])
+
+            return {"drift_report": drift_report, "sample": sample}
+
+        except Exception as e:
+            raise RULException(e, sys)
\ No newline at end of file
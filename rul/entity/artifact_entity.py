@@ -2,6 +2,7 @@
 
 
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -13,10 +14,14 @@ class DataIngestionArtifact:
     `feature_store_file_path`: path of feature store of data ingestion component
     `train_file_path`: path of train file created by Data Ingestion component
     `test_file_path`: path of test file created by Data Ingestion component
+    `new_rows`: number of rows pulled from database, all rows unless ingestion is incremental
+    `changed_units`: unit numbers which got new cycles in this run
     """
     feature_store_file_path: str
     train_file_path: str
     test_file_path: str
+    new_rows: int
+    changed_units: list
 
 
 @dataclass
@@ -39,10 +44,12 @@ class DataTransformationArtifact:
     - `transformer_object_path:`: path of the transformed object
     - `transformed_train_path`: path of the transformed train dataset array
     -  `transformed_test_path`: path of the transformed test dataset array
+    - `max_rul`: cycles RUL target was clipped to, `None` for linear RUL
     """
     transformer_object_path: str
     transformed_train_path: str
     transformed_test_path: str
+    max_rul: Optional[int] = None
 
 
 @dataclass
@@ -54,10 +61,20 @@ class ModelTrainerArtifact:
     - `model_path`: path of the model object
     - `r2_train_score`: r2 score of train set
     - `r2_test_score`: r2 score for
+    - `n_jobs`: number of cores used to fit and predict with the model while training
+    - `fit_time`: wall clock seconds taken to fit the model
+    - `train_predict_time`: wall clock seconds taken to predict train set
+    - `test_predict_time`: wall clock seconds taken to predict test set
+    - `flat_model_path`: path of flat forest copy of the model, `None` if not exported
     """
     model_path: str
     r2_train_score: float
     r2_test_score: float
+    n_jobs: int
+    fit_time: float
+    train_predict_time: float
+    test_predict_time: float
+    flat_model_path: str
 
 
 @dataclass
@@ -68,9 +85,23 @@ class ModelEvaluationArtifact:
     return:
     - `is_model_accepted`: boolean whether model is accepted to be pushed or deployed
     - `improved_accuracy`: how much accuracy current built model has got as compared to model already in deployment
+    - `current_model_score`: r2 score of current built model on raw test set RUL (in cycles)
+    - `latest_model_score`: r2 score of model already in deployment on same test set, `None` if no model deployed
+    - `current_model_predict_time`: wall clock seconds current built model took to transform and predict test set
+    - `latest_model_predict_time`: wall clock seconds model already in deployment took to transform and predict test set
+    - `current_model_throughput`: test rows per second predicted by current built model
+    - `latest_model_throughput`: test rows per second predicted by model already in deployment
+    - `report_file_path`: path of evaluation report with overall, per RUL band and per unit metrics of both models
     """
     is_model_accepted: bool
     improved_accuracy: float
+    current_model_score: float
+    latest_model_score: float
+    current_model_predict_time: float
+    latest_model_predict_time: float
+    current_model_throughput: float
+    latest_model_throughput: float
+    report_file_path: str
 
 
 @dataclass
@@ -12,8 +12,23 @@ from rul.logger import logging
 FILE_NAME = "rul.csv"
 TRAIN_FILE_NAME = "train.csv"
 TEST_FILE_NAME = "test.csv"
+HIGH_WATER_MARK_FILE_NAME = "high_water_mark.yaml"
 TRANSFORMER_OBJECT_FILE_NAME = "transformer.pkl"
 MODEL_FILE_NAME = "model.pkl"
+FLAT_MODEL_FILE_NAME = "model.npy"
+MODEL_REGISTRY_INDEX_FILE_NAME = "registry.yaml"
+BASE_PROFILE_FILE_NAME = "profile.yaml"
+BASE_SORTED_COLUMNS_FILE_NAME = "sorted_columns.npy"
+
+# Supported formats of dataframe artifacts (feature store, train and test file), feather is Arrow IPC
+ARTIFACT_FORMATS = ("csv", "parquet", "feather")
+
+
+def artifact_file_name(file_name: str, artifact_format: str) -> str:
+    """
+    Replaces extension of a dataframe artifact file name with the extension of `artifact_format`
+    """
+    return f"{os.path.splitext(file_name)[0]}.{artifact_format}"
 
 
 class TrainingPipelineConfig:
@@ -26,6 +41,12 @@ class TrainingPipelineConfig:
     def __init__(self) -> None:
         try:
             self.artifact_dir = os.path.join(os.getcwd(), "artifact", f"{datetime.now().strftime('%m%d%Y_%H%M%S')}")
+
+            # Format of dataframe artifacts, columnar formats store sensors as float32 and read only needed columns
+            self.artifact_format = "csv"
+
+            if self.artifact_format not in ARTIFACT_FORMATS:
+                raise Exception(f"Unsupported artifact format: {self.artifact_format}, supported: {ARTIFACT_FORMATS}")
         except Exception as e:
             raise RULException(e, sys)
         
@@ -45,16 +66,45 @@ class DataIngestionConfig:
             self.database_name = "rul"
             self.collection_name = "rul_collect"
 
+            # CMAPSS subset exported from the collection, documents of older dumps without dataset/fd tags are tagged by data_dump.py
+            self.dataset = "train"
+
+            self.fd = "FD001"
+
             self.data_ingestion_dir = os.path.join(training_pipeline_config.artifact_dir, "data_ingestion")
 
-            self.feature_store_file_path = os.path.join(self.data_ingestion_dir, "feature_store", FILE_NAME)
+            artifact_format = training_pipeline_config.artifact_format
 
-            self.train_file_path = os.path.join(self.data_ingestion_dir, "dataset", TRAIN_FILE_NAME)
+            self.feature_store_file_path = os.path.join(self.data_ingestion_dir, "feature_store", artifact_file_name(FILE_NAME, artifact_format))
 
-            self.test_file_path = os.path.join(self.data_ingestion_dir, "dataset", TEST_FILE_NAME)
+            self.train_file_path = os.path.join(self.data_ingestion_dir, "dataset", artifact_file_name(TRAIN_FILE_NAME, artifact_format))
 
+            self.test_file_path = os.path.join(self.data_ingestion_dir, "dataset", artifact_file_name(TEST_FILE_NAME, artifact_format))
+
+            # Fraction of units (whole trajectories) in test set and seed of unit hash deciding it
             self.test_size = 0.2
 
+            self.split_seed = 42
+
+            # Incremental mode pulls only cycles newer than the high water mark and appends them to a feature store kept across runs,
+            # the persistent feature store is an append only CSV whatever the artifact format
+            self.incremental = False
+
+            self.persistent_feature_store_dir = os.path.join(os.path.dirname(training_pipeline_config.artifact_dir), "feature_store")
+
+            self.persistent_feature_store_file_path = os.path.join(self.persistent_feature_store_dir, FILE_NAME)
+
+            self.high_water_mark_file_path = os.path.join(self.persistent_feature_store_dir, HIGH_WATER_MARK_FILE_NAME)
+
+            # Persistent train and test stores, new cycles are split by unit hash and appended so rows of unchanged units are never re-split
+            self.persistent_train_file_path = os.path.join(self.persistent_feature_store_dir, TRAIN_FILE_NAME)
+
+            self.persistent_test_file_path = os.path.join(self.persistent_feature_store_dir, TEST_FILE_NAME)
+
+            # Field ingestion stamps new documents with the number of the run taking them, high water mark is the last completed run:
+            # unlike `_id` it doesn't depend on how many writers insert documents or in which order their inserts commit
+            self.ingest_run_field = "ingest_run"
+
         except Exception as e:
             raise RULException(e, sys)
         
@@ -85,6 +135,23 @@ class DataValidationConfig:
 
             self.base_file_path = os.path.join("rul.csv")
 
+            # Base profile is built once from base file and reused by every run until base file changes
+            self.base_profile_dir = os.path.join("base_profile")
+
+            self.base_profile_file_path = os.path.join(self.base_profile_dir, BASE_PROFILE_FILE_NAME)
+
+            self.base_sorted_columns_file_path = os.path.join(self.base_profile_dir, BASE_SORTED_COLUMNS_FILE_NAME)
+
+            # Drift metrics in addition to KS test, out of "psi" and "wasserstein"
+            self.drift_metrics = ["ks"]
+
+            # Drift of bigger current datasets is calculated on a random sample of this many rows
+            self.drift_max_sample_size = 1000000
+
+            # Precision drift is compared at: columnar artifacts store settings and sensors as float32, so the float64 base
+            # file is rounded the same way and unchanged data isn't reported as drifted
+            self.drift_dtype = "float32"
+
         except Exception as e:
             raise RULException(e, sys)
         
@@ -109,6 +176,14 @@ class DataTransformationConfig:
 
             self.data_transformed_test_path = os.path.join(self.data_transformation_dir, "transformed", TEST_FILE_NAME)
 
+            # Clip RUL to this many cycles (piecewise linear RUL), None keeps linear RUL
+            self.max_rul = None
+
+            # Save fitted pipeline folded into one fused transformer (see `rul.preprocessing`), float64 gives results identical to the pipeline
+            self.fuse_transformer = True
+
+            self.transformer_dtype = "float64"
+
         except Exception as e:
             raise RULException(e, sys)
         
@@ -129,9 +204,21 @@ class ModelTrainerConfig:
 
             self.model_path = os.path.join(self.model_trainer_dir, "model", MODEL_FILE_NAME)
 
+            # Flat forest copy of the model which is memory mapped instead of unpickled (see `rul.forest`)
+            self.export_flat_model = True
+
+            self.flat_model_path = os.path.join(self.model_trainer_dir, "model", FLAT_MODEL_FILE_NAME)
+
             self.expected_score = 0.6
 
             self.overfitting_threshold = 0.5
+
+            # Number of cores used to build and predict with forest trees while training, -1 means all cores
+            self.n_jobs = -1
+
+            # Number of cores the saved model predicts with, kept apart from training: serving and batch prediction
+            # worker processes run side by side and each one using all cores would oversubscribe them
+            self.predict_n_jobs = 1
             
         except Exception as e:
             raise RULException(e, sys)
@@ -149,8 +236,16 @@ class ModelEvaluationConfig:
 
     def __init__(self, training_pipeline_config: TrainingPipelineConfig()) -> None:
         try:
+            self.model_evaluation_dir = os.path.join(training_pipeline_config.artifact_dir, "model_evaluation")
+
+            self.report_file_path = os.path.join(self.model_evaluation_dir, "report.yaml")
+
+            # Min r2 score gain over deployed model for current model to be accepted
             self.change_threshold = 0.01
 
+            # Inner edges of true RUL bands metrics are sliced by
+            self.rul_band_edges = [25, 50, 75, 100, 125]
+
         except Exception as e:
             raise RULException(e, sys)
         
@@ -177,5 +272,10 @@ class ModelPusherConfig:
 
             self.pusher_transformer_path = os.path.join(self.pusher_model_dir, TRANSFORMER_OBJECT_FILE_NAME)
 
+            self.pusher_flat_model_path = os.path.join(self.pusher_model_dir, FLAT_MODEL_FILE_NAME)
+
+            # Number of newest model versions kept in saved_models, None keeps all
+            self.keep_versions = None
+
         except Exception as e:
             raise RULException(e, sys)
\ No newline at end of file
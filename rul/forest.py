@@ -0,0 +1,212 @@
+"Flattened random forest model format for RUL package"
+
+
+import os
+import sys
+import numpy as np
+from rul.exception import RULException
+from rul.logger import logging
+
+
+# Child index of leaf nodes, same as sklearn
+TREE_LEAF = -1
+
+# One record per node of every tree, trees stored back to back with global child indices
+NODE_DTYPE = np.dtype([
+    ("children_left", np.int32),
+    ("children_right", np.int32),
+    ("feature", np.int32),
+    ("threshold", np.float64),
+    ("value", np.float64),
+    ("missing_go_to_left", np.uint8)
+])
+
+
+class FlatForest:
+    """
+    Flat Forest
+    -----------------------------------------------------------------------------------------------------------------------------------------------------
+    Nodes of all trees of a fitted sklearn forest regressor in one structured array saved as a plain `.npy` file, so the model is loaded by memory mapping
+    the file instead of unpickling: loading is instant and every process serving the model shares one page cached copy of it.
+    Predictions are identical to `model.predict` of the sklearn forest (with `n_jobs=1`).
+    ------------------------------------------------------------------------------------------------------------------------------------------------------
+    input:
+     - `nodes`: structured array of `NODE_DTYPE`, may be memory mapped
+    -------------------------------------------------------------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    def __init__(self, nodes: np.array) -> None:
+        try:
+            self.nodes = nodes
+
+            self.children_left = nodes["children_left"]
+
+            self.children_right = nodes["children_right"]
+
+            self.feature = nodes["feature"]
+
+            self.threshold = nodes["threshold"]
+
+            self.value = nodes["value"]
+
+            # Side NaN inputs take at every split (sklearn >= 1.3), `None` for flat forests exported without it
+            self.missing_go_to_left = nodes["missing_go_to_left"].astype(bool) if "missing_go_to_left" in nodes.dtype.names else None
+
+            # Roots are the nodes no other node points to, in tree order
+            is_root = np.ones(len(nodes), dtype=bool)
+            is_root[self.children_left[self.children_left != TREE_LEAF]] = False
+            is_root[self.children_right[self.children_right != TREE_LEAF]] = False
+            self.roots = np.flatnonzero(is_root)
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_estimator(cls, model: object) -> "FlatForest":
+        """
+        Flattens trees of a fitted single output sklearn forest regressor (e.g. `RandomForestRegressor`)
+        -------------------------------------------------------------------------------------------------
+        input:
+        - `model`: fitted forest regressor
+        -------------------------------------------------------------------------------------------------
+        return: `FlatForest`
+        """
+
+        try:
+            trees = [estimator.tree_ for estimator in model.estimators_]
+
+            nodes = np.empty(sum(tree.node_count for tree in trees), dtype=NODE_DTYPE)
+
+            offset = 0
+            for tree in trees:
+                tree_nodes = nodes[offset:offset + tree.node_count]
+
+                # Child indices are shifted by position of tree in flat array, leaves keep TREE_LEAF
+                tree_nodes["children_left"] = np.where(tree.children_left == TREE_LEAF, TREE_LEAF, tree.children_left + offset)
+                tree_nodes["children_right"] = np.where(tree.children_right == TREE_LEAF, TREE_LEAF, tree.children_right + offset)
+                tree_nodes["feature"] = tree.feature
+                tree_nodes["threshold"] = tree.threshold
+                tree_nodes["value"] = tree.value[:, 0, 0]
+
+                # Trees of sklearn < 1.3 don't route missing values, NaN inputs are rejected by their predict
+                tree_nodes["missing_go_to_left"] = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+
+                offset += tree.node_count
+
+            return cls(nodes=nodes)
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def save(self, file_path: str) -> None:
+        """
+        Saves flat forest as uncompressed `.npy` file
+        -----------------------------------------------
+        input:
+        - `file_path`: path where to save flat forest
+        -----------------------------------------------
+        return: `None`
+        """
+
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            logging.info(f"Saving flat forest of {self.n_estimators} trees, {len(self.nodes)} nodes")
+            with open(file_path, "wb") as forest_file:
+                np.save(forest_file, self.nodes)
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    @classmethod
+    def load(cls, file_path: str, mmap_mode: str = "r") -> "FlatForest":
+        """
+        Loads flat forest, by default memory mapped read only
+        ---------------------------------------------------------------
+        input:
+        - `file_path`: path of saved flat forest
+        - `mmap_mode`: `np.load` memory map mode, `None` reads into memory
+        ---------------------------------------------------------------
+        return: `FlatForest`
+        """
+
+        try:
+            if not os.path.exists(file_path):
+                raise Exception(f"File path: {file_path} doesn't exist")
+
+            logging.info(f"Loading flat forest from: {file_path}")
+            return cls(nodes=np.load(file_path, mmap_mode=mmap_mode))
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def predict(self, X: np.array, chunk_size: int = 2**16) -> np.array:
+        """
+        Predicts with every tree and averages them like sklearn forest
+        - All trees are traversed together level by level: every (row, tree) pair steps one node down per iteration
+          and pairs reaching a leaf drop out, so there is one vectorized pass per tree level instead of per tree
+        - Input is cast to float32 and compared with float64 thresholds, as sklearn trees do, NaN inputs follow the side
+          sklearn learned for missing values at every split
+        ------------------------------------------------------------------------------------------------------------
+        input:
+        - `X`: input feature array of shape (rows, features)
+        - `chunk_size`: max (row, tree) pairs traversed at once, bounds memory of large batches
+        ------------------------------------------------------------------------------------------------------------
+        return: `np.array` of predictions
+        """
+
+        try:
+            X = np.asarray(X, dtype=np.float32)
+
+            if self.missing_go_to_left is None and np.isnan(X).any():
+                raise Exception(f"Flat forest was exported without missing value routing, export it again to predict inputs with NaN")
+
+            prediction = np.empty(len(X), dtype=np.float64)
+
+            rows_per_chunk = max(chunk_size // self.n_estimators, 1)
+
+            for start in range(0, len(X), rows_per_chunk):
+                prediction[start:start + rows_per_chunk] = self._predict_chunk(X[start:start + rows_per_chunk])
+
+            return prediction
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def _predict_chunk(self, X: np.array) -> np.array:
+        """
+        Predicts a chunk of float32 rows with all trees at once
+        """
+        n_trees = self.n_estimators
+
+        # Current node of every (tree, row) pair, tree major so pairs of one tree read neighbouring nodes
+        node = np.repeat(self.roots, len(X))
+        row = np.tile(np.arange(len(X)), n_trees)
+        active = np.arange(len(node))
+
+        while len(active) > 0:
+            current = node[active]
+            left = self.children_left[current]
+
+            is_internal = left != TREE_LEAF
+            active, current, left = active[is_internal], current[is_internal], left[is_internal]
+
+            x = X[row[active], self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if self.missing_go_to_left is not None:
+                go_left |= np.isnan(x) & self.missing_go_to_left[current]
+            node[active] = np.where(go_left, left, self.children_right[current])
+
+        leaf_values = self.value[node].reshape(n_trees, len(X))
+
+        # Accumulating trees in order, same summation order as sklearn
+        prediction = np.zeros(len(X), dtype=np.float64)
+        for tree in range(n_trees):
+            prediction += leaf_values[tree]
+
+        return prediction / n_trees
\ No newline at end of file
@@ -0,0 +1,244 @@
+"Background job queue for RUL package"
+
+
+import os
+import sys
+import json
+import uuid
+import sqlite3
+import threading
+import multiprocessing
+from datetime import datetime
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from rul.exception import RULException
+from rul.logger import logging
+
+
+JOB_DIR = "jobs"
+JOB_TABLE_FILE_NAME = "jobs.db"
+
+TRAINING_JOB = "training"
+BATCH_PREDICTION_JOB = "batch_prediction"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _connect(job_table_path: str) -> sqlite3.Connection:
+    """
+    Opens job table, waiting on writers of other processes instead of failing
+    """
+    connection = sqlite3.connect(job_table_path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _update_job(job_table_path: str, job_id: str, **fields) -> None:
+    """
+    Updates given fields of a job row in job table
+    -----------------------------------------------------------------
+    input:
+    - `job_table_path`: path of sqlite job table
+    - `job_id`: id of job to update
+    - `fields`: column name and value pairs to update
+    -----------------------------------------------------------------
+    return: `None`
+    """
+    fields["updated_at"] = datetime.now().isoformat()
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+
+    with _connect(job_table_path) as connection:
+        connection.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+
+def _run_training_job(job_table_path: str, job_id: str) -> None:
+    """
+    Runs training pipeline inside a worker process and records its progress and outcome
+    """
+    from rul.pipeline.training_pipeline import start_training_pipeline, MODEL_PUSHED, NO_NEW_DATA, MODEL_REJECTED
+    from rul.components.model_evaluation import MODEL_REJECTED_MESSAGE
+
+    messages = {
+        MODEL_PUSHED: "Current trained model is better than previous model! Saving the current model!",
+        NO_NEW_DATA: "No new cycles since last training! Training skipped, previous model is kept",
+        MODEL_REJECTED: "Current trained model is not better than previous model"
+    }
+
+    _update_job(job_table_path, job_id, status=RUNNING, stage="starting")
+    try:
+        outcome = start_training_pipeline(progress_callback=lambda stage, progress: _update_job(job_table_path, job_id, stage=stage, progress=progress))
+
+        _update_job(job_table_path, job_id, status=SUCCEEDED, stage="done", progress=1.0,
+                    result=json.dumps({"outcome": outcome, "message": messages[outcome]}))
+
+    except Exception as e:
+        # Rejected model is a completed run, any other error is a failure
+        if MODEL_REJECTED_MESSAGE in str(e):
+            _update_job(job_table_path, job_id, status=SUCCEEDED, stage="done", progress=1.0, error=str(e),
+                        result=json.dumps({"outcome": MODEL_REJECTED, "message": messages[MODEL_REJECTED]}))
+        else:
+            _update_job(job_table_path, job_id, status=FAILED, error=str(e))
+
+
+def _run_batch_prediction_job(job_table_path: str, job_id: str, input_file_path: str, chunk_size: Optional[int]) -> None:
+    """
+    Runs batch prediction inside a worker process and records its outcome
+    """
+    from rul.pipeline.batch_prediction import start_batch_prediction
+
+    _update_job(job_table_path, job_id, status=RUNNING, stage="predicting")
+    try:
+        # One core per job, the worker pool already runs one job per core
+        prediction_file_path = start_batch_prediction(input_file_path=input_file_path, chunk_size=chunk_size, n_jobs=1)
+
+        _update_job(job_table_path, job_id, status=SUCCEEDED, stage="done", progress=1.0,
+                    result=json.dumps({"prediction_file_path": prediction_file_path}))
+
+    except Exception as e:
+        _update_job(job_table_path, job_id, status=FAILED, error=str(e))
+
+
+class JobQueue:
+    """
+    Job Queue
+    -----------------------------------------------------------------------------------------------------------------------------------------------------
+    Runs training and batch prediction in background worker processes and keeps their state in a local sqlite job table,
+    so request handlers only submit work and return a job id.
+    Training runs on a single worker so at most one training is in flight, batch predictions run in parallel on all cores.
+    ------------------------------------------------------------------------------------------------------------------------------------------------------
+    input:
+     - `job_dir`: directory containing the job table
+     - `max_prediction_workers`: number of worker processes for batch prediction jobs, `None` means number of cores
+    -------------------------------------------------------------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    def __init__(self, job_dir: str = JOB_DIR, max_prediction_workers: Optional[int] = None) -> None:
+        try:
+            os.makedirs(job_dir, exist_ok=True)
+            self.job_table_path = os.path.join(job_dir, JOB_TABLE_FILE_NAME)
+
+            with _connect(self.job_table_path) as connection:
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        job_id TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        stage TEXT,
+                        progress REAL NOT NULL DEFAULT 0,
+                        result TEXT,
+                        error TEXT,
+                        created_at TEXT NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+
+                # Jobs left unfinished by a previous server process can never complete
+                connection.execute("UPDATE jobs SET status = ?, error = ? WHERE status IN (?, ?)",
+                                   (FAILED, "Interrupted by server restart", QUEUED, RUNNING))
+
+            # Workers are spawned, forking the threaded server process could copy locks held by its other threads into the workers
+            mp_context = multiprocessing.get_context("spawn")
+
+            self.training_executor = ProcessPoolExecutor(max_workers=1, mp_context=mp_context)
+
+            self.prediction_executor = ProcessPoolExecutor(max_workers=max_prediction_workers or os.cpu_count(), mp_context=mp_context)
+
+            # Makes check for an active training and its submission one step
+            self._submit_lock = threading.Lock()
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def _create_job(self, kind: str) -> str:
+        """
+        Inserts a new queued job in job table and returns its id
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+
+        with _connect(self.job_table_path) as connection:
+            connection.execute("INSERT INTO jobs (job_id, kind, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                               (job_id, kind, QUEUED, now, now))
+
+        return job_id
+
+    def submit_training(self) -> str:
+        """
+        Submits training pipeline as background job, reusing the active training job if one exists
+        ----------------------------------------------------------------------------------------------
+        input:
+        - `None`
+        ----------------------------------------------------------------------------------------------
+        return: `job_id`
+        """
+
+        try:
+            with self._submit_lock:
+                with _connect(self.job_table_path) as connection:
+                    active_job = connection.execute("SELECT job_id FROM jobs WHERE kind = ? AND status IN (?, ?)",
+                                                    (TRAINING_JOB, QUEUED, RUNNING)).fetchone()
+
+                if active_job is not None:
+                    logging.info(f"Training job: {active_job['job_id']} already active")
+                    return active_job["job_id"]
+
+                job_id = self._create_job(kind=TRAINING_JOB)
+
+            logging.info(f"Submitting training job: {job_id}")
+            self.training_executor.submit(_run_training_job, self.job_table_path, job_id)
+
+            return job_id
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def submit_batch_prediction(self, input_file_path: str, chunk_size: Optional[int] = None) -> str:
+        """
+        Submits batch prediction as background job
+        -----------------------------------------------------------------
+        input:
+        - `input_file_path`: file to make prediction on
+        - `chunk_size`: streaming chunk size passed to batch prediction
+        -----------------------------------------------------------------
+        return: `job_id`
+        """
+
+        try:
+            job_id = self._create_job(kind=BATCH_PREDICTION_JOB)
+
+            logging.info(f"Submitting batch prediction job: {job_id} for file: {input_file_path}")
+            self.prediction_executor.submit(_run_batch_prediction_job, self.job_table_path, job_id, input_file_path, chunk_size)
+
+            return job_id
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """
+        Returns status, progress and result of a job
+        -----------------------------------------------------------------
+        input:
+        - `job_id`: id of job
+        -----------------------------------------------------------------
+        return: `None` if no such job else `dict`
+        """
+
+        try:
+            with _connect(self.job_table_path) as connection:
+                row = connection.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+            if row is None:
+                return None
+
+            job = dict(row)
+            job["result"] = None if job["result"] is None else json.loads(job["result"])
+
+            return job
+
+        except Exception as e:
+            raise RULException(e, sys)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"Evaluation metrics for RUL package"
+
+
+import sys
+from typing import Sequence
+import numpy as np
+from sklearn.metrics import r2_score
+from rul.exception import RULException
+
+
+def nasa_score_terms(y_true: np.array, y_pred: np.array) -> np.array:
+    """
+    Per row term of NASA asymmetric scoring function, late predictions (over estimated RUL) cost more than early ones
+    """
+    d = np.asarray(y_pred, dtype="float64") - np.asarray(y_true, dtype="float64")
+    return np.where(d < 0, np.exp(-d / 13), np.exp(d / 10)) - 1
+
+
+def rmse(y_true: np.array, y_pred: np.array) -> float:
+    """
+    Root mean squared error
+    """
+    return float(np.sqrt(np.mean(np.square(np.asarray(y_pred, dtype="float64") - np.asarray(y_true, dtype="float64")))))
+
+
+def nasa_score(y_true: np.array, y_pred: np.array) -> float:
+    """
+    NASA asymmetric scoring function, sum over rows (lower is better)
+    """
+    return float(np.sum(nasa_score_terms(y_true, y_pred)))
+
+
+def regression_metrics(y_true: np.array, y_pred: np.array) -> dict:
+    """
+    Computes overall r2 score, RMSE and NASA score
+    -----------------------------------------------------------
+    input:
+    - `y_true`: true RUL
+    - `y_pred`: predicted RUL
+    -----------------------------------------------------------
+    return: `dict` with `rows`, `r2_score`, `rmse` and `nasa_score`
+    """
+
+    try:
+        return {
+            "rows": int(len(y_true)),
+            "r2_score": float(r2_score(y_true=y_true, y_pred=y_pred)),
+            "rmse": rmse(y_true, y_pred),
+            "nasa_score": nasa_score(y_true, y_pred)
+        }
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def sliced_metrics(y_true: np.array, y_pred: np.array, groups: np.array) -> dict:
+    """
+    Computes RMSE and NASA score of every group in one pass of weighted bincounts (no loop over groups)
+    -------------------------------------------------------------------------------------------------------
+    input:
+    - `y_true`: true RUL
+    - `y_pred`: predicted RUL
+    - `groups`: group label of every row, e.g. unit number or RUL band
+    -------------------------------------------------------------------------------------------------------
+    return: `dict` of group label to `dict` with `rows`, `rmse` and `nasa_score`
+    """
+
+    try:
+        labels, codes = np.unique(groups, return_inverse=True)
+
+        error = np.asarray(y_pred, dtype="float64") - np.asarray(y_true, dtype="float64")
+
+        rows = np.bincount(codes, minlength=len(labels))
+        squared_error = np.bincount(codes, weights=np.square(error), minlength=len(labels))
+        score = np.bincount(codes, weights=nasa_score_terms(y_true, y_pred), minlength=len(labels))
+
+        group_rmse = np.sqrt(squared_error / rows)
+
+        return {
+            label.item(): {"rows": int(rows[i]), "rmse": float(group_rmse[i]), "nasa_score": float(score[i])}
+            for i, label in enumerate(labels)
+        }
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def rul_bands(y_true: np.array, edges: Sequence[float]) -> np.array:
+    """
+    Labels every row with the band of its true RUL
+    -------------------------------------------------------------------
+    input:
+    - `y_true`: true RUL
+    - `edges`: increasing inner band edges, e.g. [25, 50] gives bands 0-25, 25-50 and 50+
+    -------------------------------------------------------------------
+    return: `np.array` of band labels
+    """
+
+    try:
+        edges = list(edges)
+        labels = np.array([f"{low:g}-{high:g}" for low, high in zip([0] + edges[:-1], edges)] + [f"{edges[-1]:g}+"])
+
+        return labels[np.digitize(y_true, edges)]
+
+    except Exception as e:
+        raise RULException(e, sys)
\ No newline at end of file
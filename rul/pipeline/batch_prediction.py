@@ -3,116 +3,138 @@
 
 import sys
 import os
+import copy
 from datetime import datetime
+from typing import Optional
 import pandas as pd
 import numpy as np
 from rul.logger import logging
 from rul.exception import RULException
 from rul import utils
-from rul.predictor import ModelResolver
-from rul.components.data_transformation import DataTransformation as DT
+from rul.config import INPUT_FEATURE_COLUMNS, TARGET_COLUMN
+from rul.predictor import ModelResolver, ModelServer
+from rul.pipeline.online_prediction import predict_rul
 
 
 PREDICTION_DIR = "prediction"
 
+# Number of rows read per chunk in streaming mode
+PREDICTION_CHUNK_SIZE = 100000
 
-def start_batch_prediction(input_file_path):
+
+def predict_dataframe(df: pd.DataFrame, transformer: object, model: object) -> pd.DataFrame:
     """
-    Predicts output for batch of data points
-    -----------------------------------------------------------------
+    Predicts output for a dataframe (whole input file or one chunk of it)
+    -----------------------------------------------------------------------------------
     input:
-    - `input_file_path`: file to make prediction on (Assuming that input file has same shape as base file and has not only just input features but both input features and target feature--- we can alter this function for only input feature file only)
-    -----------------------------------------------------------------
-    return: `prediction_file_path`
+    - `df`: dataframe to make prediction on, modified in place into the output
+    - `transformer`: fitted transformer object
+    - `model`: trained model object
+    -----------------------------------------------------------------------------------
+    return: `pd.DataFrame` of unit number, time cycle, original input features and predicted RUL
     """
 
     try:
-        # Making prediction directory
-        logging.info(f"Creating prediction directory if not exist")
-        os.makedirs(PREDICTION_DIR, exist_ok=True)
-
-        # Loading Model resolver
-        logging.info(f"Creating instance of model resolver class")
-        model_resolver = ModelResolver(model_registry="saved_models")
-
-        # Loading dataset on which we want to make predictions (in batch)
-        logging.info(f"Loading dataset on which to predict")
-        df = pd.read_csv(input_file_path)
-
         # Replacing na with Nan
         logging.info(f"Replacing Na with NAN")
-        df.replace({"na": np.NAN}, inplace=True)
-
-        # Loading latest transformer object
-        logging.info(f"Loading latest transformer object")
-        transformer = utils.load_object(file_path=model_resolver.get_latest_transformer_path())
-
-        # Load latest Model object
-        logging.info(f"Loading latest model object")
-        model = utils.load_object(file_path=model_resolver.get_latest_model_path())
-
-        # Add RUL feature
-        logging.info(f"Adding RUL feature to dataframe")
-        df = DT.add_RUL_feature(DT, df=df)
+        df.replace({"na": np.nan}, inplace=True)
 
-        # Dropping irrelevant  features
-        logging.info(f"Proceeding to drop irrelevant index, setting and constant sensor features")
-        index_names = ["unit_number", "time_cycles"]
+        # Dropping irrelevant features, original input feature columns are kept as they are for the output
+        logging.info(f"Proceeding to drop irrelevant setting and constant sensor features")
         setting_names = ["setting_1", "setting_2", "setting_3"]
         constant_sensors = ["s_1", "s_5",'s_6', "s_10", "s_16", "s_18", "s_19"]
 
-        drop_labels = index_names + setting_names + constant_sensors
+        drop_labels = [column for column in setting_names + constant_sensors + [TARGET_COLUMN] if column in df.columns]
 
         df.drop(columns=drop_labels, inplace=True)
 
-        # Transforming df to array
-        logging.info(f"Transforming dataframe to numpy array")
-        df_arr = transformer.transform(df)
+        # Predict using the model, only the prediction vector is unscaled
+        logging.info(f"Making predictions on input features")
+        prediction = predict_rul(transformer=transformer, model=model, features=df[INPUT_FEATURE_COLUMNS].to_numpy(dtype="float"))
 
-        # Extracting input feature
-        logging.info(f"Extracting input features from dataframe")
-        input_features = df_arr[:,:-1]
+        # Adding prediction to input dataframe, unit number and time cycle keep the output joinable with the input
+        logging.info(f"Adding predicted RUL to output dataframe")
+        df[TARGET_COLUMN] = prediction
 
-        # Predict using the model
-        logging.info(f"Making predictions on input features")
-        prediction = model.predict(input_features)
+        return df
 
-        # Reshaping prediction array
-        logging.info(f"Reshaping prediction numpy array")
-        prediction = prediction.reshape((20631, 1))
+    except Exception as e:
+        raise RULException(e, sys)
 
-        # Converting input feature and prediction array to dataframe
-        logging.info(f"Converting input_feature and prediction array to dataframe")
-        input_features = pd.DataFrame(input_features)
-        prediction = pd.DataFrame(prediction)
 
-        # Merging input_feature and prediction dataframe
-        logging.info(f"Merging input_feature and prediction dataframe as output dataframe")
-        output = pd.concat([input_features, prediction], axis=1)
+def start_batch_prediction(input_file_path, chunk_size: Optional[int] = None, model_server: Optional[ModelServer] = None, n_jobs: Optional[int] = None, use_flat_model: bool = False):
+    """
+    Predicts output for batch of data points
+    -----------------------------------------------------------------
+    input:
+    - `input_file_path`: file to make prediction on (Assuming that input file has same shape as base file and has not only just input features but both input features and target feature--- we can alter this function for only input feature file only)
+    - `chunk_size`: if given, input CSV file is streamed in chunks of this many rows and output is appended chunk by chunk (bounded memory)
+    - `model_server`: resident model server to take transformer and model from, if `None` they are loaded from the model registry
+    - `n_jobs`: number of cores to predict with, if `None` the setting model was saved with (`ModelTrainerConfig.predict_n_jobs`) is kept
+    - `use_flat_model`: when loading from the model registry, memory map flat forest copy of the model if available
+    -----------------------------------------------------------------
+    return: `prediction_file_path`
+    """
 
-        # Inverse transforming every features of output dataframe
-        logging.info(f"Inverse transforming every feature of output dataframe to get original data in array form")
-        output = transformer.inverse_transform(output)
+    try:
+        # Making prediction directory
+        logging.info(f"Creating prediction directory if not exist")
+        os.makedirs(PREDICTION_DIR, exist_ok=True)
 
-        # Converting output array to dataframe and adding column header
-        logging.info(f"Converting output numpy array to dataframe and adding headers")
-        output = pd.DataFrame(output, 
-                              columns=['s_2', 's_3', 's_4', 's_7', 's_8', 's_9',
-                                        's_11', 's_12', 's_13', 's_14', 's_15', 
-                                        's_17', 's_20', 's_21', 'RUL'
-                                        ]
-                            )
+        if model_server is not None:
+            # Taking in memory transformer and model object from model server, sklearn model as uploaded files are bigger than flat forest batches
+            logging.info(f"Taking transformer and model object from model server")
+            transformer, model = model_server.get_model()
 
-        # Save prediction file
-        logging.info(f"Saving output file containing prediction and input features")
+        else:
+            # Loading Model resolver
+            logging.info(f"Creating instance of model resolver class")
+            model_resolver = ModelResolver(model_registry="saved_models")
 
-        prediction_file_name = os.path.basename(input_file_path).replace(".csv", f"{datetime.now().strftime('%m%d%Y__%H%M%S')}.csv")
+            # Loading latest transformer object
+            logging.info(f"Loading latest transformer object")
+            transformer = utils.load_object(file_path=model_resolver.get_latest_transformer_path())
+
+            # Load latest Model object
+            logging.info(f"Loading latest model object")
+            model = model_resolver.load_model(dir_path=model_resolver.get_latest_dir_path(), use_flat_model=use_flat_model)
+
+        # Flat forest predicts on a single core, only sklearn models take n_jobs
+        if n_jobs is not None and hasattr(model, "set_params"):
+            # Shallow copy shares fitted trees, so the served model keeps its own setting
+            logging.info(f"Predicting with n_jobs: {n_jobs}")
+            model = copy.copy(model)
+            model.set_params(n_jobs=n_jobs)
+
+        # Prediction file is always CSV, input file may also be Parquet or Feather in memory mode
+        prediction_file_name = f"{os.path.splitext(os.path.basename(input_file_path))[0]}{datetime.now().strftime('%m%d%Y__%H%M%S')}.csv"
 
         prediction_file_path = os.path.join(PREDICTION_DIR, prediction_file_name)
 
-        output.to_csv(prediction_file_path, index=False, header=True)
+        # => In memory mode: whole input file at once
+        if chunk_size is None:
+            # Loading dataset on which we want to make predictions (in batch)
+            logging.info(f"Loading dataset on which to predict")
+            df = utils.read_dataframe(file_path=input_file_path)
+
+            output = predict_dataframe(df=df, transformer=transformer, model=model)
+
+            # Save prediction file
+            logging.info(f"Saving output file containing prediction and input features")
+            output.to_csv(prediction_file_path, index=False, header=True)
+
+            return prediction_file_path
+
+        # => Streaming mode: input file chunk by chunk
+        logging.info(f"Streaming dataset on which to predict in chunks of {chunk_size} rows")
+        for chunk_number, df in enumerate(pd.read_csv(input_file_path, chunksize=chunk_size)):
+            output = predict_dataframe(df=df, transformer=transformer, model=model)
+
+            # Appending chunk prediction to prediction file, header only with first chunk
+            logging.info(f"Appending prediction of chunk {chunk_number} to output file")
+            output.to_csv(prediction_file_path, mode="w" if chunk_number == 0 else "a", index=False, header=chunk_number == 0)
 
         return prediction_file_path
-    
+
     except Exception as e:
         raise RULException(e, sys)
\ No newline at end of file
@@ -0,0 +1,144 @@
+"Benchmark Evaluation Pipeline"
+
+
+import sys
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import pandas as pd
+from rul.logger import logging
+from rul.exception import RULException
+from rul import utils
+from rul import cmapss
+from rul import metrics
+from rul.config import INPUT_FEATURE_COLUMNS, TARGET_COLUMN
+from rul.entity.config_entity import TRANSFORMER_OBJECT_FILE_NAME
+from rul.predictor import ModelResolver, FLAT_MODEL_MAX_ROWS
+from rul.pipeline.online_prediction import predict_rul
+
+
+BENCHMARK_EVALUATION_DIR = "benchmark_evaluation"
+
+DATA_DIR = "./CMaps"
+
+
+def find_benchmark_subsets(data_dir: str) -> List[str]:
+    """
+    Returns subsets (e.g. "FD001") having both a test file and its RUL truth file, other subsets can't be scored
+    """
+    data_files = {(dataset, fd) for _, dataset, fd in cmapss.find_cmapss_files(data_dir)}
+
+    return sorted(fd for dataset, fd in data_files if dataset == "test" and ("RUL", fd) in data_files)
+
+
+def get_last_cycles(test_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns last cycle row of every test unit, ordered by unit number
+    """
+    last_rows = test_df.groupby("unit_number")["time_cycles"].idxmax()
+
+    return test_df.loc[last_rows.to_numpy()]
+
+
+def evaluate_subset(data_dir: str, fd: str, model_dir_path: str, use_flat_model: bool = True) -> dict:
+    """
+    Scores a model on the CMAPSS benchmark of one subset: RUL predicted at last cycle of every test unit against RUL_FD00x truth
+    - Runs in a worker process, transformer and model are loaded there (flat forest is memory mapped, so every worker shares one copy)
+    - Flat forest predicts subsets of at most `FLAT_MODEL_MAX_ROWS` engines, bigger ones go to the sklearn model like in `ModelServer`
+    ------------------------------------------------------------------------------------------------------------------------------------
+    input:
+    - `data_dir`: directory of CMAPSS files
+    - `fd`: subset, e.g. "FD001"
+    - `model_dir_path`: model registry sub directory of model to score
+    - `use_flat_model`: memory map flat forest copy of the model if available and the subset is small enough
+    ------------------------------------------------------------------------------------------------------------------------------------
+    return: `dict` with `fd`, `engines`, `rmse`, `nasa_score` and `predict_time`
+    """
+
+    try:
+        model_resolver = ModelResolver(model_registry=os.path.dirname(model_dir_path))
+
+        # Parsed as float64 (binary copy cached next to the source), the same values the model was trained on,
+        # RUL at the last cycle of a unit is its true RUL
+        logging.info(f"Reading test trajectories and RUL truth of {fd}")
+        last_cycles_df = get_last_cycles(cmapss.read_test_with_truth(data_dir=data_dir, fd=fd, dtype="float64"))
+
+        y_true = last_cycles_df[TARGET_COLUMN].to_numpy()
+
+        # Engine picked by batch size, one core per worker as subsets are scored in parallel processes
+        logging.info(f"Loading transformer and model of: {model_dir_path} to score {fd}")
+        transformer = utils.load_object(file_path=os.path.join(model_dir_path, model_resolver.transformer_dir_name, TRANSFORMER_OBJECT_FILE_NAME))
+        model = model_resolver.load_model(dir_path=model_dir_path, use_flat_model=use_flat_model and len(last_cycles_df) <= FLAT_MODEL_MAX_ROWS, n_jobs=1)
+
+        # One batched prediction for all engines of the subset
+        logging.info(f"Predicting RUL of {len(last_cycles_df)} engines of {fd}")
+        start_time = time.perf_counter()
+        y_pred = predict_rul(transformer=transformer, model=model, features=last_cycles_df[INPUT_FEATURE_COLUMNS].to_numpy(dtype="float64"))
+        predict_time = time.perf_counter() - start_time
+
+        return {
+            "fd": fd,
+            "engines": int(len(y_true)),
+            "rmse": metrics.rmse(y_true, y_pred),
+            "nasa_score": metrics.nasa_score(y_true, y_pred),
+            "predict_time": predict_time
+        }
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def start_benchmark_evaluation(data_dir: str = DATA_DIR, model_dir_path: Optional[str] = None, use_flat_model: bool = True, max_workers: Optional[int] = None) -> str:
+    """
+    Scores a model on the CMAPSS benchmark of every subset with test and truth files, subsets scored in parallel processes
+    ---------------------------------------------------------------------------------------------------------------------------
+    input:
+    - `data_dir`: directory of CMAPSS files
+    - `model_dir_path`: model registry sub directory of model to score, if `None` the latest model of `saved_models`
+    - `use_flat_model`: memory map flat forest copy of the model if available, for subsets of at most `FLAT_MODEL_MAX_ROWS` engines
+    - `max_workers`: number of worker processes, if `None` one per subset up to the number of cores
+    ---------------------------------------------------------------------------------------------------------------------------
+    return: `report_file_path`
+    """
+
+    try:
+        if model_dir_path is None:
+            logging.info(f"Taking latest model of model registry")
+            model_dir_path = ModelResolver(model_registry="saved_models").get_latest_dir_path()
+
+            if model_dir_path is None:
+                raise Exception(f"Model is not available!")
+
+        subsets = find_benchmark_subsets(data_dir)
+        if len(subsets) == 0:
+            raise Exception(f"No CMAPSS subset with both test and RUL file in: {data_dir}")
+
+        skipped_subsets = sorted({fd for _, _, fd in cmapss.find_cmapss_files(data_dir)} - set(subsets))
+        logging.info(f"Scoring subsets: {subsets}, skipping subsets without test or RUL file: {skipped_subsets}")
+
+        max_workers = min(len(subsets), os.cpu_count() or 1) if max_workers is None else max_workers
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(evaluate_subset, [data_dir] * len(subsets), subsets, [model_dir_path] * len(subsets), [use_flat_model] * len(subsets)))
+
+        report = {
+            "model_dir_path": model_dir_path,
+            "skipped_subsets": skipped_subsets,
+            "subsets": {result.pop("fd"): result for result in results}
+        }
+
+        for fd, result in report["subsets"].items():
+            logging.info(f"{fd}: engines: {result['engines']} RMSE: {result['rmse']} NASA score: {result['nasa_score']}")
+
+        # Saving benchmark report
+        os.makedirs(BENCHMARK_EVALUATION_DIR, exist_ok=True)
+        report_file_path = os.path.join(BENCHMARK_EVALUATION_DIR, f"report_{datetime.now().strftime('%m%d%Y__%H%M%S')}.yaml")
+
+        logging.info(f"Saving benchmark evaluation report: {report_file_path}")
+        utils.write_yaml_file(file_path=report_file_path, data=report)
+
+        return report_file_path
+
+    except Exception as e:
+        raise RULException(e, sys)
\ No newline at end of file
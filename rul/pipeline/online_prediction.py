@@ -0,0 +1,185 @@
+"Online Prediction Pipeline"
+
+
+import sys
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple, Union
+import numpy as np
+import pandas as pd
+from rul.logger import logging
+from rul.exception import RULException
+from rul.config import INPUT_FEATURE_COLUMNS, TARGET_COLUMN
+from rul.predictor import ModelServer
+from rul import utils
+
+
+def parse_sensor_rows(payload: Union[dict, list]) -> np.array:
+    """
+    Converts JSON payload of one or more sensor rows to input feature array
+    -----------------------------------------------------------------------------------------------
+    input:
+    - `payload`: single row, list of rows or `{"instances": [rows]}`, where a row is either a dict of
+      sensor name to value or a list of values ordered as `INPUT_FEATURE_COLUMNS`
+    -----------------------------------------------------------------------------------------------
+    return: `np.array` of shape (number of rows, number of input features)
+    """
+
+    try:
+        rows = payload.get("instances", payload) if isinstance(payload, dict) else payload
+
+        # Single row sent without wrapping list
+        if isinstance(rows, dict) or (isinstance(rows, list) and len(rows) > 0 and not isinstance(rows[0], (dict, list))):
+            rows = [rows]
+
+        if not isinstance(rows, list) or len(rows) == 0:
+            raise Exception(f"Expected one or more sensor rows")
+
+        features = np.empty((len(rows), len(INPUT_FEATURE_COLUMNS)), dtype="float")
+
+        for i, row in enumerate(rows):
+            if isinstance(row, dict):
+                missing_columns = [column for column in INPUT_FEATURE_COLUMNS if column not in row]
+                if len(missing_columns) > 0:
+                    raise Exception(f"Row {i} is missing sensors: {missing_columns}")
+                row = [row[column] for column in INPUT_FEATURE_COLUMNS]
+
+            if len(row) != len(INPUT_FEATURE_COLUMNS):
+                raise Exception(f"Row {i} has {len(row)} values, expected {len(INPUT_FEATURE_COLUMNS)}: {INPUT_FEATURE_COLUMNS}")
+
+            # Missing values are imputed by the transformer
+            features[i] = [np.nan if value is None else value for value in row]
+
+        return features
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def predict_rul(transformer: object, model: object, features: np.array) -> np.array:
+    """
+    Predicts RUL in original scale for raw input feature array
+    -------------------------------------------------------------------
+    input:
+    - `transformer`: fitted transformer object
+    - `model`: trained model object
+    - `features`: raw input feature array ordered as `INPUT_FEATURE_COLUMNS`
+    -------------------------------------------------------------------
+    return: `np.array` of predicted RUL
+    """
+
+    try:
+        # Transformer was fitted with target as last column, so a placeholder target is added and dropped again
+        df = pd.DataFrame(features, columns=INPUT_FEATURE_COLUMNS)
+        df[TARGET_COLUMN] = 0.0
+
+        input_features = transformer.transform(df)[:,:-1]
+
+        prediction = model.predict(input_features)
+
+        return utils.inverse_transform_target(transformer=transformer, y=prediction)
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+class MicroBatcher:
+    """
+    Micro Batcher
+    -----------------------------------------------------------------------------------------------------------------------------------------------------
+    Coalesces concurrent prediction requests arriving within `max_wait` seconds into one stacked `model.predict` call,
+    since per call overhead of the random forest dominates for a few rows.
+    ------------------------------------------------------------------------------------------------------------------------------------------------------
+    input:
+     - `model_server`: model server providing the in memory transformer and model
+     - `max_batch_size`: max number of rows predicted in one call
+     - `max_wait`: max seconds the first request of a batch waits for more requests
+    -------------------------------------------------------------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    def __init__(self, model_server: ModelServer, max_batch_size: int = 4096, max_wait: float = 0.005) -> None:
+        try:
+            self.model_server = model_server
+
+            self.max_batch_size = max_batch_size
+
+            self.max_wait = max_wait
+
+            self._requests = queue.Queue()
+
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def predict(self, features: np.array, timeout: float = 30.0) -> np.array:
+        """
+        Queues input feature rows for the next batch and waits for their prediction
+        ------------------------------------------------------------------------------
+        input:
+        - `features`: raw input feature array ordered as `INPUT_FEATURE_COLUMNS`
+        - `timeout`: max seconds to wait for the prediction
+        ------------------------------------------------------------------------------
+        return: `np.array` of predicted RUL
+        """
+
+        try:
+            future = Future()
+            self._requests.put((features, future))
+
+            return future.result(timeout=timeout)
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def _collect_batch(self) -> List[Tuple[np.array, Future]]:
+        """
+        Blocks for the first request then gathers more until batch is full or wait time is over
+        """
+        batch = [self._requests.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+
+        return batch
+
+    def _run(self) -> None:
+        """
+        Serves batches until the process exits
+        """
+        while True:
+            batch = self._collect_batch()
+
+            try:
+                batch_features = np.vstack([features for features, _ in batch])
+
+                # Engine picked by stacked batch size, flat forest for small batches
+                transformer, model = self.model_server.get_model(rows=len(batch_features))
+
+                prediction = predict_rul(transformer=transformer, model=model, features=batch_features)
+
+                # Handing every request its own slice of the batch prediction
+                offset = 0
+                for features, future in batch:
+                    future.set_result(prediction[offset:offset + len(features)])
+                    offset += len(features)
+
+                logging.info(f"Predicted micro batch of {len(batch)} requests, {offset} rows")
+
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
\ No newline at end of file
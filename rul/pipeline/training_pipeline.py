@@ -3,18 +3,33 @@
 
 import sys
 import os
+from typing import Callable, Optional
 from rul.logger import logging
 from rul.exception import RULException
 from rul.entity import config_entity
 from rul.components.data_ingestion import DataIngestion
-from rul.components.data_validation import DataValidation
-from rul.components.data_transformation import DataTransformation
-from rul.components.model_trainer import ModelTrainer
-from rul.components.model_evaluation import ModelEvaluation
-from rul.components.model_pusher import ModelPusher
 
 
-def start_training_pipeline():
+# Outcomes of a training pipeline run, a rejected model is raised by model evaluation
+MODEL_PUSHED = "model_pushed"
+NO_NEW_DATA = "no_new_data"
+MODEL_REJECTED = "model_rejected"
+
+
+def start_training_pipeline(progress_callback: Optional[Callable[[str, float], None]] = None):
+    """
+    Runs all the components of training pipeline one after another
+    ---------------------------------------------------------------------------------
+    input:
+    - `progress_callback`: called with (completed stage name, fraction of pipeline done) after every component
+    ---------------------------------------------------------------------------------
+    return: `MODEL_PUSHED`, or `NO_NEW_DATA` when incremental ingestion found no new cycles
+    """
+
+    def report_progress(stage: str, progress: float) -> None:
+        if progress_callback is not None:
+            progress_callback(stage, progress)
+
     try:
         # Import training pipeline configuration
         logging.info(f"Loading Training Pipeline COnfiguration")
@@ -30,6 +45,21 @@ def start_training_pipeline():
 
         data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
 
+        report_progress("data_ingestion", 1/6)
+
+        # Nothing to retrain on when incremental ingestion found no new cycles
+        if data_ingestion_config.incremental and data_ingestion_artifact.new_rows == 0:
+            logging.info(f"No new cycles since last run, skipping rest of training pipeline")
+            report_progress(NO_NEW_DATA, 1.0)
+            return NO_NEW_DATA
+
+        # Remaining components pull in sklearn and scipy, imported only once there is something to train on
+        from rul.components.data_validation import DataValidation
+        from rul.components.data_transformation import DataTransformation
+        from rul.components.model_trainer import ModelTrainer
+        from rul.components.model_evaluation import ModelEvaluation
+        from rul.components.model_pusher import ModelPusher
+
 
         # Data Validation 
         logging.info(f"-----------------Initiating Data Validation-----------------")
@@ -42,6 +72,8 @@ def start_training_pipeline():
 
         data_validation_artifact = data_validation.initiate_data_validation()
 
+        report_progress("data_validation", 2/6)
+
 
         # Data Transformation
         logging.info(f"-----------------Initiating Data Transformation-----------------")
@@ -54,6 +86,8 @@ def start_training_pipeline():
 
         data_transformation_artifact = data_transformation.initiate_data_transformation()
 
+        report_progress("data_transformation", 3/6)
+
 
         # Model Trainer
         logging.info(f"-----------------Initiating Model Trainer-----------------")
@@ -66,6 +100,8 @@ def start_training_pipeline():
 
         model_trainer_artifact = model_trainer.initiate_model_trainer()
 
+        report_progress("model_trainer", 4/6)
+
 
         # Model Evaluation
         logging.info(f"-----------------Initiating Model Evaluation-----------------")
@@ -78,6 +114,8 @@ def start_training_pipeline():
 
         model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
 
+        report_progress("model_evaluation", 5/6)
+
 
         # Model Pusher
         logging.info(f"-----------------Initiating Model Pusher-----------------")
@@ -85,10 +123,15 @@ def start_training_pipeline():
         model_pusher_config = config_entity.ModelPusherConfig(training_pipeline_config=training_pipeline_config)
 
         model_pusher = ModelPusher(model_pusher_config=model_pusher_config,
-                                   data_transformation_artifact=data_transformation_artifact, model_trainer_artifact=model_trainer_artifact
+                                   data_transformation_artifact=data_transformation_artifact, model_trainer_artifact=model_trainer_artifact,
+                                   model_evaluation_artifact=model_evaluation_artifact
                                    )
 
         model_pusher_artifact = model_pusher.initiate_model_pusher()
 
+        report_progress("model_pusher", 6/6)
+
+        return MODEL_PUSHED
+
     except Exception as e:
         raise RULException(e, sys)
\ No newline at end of file
@@ -3,11 +3,26 @@
 
 import sys
 import os
+import shutil
+import threading
 from glob import glob
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Tuple
 from rul.exception import RULException
 from rul.logger import logging
-from rul.entity.config_entity import TRANSFORMER_OBJECT_FILE_NAME, MODEL_FILE_NAME
+from rul.entity.config_entity import TRANSFORMER_OBJECT_FILE_NAME, MODEL_FILE_NAME, FLAT_MODEL_FILE_NAME, MODEL_REGISTRY_INDEX_FILE_NAME
+from rul.forest import FlatForest
+from rul import utils
+
+
+# Largest batch the flat forest predicts faster than the sklearn model, its per row traversal loses to sklearn's
+# vectorized trees above about a hundred rows
+FLAT_MODEL_MAX_ROWS = 128
+
+
+# Parsed registry index per index file path, reused while the index file is unchanged
+_registry_index_cache = dict()
+_registry_index_lock = threading.Lock()
 
 
 class ModelResolver:
@@ -37,6 +52,120 @@ class ModelResolver:
         except Exception as e:
             raise RULException(e, sys)
     
+    @property
+    def registry_index_path(self) -> str:
+        """
+        Returns path of registry index file maintained by model pusher
+        """
+        return os.path.join(self.model_registry, MODEL_REGISTRY_INDEX_FILE_NAME)
+
+    def scan_version_numbers(self) -> list:
+        """
+        Returns sorted version numbers of model sub directories, other entries of the registry are ignored
+        """
+        return sorted(int(name) for name in os.listdir(self.model_registry) if name.isdigit() and os.path.isdir(os.path.join(self.model_registry, name)))
+
+    def get_registry_index(self) -> dict:
+        """
+        Returns registry index, parsed again only when index file changed
+        - Registries pushed before the index existed are indexed from their numbered sub directories
+        ----------------------------------------------------------------------------------------------
+        input:
+        - `None`
+        ----------------------------------------------------------------------------------------------
+        return: `dict` with `latest_version` (`None` if registry is empty) and `versions` entries
+        """
+
+        try:
+            try:
+                index_stat = os.stat(self.registry_index_path)
+            except FileNotFoundError:
+                version_numbers = self.scan_version_numbers()
+                return {
+                    "latest_version": version_numbers[-1] if len(version_numbers) > 0 else None,
+                    "versions": [{"version": version} for version in version_numbers]
+                }
+
+            # Index is replaced atomically on every update, so a new inode, modification time or size means a new index
+            index_key = (index_stat.st_ino, index_stat.st_mtime_ns, index_stat.st_size)
+
+            with _registry_index_lock:
+                cached = _registry_index_cache.get(self.registry_index_path)
+                if cached is not None and cached[0] == index_key:
+                    return cached[1]
+
+            index = utils.read_yaml_file(file_path=self.registry_index_path)
+
+            with _registry_index_lock:
+                _registry_index_cache[self.registry_index_path] = (index_key, index)
+
+            return index
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def write_registry_index(self, index: dict) -> None:
+        """
+        Atomically replaces registry index, readers see either the old or the new index
+        """
+        temp_index_path = f"{self.registry_index_path}.tmp"
+        utils.write_yaml_file(file_path=temp_index_path, data=index)
+        os.replace(temp_index_path, self.registry_index_path)
+
+    def register_version(self, version_dir_path: str, metrics: Optional[dict] = None, keep_versions: Optional[int] = None) -> dict:
+        """
+        Adds a pushed model directory to registry index as latest version and prunes versions beyond retention
+        ----------------------------------------------------------------------------------------------------------
+        input:
+        - `version_dir_path`: complete `model_registry/<version>` directory containing model and transformer
+        - `metrics`: scores of the model recorded with the version
+        - `keep_versions`: number of newest versions to keep, older ones are removed from index and disk, `None` keeps all
+        ----------------------------------------------------------------------------------------------------------
+        return: `dict` registry index entry of the new version
+        """
+
+        try:
+            version = int(os.path.basename(os.path.normpath(version_dir_path)))
+
+            model_path = os.path.join(f"{version}", self.model_dir_name, MODEL_FILE_NAME)
+
+            transformer_path = os.path.join(f"{version}", self.transformer_dir_name, TRANSFORMER_OBJECT_FILE_NAME)
+
+            entry = {
+                "version": version,
+                "model_path": model_path,
+                "transformer_path": transformer_path,
+                "model_checksum": utils.file_checksum(file_path=os.path.join(self.model_registry, model_path)),
+                "transformer_checksum": utils.file_checksum(file_path=os.path.join(self.model_registry, transformer_path)),
+                "metrics": metrics or dict(),
+                "created_at": datetime.now().isoformat()
+            }
+
+            flat_model_path = os.path.join(f"{version}", self.model_dir_name, FLAT_MODEL_FILE_NAME)
+            if os.path.exists(os.path.join(self.model_registry, flat_model_path)):
+                entry["flat_model_path"] = flat_model_path
+                entry["flat_model_checksum"] = utils.file_checksum(file_path=os.path.join(self.model_registry, flat_model_path))
+
+            index = self.get_registry_index()
+            versions = [existing for existing in index["versions"] if existing["version"] != version] + [entry]
+
+            pruned_versions = []
+            if keep_versions is not None and len(versions) > keep_versions:
+                pruned_versions, versions = versions[:-keep_versions], versions[-keep_versions:]
+
+            logging.info(f"Registering model version: {version} in registry index")
+            self.write_registry_index(index={"latest_version": version, "versions": versions})
+
+            # Pruned directories are deleted only after index stopped pointing at them
+            for pruned in pruned_versions:
+                logging.info(f"Removing model version: {pruned['version']} beyond retention of {keep_versions} versions")
+                shutil.rmtree(os.path.join(self.model_registry, f"{pruned['version']}"), ignore_errors=True)
+
+            return entry
+
+        except Exception as e:
+            raise RULException(e, sys)
+
     def get_latest_dir_path(self) -> Optional[str]:
         """
         Returns latest model directory path if their any
@@ -48,21 +177,15 @@ class ModelResolver:
         """
 
         try:
-            # Creating list of all the sub directories in the model_registry folder of model training artifact
-            dir_names = os.listdir(self.model_registry)
+            # Latest version is read from registry index (cached until index changes)
+            latest_version = self.get_registry_index()["latest_version"]
 
-            # If no sub directory that means no saved model object
-            if len(dir_names) == 0:
+            # If no version registered that means no saved model object
+            if latest_version is None:
                 return None
-            
-            # Convert str name of subdir to int for all subdirs
-            dir_names = list(map(int, dir_names))
 
-            # Get the latest one as we saved subdirs as named by date time format
-            latest_dir_name = max(dir_names)
-
-            # Get absolute path to our latest subdir
-            latest_dir_path = os.path.join(self.model_registry, f"{latest_dir_name}")
+            # Get path to our latest subdir
+            latest_dir_path = os.path.join(self.model_registry, f"{latest_version}")
 
             return latest_dir_path
         
@@ -94,6 +217,37 @@ class ModelResolver:
         except Exception as e:
             raise RULException(e, sys)
         
+    def load_model(self, dir_path: str, use_flat_model: bool = False, n_jobs: Optional[int] = None) -> object:
+        """
+        Loads model of a model registry sub directory
+        ------------------------------------------------------------------------------------------------------
+        input:
+        - `dir_path`: model registry sub directory
+        - `use_flat_model`: memory map flat forest copy of the model if it was exported, else unpickle model
+        - `n_jobs`: number of cores unpickled sklearn model predicts with, if `None` the saved setting is kept
+        ------------------------------------------------------------------------------------------------------
+        return: model object (sklearn model or `FlatForest`)
+        """
+
+        try:
+            flat_model_path = os.path.join(dir_path, self.model_dir_name, FLAT_MODEL_FILE_NAME)
+
+            if use_flat_model and os.path.exists(flat_model_path):
+                return FlatForest.load(file_path=flat_model_path)
+
+            if use_flat_model:
+                logging.info(f"No flat model in: {dir_path}, loading pickled model")
+
+            model = utils.load_object(file_path=os.path.join(dir_path, self.model_dir_name, MODEL_FILE_NAME))
+
+            if n_jobs is not None and hasattr(model, "set_params"):
+                model.set_params(n_jobs=n_jobs)
+
+            return model
+
+        except Exception as e:
+            raise RULException(e, sys)
+
     def get_latest_transformer_path(self):
         """
         Returns latest transformer path form the latest transformer subdir from model_registry
@@ -131,18 +285,17 @@ class ModelResolver:
         return: `None` or `latest_save_dir_path`
         """
         try:
-            latest_dir_path = self.get_latest_dir_path()
+            latest_version = self.get_registry_index()["latest_version"]
+
+            # Directories left by an unregistered push also take up their number
+            version_numbers = self.scan_version_numbers() + ([] if latest_version is None else [latest_version])
 
             # If no latest directory
-            if latest_dir_path is None:
+            if len(version_numbers) == 0:
                 logging.info(f"No latest saved model registry found!")
                 return os.path.join(self.model_registry,f"{0}")
-            
-            # Number name of the latest saved model sub directory
-            latest_dir_num = int(os.path.basename(self.get_latest_dir_path()))
-
 
-            latest_save_dir_path = os.path.join(self.model_registry, f"{latest_dir_num+1}")
+            latest_save_dir_path = os.path.join(self.model_registry, f"{max(version_numbers)+1}")
 
             return latest_save_dir_path
 
@@ -186,3 +339,191 @@ class ModelResolver:
 
         except Exception as e:
             raise RULException(e, sys)
+
+
+
+class ModelServer:
+    """
+    Model Server
+    -----------------------------------------------------------------------------------------------------------------------------------------------------
+    Long lived holder of the latest transformer and model, loaded once and kept in memory so predictions never touch disk.
+    A background watcher polls the model registry and hot swaps both objects together when a new `saved_models/<n>` directory is pushed.
+    ------------------------------------------------------------------------------------------------------------------------------------------------------
+    input:
+     - `model_registry`: directory containing all sub directories which contain the models trained and their transformers
+     - `poll_interval`: seconds between two checks of the model registry for a newly pushed model
+     - `use_flat_model`: serve memory mapped flat forest copy of the model (shared page cache between worker processes) when available,
+       for batches of at most `flat_model_max_rows` rows, the sklearn model is only unpickled once a bigger batch needs it
+     - `n_jobs`: number of cores the served sklearn model predicts with, one by default as served batches are small and requests run concurrently
+     - `flat_model_max_rows`: largest batch predicted by the flat forest
+    -------------------------------------------------------------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    def __init__(self, model_registry: str = "saved_models", poll_interval: float = 5.0, use_flat_model: bool = False, n_jobs: Optional[int] = 1, flat_model_max_rows: int = FLAT_MODEL_MAX_ROWS) -> None:
+        try:
+            self.model_resolver = ModelResolver(model_registry=model_registry)
+
+            self.poll_interval = poll_interval
+
+            self.use_flat_model = use_flat_model
+
+            self.n_jobs = n_jobs
+
+            self.flat_model_max_rows = flat_model_max_rows
+
+            # (model directory path, transformer, sklearn model or `None` until needed, flat model or `None`) swapped as one reference
+            # so readers never see a mixed pair
+            self._loaded = None
+
+            # Serializes reloads between the watcher thread and explicit reload calls
+            self._reload_lock = threading.Lock()
+
+            self._stop_event = threading.Event()
+
+            self._watcher = None
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    @property
+    def model_dir_path(self) -> Optional[str]:
+        """
+        Returns directory path of the currently served model, `None` if nothing is loaded
+        """
+        loaded = self._loaded
+        return None if loaded is None else loaded[0]
+
+    def load_latest(self) -> bool:
+        """
+        Loads latest transformer and model from model registry if they differ from the served ones
+        --------------------------------------------------------------------------------------------
+        input:
+        - `None`
+        --------------------------------------------------------------------------------------------
+        return: `True` if a new model was swapped in else `False`
+        """
+
+        try:
+            latest_dir_path = self.model_resolver.get_latest_dir_path()
+
+            # If no model in the registry keep serving whatever is loaded
+            if latest_dir_path is None:
+                logging.info(f"No model found in model registry to serve")
+                return False
+
+            with self._reload_lock:
+                if latest_dir_path == self.model_dir_path:
+                    return False
+
+                logging.info(f"Loading transformer, model from: {latest_dir_path} for serving")
+                transformer = utils.load_object(file_path=os.path.join(latest_dir_path, self.model_resolver.transformer_dir_name, TRANSFORMER_OBJECT_FILE_NAME))
+
+                model, flat_model = None, None
+                flat_model_path = os.path.join(latest_dir_path, self.model_resolver.model_dir_name, FLAT_MODEL_FILE_NAME)
+                if self.use_flat_model and os.path.exists(flat_model_path):
+                    flat_model = FlatForest.load(file_path=flat_model_path)
+                else:
+                    model = self.model_resolver.load_model(dir_path=latest_dir_path, n_jobs=self.n_jobs)
+
+                # Atomic swap of served objects
+                self._loaded = (latest_dir_path, transformer, model, flat_model)
+
+            logging.info(f"Serving model from: {latest_dir_path}")
+            return True
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def get_model(self, rows: Optional[int] = None) -> Tuple[object, object]:
+        """
+        Returns currently served transformer and model without touching disk
+        ---------------------------------------------------------------------------------------------------------------
+        input:
+        - `rows`: number of rows to predict, flat forest is returned for at most `flat_model_max_rows` rows when loaded,
+          `None` (unknown or streamed batch) always returns the sklearn model
+        ---------------------------------------------------------------------------------------------------------------
+        return: (`transformer`, `model`)
+        """
+
+        try:
+            loaded = self._loaded
+
+            if loaded is None:
+                logging.info(f"Model is not available!")
+                raise Exception(f"Model is not available!")
+
+            if loaded[3] is not None and rows is not None and rows <= self.flat_model_max_rows:
+                return loaded[1], loaded[3]
+
+            if loaded[2] is None:
+                return loaded[1], self._load_sklearn_model(dir_path=loaded[0])
+
+            return loaded[1], loaded[2]
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def _load_sklearn_model(self, dir_path: str) -> object:
+        """
+        Unpickles sklearn model of served model directory on first batch too big for the flat forest, every worker process
+        pays for its private copy only once it serves such a batch
+        """
+        with self._reload_lock:
+            loaded = self._loaded
+
+            # Loaded by a concurrent call or swapped for a newer model meanwhile
+            if loaded[0] == dir_path and loaded[2] is not None:
+                return loaded[2]
+
+            logging.info(f"Loading sklearn model from: {dir_path} for a batch bigger than {self.flat_model_max_rows} rows")
+            model = self.model_resolver.load_model(dir_path=dir_path, n_jobs=self.n_jobs)
+
+            if loaded[0] == dir_path:
+                self._loaded = (loaded[0], loaded[1], model, loaded[3])
+
+            return model
+
+    def _watch(self) -> None:
+        """
+        Polls model registry until stopped, swapping in newly pushed models
+        """
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.load_latest()
+            except Exception as e:
+                # A push may still be in progress, keep serving current model and retry on next poll
+                logging.info(f"Model reload failed, serving previous model: {e}")
+
+    def start(self) -> None:
+        """
+        Warm loads the latest model and starts the registry watcher thread
+        ---------------------------------------------------------------------
+        input:
+        - `None`
+        ---------------------------------------------------------------------
+        return: `None`
+        """
+
+        try:
+            try:
+                self.load_latest()
+            except Exception as e:
+                logging.info(f"Warm load of model failed: {e}")
+
+            if self._watcher is None:
+                self._stop_event.clear()
+                self._watcher = threading.Thread(target=self._watch, name="model-server-watcher", daemon=True)
+                self._watcher.start()
+
+        except Exception as e:
+            raise RULException(e, sys)
+
+    def stop(self) -> None:
+        """
+        Stops the registry watcher thread
+        """
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
\ No newline at end of file
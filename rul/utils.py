@@ -3,47 +3,197 @@
 
 import os
 import sys
+import shutil
+import hashlib
+import itertools
+import operator
+from typing import List, Optional, Tuple
 import yaml
 import dill
 import numpy as np
 import pandas as pd
-from rul.config import mongo_client
+from rul import config
 from rul.logger import logging
 from rul.exception import RULException
 
 
-def get_collection_as_dataframe(database_name:str, collection_name:str)->pd.DataFrame:
+def get_collection_as_dataframe(database_name:str, collection_name:str, unit_number_range: Optional[Tuple[float, float]] = None, query: Optional[dict] = None, exclude_fields: Optional[List[str]] = None, batch_size: int = 50000, client: Optional[object] = None)->pd.DataFrame:
     """
     Collects a MongoDB database collection and returns a dataframe of it
-    ---------------------------------------------------------------------
+    - `_id` and `exclude_fields` are projected away on server side and documents are copied batch by batch into one preallocated float buffer
+    - Columns are the union of fields of all documents, a field first seen in a later batch adds a column which is NaN for earlier rows
+    ---------------------------------------------------------------------------------------------------------------------
     input:
     - `database_name`: Name of the database
     - `collection_name`: Name of the collection of the database
-    ----------------------------------------------------------------------
+    - `unit_number_range`: (low, high) inclusive range of `unit_number` to export, `None` exports all units
+    - `query`: additional MongoDB filter documents must match, `None` exports all documents
+    - `exclude_fields`: non feature fields not to export, e.g. string tags which would become NaN columns
+    - `batch_size`: Number of documents fetched per round trip and converted at once
+    - `client`: MongoDB client (or compatible stand in such as mongomock), `None` uses client of `rul.config`
+    ----------------------------------------------------------------------------------------------------------------------
     return: Pandas Dataframe of the collection of the database
     """
 
     try:
         # Reading data from database
         logging.info(f"Converting collection: {collection_name} from MongoDB : {database_name} into Data Frame")
-        df = pd.DataFrame(list(mongo_client[database_name][collection_name].find()))
+        collection = (config.get_mongo_client() if client is None else client)[database_name][collection_name]
 
-        logging.info(f"Dataframe shape: {df.shape}")
+        query = dict() if query is None else query
+        if unit_number_range is not None:
+            logging.info(f"Exporting unit_number range: {unit_number_range}")
+            query = {"$and": [query, {"unit_number": {"$gte": unit_number_range[0], "$lte": unit_number_range[1]}}]}
 
-        # Dropping the default id column if any
-        if "_id" in df.columns:
-            logging.info(f"Dropping column: _id")
-            df = df.drop("_id", axis=1)
+        # Preallocating buffer for the expected number of documents, grown if more arrive while exporting
+        capacity = max(collection.count_documents(query), 1)
+        projection = {field: False for field in ["_id"] + ([] if exclude_fields is None else list(exclude_fields))}
+        cursor = collection.find(query, projection=projection, batch_size=batch_size)
+
+        columns, buffer, size = [], np.empty((capacity, 0), dtype="float64"), 0
+        while True:
+            documents = list(itertools.islice(cursor, batch_size))
+            if len(documents) == 0:
+                break
+
+            # Fields not seen in earlier batches extend the buffer, in order of first appearance
+            new_columns = _new_fields(documents=documents, columns=columns)
+            if len(new_columns) > 0:
+                logging.info(f"Adding columns: {new_columns}")
+                columns = columns + new_columns
+                buffer = np.hstack([buffer, np.full((len(buffer), len(new_columns)), np.nan)])
+
+            batch = _documents_to_array(documents=documents, columns=columns)
+
+            if size + len(batch) > len(buffer):
+                buffer = np.concatenate([buffer, np.empty((max(size + len(batch), 2 * len(buffer)) - len(buffer), len(columns)), dtype="float64")])
+
+            buffer[size:size + len(batch)] = batch
+            size += len(batch)
+
+        df = pd.DataFrame(buffer[:size], columns=columns)
 
-        
         logging.info(f"Dataframe shape: {df.shape}")
 
         return df
     
     except Exception as e:
         raise RULException(e, sys)
+
+
+def get_collection_max_value(database_name: str, collection_name: str, field: str, query: Optional[dict] = None, client: Optional[object] = None) -> object:
+    """
+    Returns largest value of a field over documents matching query, served by an index on the field
+    ----------------------------------------------------------------------------------------------------------------
+    input:
+    - `database_name`: Name of the database
+    - `collection_name`: Name of the collection of the database
+    - `field`: field to take the largest value of
+    - `query`: MongoDB filter documents must match, `None` means all documents
+    - `client`: MongoDB client (or compatible stand in such as mongomock), `None` uses client of `rul.config`
+    ----------------------------------------------------------------------------------------------------------------
+    return: largest value, `None` if no document has the field
+    """
+
+    try:
+        collection = (config.get_mongo_client() if client is None else client)[database_name][collection_name]
+
+        query = dict() if query is None else query
+        documents = list(collection.find({"$and": [query, {field: {"$exists": True}}]}, projection={field: True}).sort(field, -1).limit(1))
+
+        return documents[0][field] if len(documents) > 0 else None
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def stamp_new_documents(database_name: str, collection_name: str, field: str, value: object, query: Optional[dict] = None, client: Optional[object] = None) -> int:
+    """
+    Sets a field on documents matching query which don't have it yet, e.g. number of the ingestion run that took them
+    - Stamp is written by the server, so documents committed late by any writer are stamped by the next call whatever their `_id`
+    - Index on equality fields of query and the field is created on first call
+    ----------------------------------------------------------------------------------------------------------------------------
+    input:
+    - `database_name`: Name of the database
+    - `collection_name`: Name of the collection of the database
+    - `field`: field to set
+    - `value`: value to set it to
+    - `query`: MongoDB equality filter documents must match, `None` means all documents
+    - `client`: MongoDB client (or compatible stand in such as mongomock), `None` uses client of `rul.config`
+    ----------------------------------------------------------------------------------------------------------------------------
+    return: number of stamped documents
+    """
+
+    try:
+        collection = (config.get_mongo_client() if client is None else client)[database_name][collection_name]
+
+        query = dict() if query is None else query
+        collection.create_index([(key, 1) for key in query] + [(field, 1)])
+
+        return collection.update_many({"$and": [query, {field: {"$exists": False}}]}, {"$set": {field: value}}).modified_count
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def _new_fields(documents: List[dict], columns: List[str]) -> List[str]:
+    """
+    Returns fields of a batch of documents missing from `columns`, in order of first appearance
+    """
+    known_columns = set(columns)
+    if set().union(*documents) <= known_columns:
+        return []
+
+    return list(dict.fromkeys(field for document in documents for field in document if field not in known_columns))
+
+
+def _documents_to_array(documents: List[dict], columns: List[str]) -> np.array:
+    """
+    Converts a batch of documents to float array ordered as `columns`, non numeric values (e.g. "na") and missing fields become NaN
+    """
+    if len(columns) == 0:
+        return np.empty((len(documents), 0), dtype="float64")
+
+    get_values = operator.itemgetter(*columns)
+
+    try:
+        rows = [get_values(document) for document in documents]
+    except KeyError:
+        rows = [tuple(document.get(column) for column in columns) for document in documents]
+
+    try:
+        return np.array(rows, dtype="float64").reshape(len(documents), len(columns))
+    except (TypeError, ValueError):
+        return pd.DataFrame(rows, columns=columns).apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
     
 
+def unit_split_mask(unit_numbers: np.array, test_size: float, seed: int = 42) -> np.array:
+    """
+    Assigns whole units to test set by a seeded hash of unit number, so every cycle of a unit lands in the same set
+    - Decision of a row depends only on its unit, so the split is deterministic and can be applied chunk by chunk
+    -------------------------------------------------------------------------------------------------------------------
+    input:
+    - `unit_numbers`: unit number of every row
+    - `test_size`: expected fraction of units in test set
+    - `seed`: seed mixed into the hash, another seed gives another split
+    -------------------------------------------------------------------------------------------------------------------
+    return: boolean `np.array`, `True` for rows of test units
+    """
+
+    try:
+        # splitmix64 finalizer of unit number bits, units equal as int or float hash alike
+        x = np.asarray(unit_numbers, dtype="float64").view("uint64") + np.uint64((0x9E3779B97F4A7C15 * (seed + 1)) % 2**64)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+
+        # Top 53 bits as uniform fraction in [0, 1)
+        return (x >> np.uint64(11)) / 2.0**53 < test_size
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
 def convert_columns_float(df: pd.DataFrame, exclude_columns: list) -> pd.DataFrame:
     """
     Converts columns of given data frame into float
@@ -88,6 +238,43 @@ def write_yaml_file(file_path: str, data: dict) -> None:
         raise RULException(e, sys)
 
 
+def read_yaml_file(file_path: str) -> dict:
+    """
+    Reads yaml file as dictionary
+    ----------------------------------------------------
+    input:
+    - `file_path`: yaml file to read
+    -----------------------------------------------------
+    return: `dict`
+    """
+
+    try:
+        with open(file_path, "r") as file:
+            return yaml.safe_load(file)
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def file_checksum(file_path: str) -> str:
+    """
+    Computes sha256 checksum of a file reading it in blocks
+    ----------------------------------------------------
+    input:
+    - `file_path`: file to checksum
+    -----------------------------------------------------
+    return: hex digest
+    """
+
+    try:
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+    except Exception as e:
+        raise RULException(e, sys)
+
+
 def save_object(file_path: str, obj: object) -> None:
     """
     Save given object to specified location
@@ -136,6 +323,30 @@ def load_object(file_path: str) -> object:
         raise RULException(e, sys)
 
 
+def link_or_copy_file(src_file_path: str, dst_file_path: str) -> None:
+    """
+    Hardlinks a file to destination, falling back to a copy when linking is not possible (e.g. across file systems)
+    -----------------------------------------------------------------------------------------------------------------
+    input:
+    - `src_file_path`: existing file
+    - `dst_file_path`: path to create, must not exist
+    -----------------------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    try:
+        os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
+
+        try:
+            os.link(src_file_path, dst_file_path)
+        except OSError:
+            logging.info(f"Hardlink not possible, copying: {src_file_path}")
+            shutil.copy2(src_file_path, dst_file_path)
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
 def save_numpy_array_data(file_path: str, array: np.array) -> None:
     """
     Save numpy array to specified location
@@ -181,5 +392,118 @@ def load_numpy_array_data(file_path: str) -> np.array:
         with open(file_path, "rb") as array_file:
             return np.load(array_file)
     
+    except Exception as e:
+        raise RULException(e, sys)
+
+def write_dataframe(df: pd.DataFrame, file_path: str, float32_columns: Optional[List[str]] = None) -> None:
+    """
+    Writes dataframe in format given by file extension: `.csv`, `.parquet` or `.feather` (Arrow IPC)
+    -------------------------------------------------------------------------------------------------
+    input:
+    - `df`: dataframe to write
+    - `file_path`: output file path
+    - `float32_columns`: columns stored as float32 in columnar formats, CSV is written as is
+    -------------------------------------------------------------------------------------------------
+    return: `None`
+    """
+
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        extension = os.path.splitext(file_path)[1]
+
+        if extension == ".csv":
+            df.to_csv(path_or_buf=file_path, index=False, header=True)
+            return
+
+        if float32_columns:
+            df = df.astype({column: "float32" for column in float32_columns})
+
+        if extension == ".parquet":
+            df.to_parquet(file_path, index=False)
+        elif extension == ".feather":
+            df.reset_index(drop=True).to_feather(file_path)
+        else:
+            raise Exception(f"Unsupported dataframe file format: {file_path}")
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def read_dataframe(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads dataframe in format given by file extension: `.csv`, `.parquet` or `.feather` (Arrow IPC)
+    -------------------------------------------------------------------------------------------------
+    input:
+    - `file_path`: file to read
+    - `columns`: columns to read, `None` reads all columns (columnar formats skip the others on disk)
+    -------------------------------------------------------------------------------------------------
+    return: `pd.DataFrame`
+    """
+
+    try:
+        extension = os.path.splitext(file_path)[1]
+
+        if extension == ".csv":
+            return pd.read_csv(file_path, usecols=columns)[columns] if columns is not None else pd.read_csv(file_path)
+        elif extension == ".parquet":
+            return pd.read_parquet(file_path, columns=columns)
+        elif extension == ".feather":
+            return pd.read_feather(file_path, columns=columns)
+        else:
+            raise Exception(f"Unsupported dataframe file format: {file_path}")
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def read_dataframe_columns(file_path: str) -> List[str]:
+    """
+    Reads column names of a dataframe file without reading its rows
+    -------------------------------------------------------------------------------------------------
+    input:
+    - `file_path`: `.csv`, `.parquet` or `.feather` file
+    -------------------------------------------------------------------------------------------------
+    return: `list` of column names
+    """
+
+    try:
+        extension = os.path.splitext(file_path)[1]
+
+        if extension == ".csv":
+            return list(pd.read_csv(file_path, nrows=0).columns)
+        elif extension == ".parquet":
+            import pyarrow.parquet
+            return pyarrow.parquet.read_schema(file_path).names
+        elif extension == ".feather":
+            import pyarrow.ipc
+            with pyarrow.ipc.open_file(file_path) as reader:
+                return reader.schema.names
+        else:
+            raise Exception(f"Unsupported dataframe file format: {file_path}")
+
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def inverse_transform_target(transformer: object, y: np.array) -> np.array:
+    """
+    Inverse transforms only the target column (last column scaled by transformer) without touching input features
+    ---------------------------------------------------------------------------------------------------------------
+    input:
+    - `transformer`: fitted transformer pipeline whose last step is the min max scaler, or `FusedTransformer`
+    - `y`: scaled target array
+    ---------------------------------------------------------------------------------------------------------------
+    return: `np.array` of target in original scale
+    """
+
+    try:
+        # Min max scaler is the last step of transformation pipeline (fused transformer holds its vectors itself),
+        # target is the last input column, missing indicator columns may follow it
+        scaler = transformer.steps[-1][1] if hasattr(transformer, "steps") else transformer
+        target_index = transformer.n_features_in_ - 1
+
+        return (np.asarray(y, dtype="float") - scaler.min_[target_index]) / scaler.scale_[target_index]
+
     except Exception as e:
         raise RULException(e, sys)
\ No newline at end of file
@@ -0,0 +1,61 @@
+"Tests of model engine selection of Benchmark Evaluation Pipeline"
+
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from rul import utils
+from rul.config import INPUT_FEATURE_COLUMNS, TARGET_COLUMN
+from rul.entity.config_entity import TRANSFORMER_OBJECT_FILE_NAME, MODEL_FILE_NAME, FLAT_MODEL_FILE_NAME
+from rul.components.data_transformation import DataTransformation
+from rul.forest import FlatForest
+from rul.predictor import ModelResolver, FLAT_MODEL_MAX_ROWS
+from rul.pipeline import benchmark_evaluation
+
+
+@pytest.fixture
+def model_dir_path(tmp_path) -> str:
+    rng = np.random.default_rng(0)
+    train_df = pd.DataFrame(rng.normal(size=(300, len(INPUT_FEATURE_COLUMNS) + 1)), columns=INPUT_FEATURE_COLUMNS + [TARGET_COLUMN])
+
+    transformer = DataTransformation.get_data_transformer_object().fit(train_df)
+    train_arr = transformer.transform(train_df)
+    model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(train_arr[:, :-1], train_arr[:, -1])
+
+    model_dir_path = os.path.join(tmp_path, "saved_models", "0")
+    utils.save_object(file_path=os.path.join(model_dir_path, "transformer", TRANSFORMER_OBJECT_FILE_NAME), obj=transformer)
+    utils.save_object(file_path=os.path.join(model_dir_path, "model", MODEL_FILE_NAME), obj=model)
+    FlatForest.from_estimator(model=model).save(file_path=os.path.join(model_dir_path, "model", FLAT_MODEL_FILE_NAME))
+
+    return model_dir_path
+
+
+def write_subset(data_dir: str, fd: str, units: int):
+    rng = np.random.default_rng(units)
+    rows = [[unit, cycle] + rng.normal(size=24).tolist() for unit in range(1, units + 1) for cycle in range(1, 4)]
+
+    os.makedirs(data_dir, exist_ok=True)
+    np.savetxt(os.path.join(data_dir, f"test_{fd}.txt"), rows, fmt="%g")
+    np.savetxt(os.path.join(data_dir, f"RUL_{fd}.txt"), rng.integers(1, 150, size=units), fmt="%d")
+
+
+@pytest.mark.parametrize("units, flat_model_expected", [(FLAT_MODEL_MAX_ROWS, True), (FLAT_MODEL_MAX_ROWS + 1, False)])
+def test_flat_model_scores_small_subsets_only(tmp_path, monkeypatch, model_dir_path, units, flat_model_expected):
+    data_dir = os.path.join(tmp_path, "CMaps")
+    write_subset(data_dir, "FD001", units=units)
+
+    models = []
+    load_model = ModelResolver.load_model
+    def recording_load_model(self, **kwargs):
+        models.append(load_model(self, **kwargs))
+        return models[-1]
+    monkeypatch.setattr(ModelResolver, "load_model", recording_load_model)
+
+    result = benchmark_evaluation.evaluate_subset(data_dir=data_dir, fd="FD001", model_dir_path=model_dir_path, use_flat_model=True)
+
+    assert result["engines"] == units
+    assert isinstance(models[0], FlatForest) == flat_model_expected
+    if not flat_model_expected:
+        assert models[0].n_jobs == 1
\ No newline at end of file
@@ -0,0 +1,44 @@
+"Tests of CMAPSS reader of rul.cmapss"
+
+
+import os
+import numpy as np
+import pytest
+from rul import cmapss
+from rul.exception import RULException
+
+
+def write_files(data_dir: str, units: list, true_rul: list) -> None:
+    rows = [[unit, cycle] + [0.0] * 24 for unit in units for cycle in range(1, unit + 3)]
+    np.savetxt(os.path.join(data_dir, "test_FD001.txt"), rows, fmt="%g")
+    np.savetxt(os.path.join(data_dir, "RUL_FD001.txt"), np.array(true_rul)[:, None], fmt="%g")
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_true_rul_joined_by_unit_number(tmp_path, dtype):
+    write_files(tmp_path, units=[1, 2, 3], true_rul=[112, 98, 69])
+
+    df = cmapss.read_test_with_truth(str(tmp_path), "FD001", dtype=dtype, cache=False)
+
+    last_cycles_df = df.loc[df.groupby("unit_number")["time_cycles"].idxmax()]
+    assert last_cycles_df["RUL"].tolist() == [112, 98, 69]
+
+    # Earlier cycles count up from the true RUL of the last cycle
+    assert df.loc[df["unit_number"] == 2, "RUL"].tolist() == [101, 100, 99, 98]
+    assert df["RUL"].dtype == dtype
+
+
+def test_units_missing_from_test_file_keep_their_own_rul(tmp_path):
+    write_files(tmp_path, units=[1, 3], true_rul=[112, 98, 69])
+
+    df = cmapss.read_test_with_truth(str(tmp_path), "FD001", cache=False)
+
+    assert df.loc[df["unit_number"] == 3, "RUL"].iloc[-1] == 69
+
+
+@pytest.mark.parametrize("units", [[1, 2, 4], [0, 1]])
+def test_unit_without_true_rul_raises(tmp_path, units):
+    write_files(tmp_path, units=units, true_rul=[112, 98, 69])
+
+    with pytest.raises(RULException, match="no true RUL"):
+        cmapss.read_test_with_truth(str(tmp_path), "FD001", cache=False)
\ No newline at end of file
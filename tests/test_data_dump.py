@@ -0,0 +1,75 @@
+"Tests of data_dump script against mongomock"
+
+
+import os
+import numpy as np
+import pytest
+from bson import ObjectId
+import data_dump
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def write_cmapss_file(data_dir: str, file_name: str, units: int = 3, cycles: int = 4) -> None:
+    rows = [[unit, cycle] + [0.0, 0.0, 100.0] + [unit + cycle / 10 + i for i in range(21)] for unit in range(1, units + 1) for cycle in range(1, cycles + 1)]
+    np.savetxt(os.path.join(data_dir, file_name), rows, fmt="%g")
+
+
+@pytest.fixture
+def data_dir(tmp_path) -> str:
+    write_cmapss_file(tmp_path, "train_FD001.txt")
+    write_cmapss_file(tmp_path, "train_FD003.txt", units=2)
+    return str(tmp_path)
+
+
+def get_collection(client):
+    return client[data_dump.DATABASE_NAME][data_dump.COLLECTION_NAME]
+
+
+def test_dump_tags_every_document(data_dir):
+    client = mongomock.MongoClient()
+    inserted = data_dump.dump_data_files(client=client, data_dir=data_dir, batch_size=5, workers=2)
+
+    assert inserted == {"train_FD001.txt": 12, "train_FD003.txt": 8}
+    assert get_collection(client).count_documents({"dataset": "train", "fd": "FD003"}) == 8
+
+    # Rerun skips complete files
+    assert data_dump.dump_data_files(client=client, data_dir=data_dir) == {"train_FD001.txt": 0, "train_FD003.txt": 0}
+    assert get_collection(client).count_documents({}) == 20
+
+
+def test_legacy_untagged_dump_is_tagged_not_duplicated(data_dir):
+    client = mongomock.MongoClient()
+
+    # Older dump: train_FD001 rows without tags and with generated ids
+    legacy_documents = [{"unit_number": unit, "time_cycles": cycle} for unit in range(1, 4) for cycle in range(1, 5)]
+    get_collection(client).insert_many(legacy_documents)
+
+    inserted = data_dump.dump_data_files(client=client, data_dir=data_dir)
+
+    assert inserted == {"train_FD001.txt": 0, "train_FD003.txt": 8}
+    assert get_collection(client).count_documents({}) == 20
+    assert get_collection(client).count_documents({"dataset": {"$exists": False}}) == 0
+    assert get_collection(client).count_documents({"dataset": "train", "fd": "FD001"}) == 12
+
+def test_interrupted_dump_resumed_without_duplicates(data_dir):
+    client = mongomock.MongoClient()
+    data_dump.dump_data_files(client=client, data_dir=data_dir)
+
+    # Interrupted run: some documents of a file are missing
+    get_collection(client).delete_many({"fd": "FD001", "unit_number": {"$gte": 2}})
+
+    inserted = data_dump.dump_data_files(client=client, data_dir=data_dir, batch_size=3, workers=2)
+
+    assert inserted == {"train_FD001.txt": 8, "train_FD003.txt": 0}
+    assert get_collection(client).count_documents({}) == 20
+
+
+def test_ids_left_to_server_and_old_index_replaced(data_dir):
+    client = mongomock.MongoClient()
+    get_collection(client).create_index([("dataset", 1), ("fd", 1), ("unit_number", 1), ("time_cycles", 1)])
+
+    data_dump.dump_data_files(client=client, data_dir=data_dir)
+
+    assert all(isinstance(document["_id"], ObjectId) for document in get_collection(client).find())
+    assert [index.get("unique", False) for name, index in get_collection(client).index_information().items() if name != "_id_"] == [True]
\ No newline at end of file
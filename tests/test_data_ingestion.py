@@ -0,0 +1,167 @@
+"Tests of incremental Data Ingestion against mongomock"
+
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from bson import ObjectId
+import data_dump
+from rul import config
+from rul.entity import config_entity
+from rul.components.data_ingestion import DataIngestion
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def make_documents(units: range, cycles: range) -> list:
+    return [{"dataset": "train", "fd": "FD001", "unit_number": unit, "time_cycles": cycle, **{f"setting_{i}": 0.0 for i in range(1, 4)},
+             **{f"s_{i}": unit * 100.0 + cycle + i / 100 for i in range(1, 22)}}
+            for unit in units for cycle in cycles]
+
+
+@pytest.fixture
+def collection(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(config, "_mongo_client", client)
+    return client["rul"]["rul_collect"]
+
+
+def ingest() -> tuple:
+    data_ingestion_config = config_entity.DataIngestionConfig(training_pipeline_config=config_entity.TrainingPipelineConfig())
+    data_ingestion_config.incremental = True
+    return data_ingestion_config, DataIngestion(data_ingestion_config).initiate_data_ingestion()
+
+
+def test_empty_collection_ingests_nothing(collection):
+    _, artifact = ingest()
+
+    assert artifact.new_rows == 0
+    assert artifact.changed_units == []
+
+
+def test_other_subsets_and_untagged_documents_not_ingested(collection):
+    collection.insert_many([{**document, "fd": "FD003"} for document in make_documents(range(1, 5), range(1, 4))])
+    collection.insert_many([{key: value for key, value in document.items() if key not in ("dataset", "fd")} for document in make_documents(range(1, 5), range(1, 4))])
+
+    _, artifact = ingest()
+
+    assert artifact.new_rows == 0
+
+
+def test_new_cycles_appended_to_persistent_splits(collection):
+    collection.insert_many(make_documents(range(1, 21), range(1, 11)))
+    _, first_artifact = ingest()
+
+    assert first_artifact.new_rows == 200
+    first_train_df, first_test_df = pd.read_csv(first_artifact.train_file_path), pd.read_csv(first_artifact.test_file_path)
+
+    collection.insert_many(make_documents([3, 5], range(11, 13)))
+    data_ingestion_config, artifact = ingest()
+
+    assert artifact.new_rows == 4
+    assert artifact.changed_units == [3.0, 5.0]
+
+    # Rows of earlier runs are kept as they were, new cycles follow the split of their unit
+    train_df, test_df = pd.read_csv(artifact.train_file_path), pd.read_csv(artifact.test_file_path)
+    pd.testing.assert_frame_equal(train_df.iloc[:len(first_train_df)], first_train_df)
+    pd.testing.assert_frame_equal(test_df.iloc[:len(first_test_df)], first_test_df)
+    assert len(train_df) + len(test_df) == 204
+    assert set(train_df["unit_number"]).isdisjoint(test_df["unit_number"])
+
+    feature_store_df = pd.read_csv(data_ingestion_config.persistent_feature_store_file_path)
+    assert len(feature_store_df) == 204
+    assert not feature_store_df.duplicated(["unit_number", "time_cycles"]).any()
+
+    _, artifact = ingest()
+    assert artifact.new_rows == 0
+
+
+def test_unrecorded_append_is_rolled_back(collection):
+    collection.insert_many(make_documents(range(1, 21), range(1, 6)))
+    data_ingestion_config, _ = ingest()
+
+    # Append of a run failed before its high water mark was written
+    with open(data_ingestion_config.persistent_train_file_path, "a") as file:
+        file.write("1,99" + ",0.0" * 24 + "\n")
+
+    collection.insert_many(make_documents([1], range(6, 7)))
+    _, artifact = ingest()
+
+    train_df, test_df = pd.read_csv(artifact.train_file_path), pd.read_csv(artifact.test_file_path)
+    assert artifact.new_rows == 1
+    assert len(train_df) + len(test_df) == 101
+    assert 99 not in set(train_df["time_cycles"])
+
+
+def test_old_high_water_mark_rebuilds_stores(collection):
+    collection.insert_many(make_documents(range(1, 21), range(1, 4)))
+    data_ingestion_config, _ = ingest()
+
+    with open(data_ingestion_config.high_water_mark_file_path, "w") as file:
+        file.write("feature_store_size: 10\nmax_time_cycles: {}\n")
+
+    _, artifact = ingest()
+
+    assert artifact.new_rows == 60
+    assert len(pd.read_csv(data_ingestion_config.persistent_feature_store_file_path)) == 60
+    assert os.path.exists(data_ingestion_config.high_water_mark_file_path)
+
+    # Stamps of the lost stores are below the next run, nothing is pulled twice
+    collection.insert_many(make_documents([1], range(4, 5)))
+    _, artifact = ingest()
+
+    assert artifact.new_rows == 1
+    assert len(pd.read_csv(data_ingestion_config.persistent_feature_store_file_path)) == 61
+
+
+def test_late_committed_documents_not_skipped(collection):
+    documents = make_documents(range(1, 21), range(1, 4))
+
+    # Ids are taken by writers before their inserts commit, the second writer's smaller ids commit after the first run
+    ids = [ObjectId() for _ in documents]
+    collection.insert_many([{**document, "_id": _id} for document, _id in zip(documents[30:], ids[30:])])
+    ingest()
+
+    collection.insert_many([{**document, "_id": _id} for document, _id in zip(documents[:30], ids[:30])])
+    data_ingestion_config, artifact = ingest()
+
+    assert artifact.new_rows == 30
+    assert len(pd.read_csv(data_ingestion_config.persistent_feature_store_file_path)) == 60
+
+
+def test_documents_stamped_by_failed_run_pulled_again(collection):
+    collection.insert_many(make_documents(range(1, 21), range(1, 4)))
+    data_ingestion_config, _ = ingest()
+
+    # Run stamped its documents then failed before storing them
+    collection.insert_many([{**document, "ingest_run": 2} for document in make_documents([2], range(4, 6))])
+    collection.insert_many(make_documents([2], range(6, 7)))
+
+    _, artifact = ingest()
+
+    assert artifact.new_rows == 3
+    assert sorted(pd.read_csv(data_ingestion_config.persistent_feature_store_file_path).query("unit_number == 2")["time_cycles"]) == [1, 2, 3, 4, 5, 6]
+
+
+def test_dumped_then_inserted_documents_ingested(collection):
+    rows = [[unit, cycle] + [0.0, 0.0, 100.0] + [unit * 100.0 + cycle + i / 100 for i in range(1, 22)] for unit in range(1, 21) for cycle in range(1, 6)]
+    os.makedirs("CMaps")
+    np.savetxt(os.path.join("CMaps", "train_FD001.txt"), rows, fmt="%g")
+
+    data_dump.dump_data_files(client=config._mongo_client, data_dir="CMaps", batch_size=7, workers=3)
+    _, artifact = ingest()
+
+    assert artifact.new_rows == 100
+
+    # Producer insert after the dump, with a server generated id
+    collection.insert_many(make_documents([4, 7], range(6, 8)))
+    data_ingestion_config, artifact = ingest()
+
+    assert artifact.new_rows == 4
+    assert artifact.changed_units == [4.0, 7.0]
+
+    feature_store_df = pd.read_csv(data_ingestion_config.persistent_feature_store_file_path)
+    assert len(feature_store_df) == 104
+    assert not feature_store_df.duplicated(["unit_number", "time_cycles"]).any()
\ No newline at end of file
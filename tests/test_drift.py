@@ -0,0 +1,36 @@
+"Tests of drift engine of rul.drift"
+
+
+import numpy as np
+import pandas as pd
+from rul.drift import DriftEngine
+
+
+def make_base_df(rows: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+
+    # Few distinct levels, like CMAPSS sensors read with 2 to 4 decimals
+    return pd.DataFrame({
+        "s_2": np.round(rng.normal(642.5, 0.5, rows), 2),
+        "s_8": np.round(rng.normal(2388.06, 0.07, rows), 2),
+        "s_11": np.round(rng.normal(47.5, 0.27, rows), 2)
+    })
+
+
+def test_float32_copy_of_base_is_not_drifted():
+    base_df = make_base_df()
+    current_df = base_df.astype("float32")
+
+    drift_report = DriftEngine(base_df=base_df, dtype="float32").compare(current_df=current_df)["drift_report"]
+
+    assert all(report["same_distribution"] for report in drift_report.values())
+    assert all(report["statistic"] == 0.0 for report in drift_report.values())
+
+
+def test_shifted_current_is_drifted():
+    base_df = make_base_df()
+    current_df = (base_df + 0.5).astype("float32")
+
+    drift_report = DriftEngine(base_df=base_df, dtype="float32").compare(current_df=current_df)["drift_report"]
+
+    assert not any(report["same_distribution"] for report in drift_report.values())
\ No newline at end of file
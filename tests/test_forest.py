@@ -0,0 +1,83 @@
+"Tests of flat forest of rul.forest against the sklearn forest it is flattened from"
+
+
+import numpy as np
+import pytest
+from numpy.lib import recfunctions
+from sklearn.ensemble import RandomForestRegressor
+from rul.exception import RULException
+from rul.forest import FlatForest
+
+
+def fit_forest(missing: bool = False, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] * 3 + np.sin(X[:, 1] * 2) + rng.normal(scale=0.1, size=400)
+
+    if missing:
+        X[rng.random(X.shape) < 0.1] = np.nan
+
+    model = RandomForestRegressor(n_estimators=8, max_depth=6, random_state=seed, n_jobs=1).fit(X, y)
+    return model, X
+
+
+def test_predictions_match_on_random_inputs():
+    model, _ = fit_forest()
+    X = np.random.default_rng(1).normal(scale=2.0, size=(1000, 5))
+
+    np.testing.assert_allclose(FlatForest.from_estimator(model).predict(X), model.predict(X), rtol=0, atol=1e-12)
+
+
+def test_predictions_match_at_thresholds():
+    model, _ = fit_forest()
+    flat_model = FlatForest.from_estimator(model)
+
+    # Every feature value exactly at a split threshold of that feature, and its float32 neighbours
+    rng = np.random.default_rng(2)
+    is_split = flat_model.feature >= 0
+    X = rng.normal(size=(is_split.sum(), 5))
+    X[np.arange(len(X)), flat_model.feature[is_split]] = flat_model.threshold[is_split]
+    X = np.vstack([X, np.nextafter(X.astype(np.float32), np.inf), np.nextafter(X.astype(np.float32), -np.inf)])
+
+    np.testing.assert_allclose(flat_model.predict(X), model.predict(X), rtol=0, atol=1e-12)
+
+
+def test_small_chunks_match():
+    model, _ = fit_forest()
+    X = np.random.default_rng(3).normal(size=(50, 5))
+
+    np.testing.assert_allclose(FlatForest.from_estimator(model).predict(X, chunk_size=3), model.predict(X), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("missing_at_fit", [False, True])
+def test_missing_values_follow_sklearn_routing(missing_at_fit):
+    model, _ = fit_forest(missing=missing_at_fit)
+    X = np.random.default_rng(4).normal(size=(500, 5))
+    X[np.random.default_rng(5).random(X.shape) < 0.3] = np.nan
+
+    np.testing.assert_allclose(FlatForest.from_estimator(model).predict(X), model.predict(X), rtol=0, atol=1e-12)
+
+
+def test_flat_forest_without_missing_routing_rejects_nan(tmp_path):
+    model, _ = fit_forest()
+    nodes = recfunctions.drop_fields(FlatForest.from_estimator(model).nodes, "missing_go_to_left", usemask=False)
+    flat_model = FlatForest(nodes=nodes)
+
+    X = np.random.default_rng(6).normal(size=(10, 5))
+    np.testing.assert_allclose(flat_model.predict(X), model.predict(X), rtol=0, atol=1e-12)
+
+    X[3, 2] = np.nan
+    with pytest.raises(RULException, match="export it again"):
+        flat_model.predict(X)
+
+
+def test_saved_flat_forest_loads_memory_mapped(tmp_path):
+    model, _ = fit_forest()
+    file_path = str(tmp_path / "model.npy")
+    FlatForest.from_estimator(model).save(file_path=file_path)
+
+    flat_model = FlatForest.load(file_path=file_path)
+    X = np.random.default_rng(7).normal(size=(20, 5))
+
+    assert isinstance(flat_model.nodes, np.memmap)
+    np.testing.assert_allclose(flat_model.predict(X), model.predict(X), rtol=0, atol=1e-12)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"Tests of training job outcomes of rul.job_queue"
+
+
+import sys
+import pytest
+from rul import job_queue
+from rul.exception import RULException
+from rul.components.model_evaluation import MODEL_REJECTED_MESSAGE
+from rul.pipeline import training_pipeline
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return job_queue.JobQueue(job_dir=str(tmp_path), max_prediction_workers=1)
+
+
+def run_training_job(queue, monkeypatch, pipeline) -> dict:
+    monkeypatch.setattr(training_pipeline, "start_training_pipeline", pipeline)
+
+    job_id = queue._create_job(kind=job_queue.TRAINING_JOB)
+    job_queue._run_training_job(queue.job_table_path, job_id)
+
+    return queue.get_job(job_id)
+
+
+def raise_error(message: str):
+    try:
+        raise Exception(message)
+    except Exception as e:
+        raise RULException(e, sys)
+
+
+def test_workers_are_spawned(queue):
+    assert queue.training_executor._mp_context.get_start_method() == "spawn"
+    assert queue.prediction_executor._mp_context.get_start_method() == "spawn"
+
+
+def test_pushed_model_reported(queue, monkeypatch):
+    job = run_training_job(queue, monkeypatch, lambda progress_callback: training_pipeline.MODEL_PUSHED)
+
+    assert job["status"] == job_queue.SUCCEEDED
+    assert job["result"]["outcome"] == training_pipeline.MODEL_PUSHED
+
+
+def test_no_new_data_reported_as_skipped(queue, monkeypatch):
+    job = run_training_job(queue, monkeypatch, lambda progress_callback: training_pipeline.NO_NEW_DATA)
+
+    assert job["status"] == job_queue.SUCCEEDED
+    assert job["result"]["outcome"] == training_pipeline.NO_NEW_DATA
+    assert "skipped" in job["result"]["message"]
+
+
+def test_rejected_model_told_apart_from_failure(queue, monkeypatch):
+    job = run_training_job(queue, monkeypatch, lambda progress_callback: raise_error(f"{MODEL_REJECTED_MESSAGE} by change threshold 0.01: 0.5 vs 0.6"))
+
+    assert job["status"] == job_queue.SUCCEEDED
+    assert job["result"]["outcome"] == training_pipeline.MODEL_REJECTED
+
+
+def test_failure_keeps_its_error(queue, monkeypatch):
+    job = run_training_job(queue, monkeypatch, lambda progress_callback: raise_error("Connection refused"))
+
+    assert job["status"] == job_queue.FAILED
+    assert job["result"] is None
+    assert "Connection refused" in job["error"]
\ No newline at end of file
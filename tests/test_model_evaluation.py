@@ -0,0 +1,64 @@
+"Tests of RUL target of Model Evaluation component"
+
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from rul import utils
+from rul.config import INPUT_FEATURE_COLUMNS, TARGET_COLUMN
+from rul.entity import artifact_entity, config_entity
+from rul.components.data_transformation import DataTransformation
+from rul.components.model_evaluation import ModelEvaluation
+
+
+def make_df(units: int = 6, cycles: int = 200, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"unit_number": np.repeat(np.arange(1, units + 1), cycles), "time_cycles": np.tile(np.arange(1, cycles + 1), units)})
+    for i, column in enumerate(INPUT_FEATURE_COLUMNS):
+        df[column] = df["time_cycles"] * (i + 1) / 100 + rng.normal(size=len(df))
+    return df
+
+
+@pytest.mark.parametrize("max_rul", [None, 125])
+def test_test_set_rul_clipped_like_training(tmp_path, monkeypatch, max_rul):
+    monkeypatch.chdir(tmp_path)
+
+    test_file_path = os.path.join(tmp_path, "test.csv")
+    make_df(seed=1).to_csv(test_file_path, index=False)
+
+    # Transformer and model trained on RUL clipped the same way
+    train_df = DataTransformation.add_RUL_feature(make_df(), max_rul=max_rul)[INPUT_FEATURE_COLUMNS + [TARGET_COLUMN]]
+    transformer = DataTransformation.get_data_transformer_object().fit(train_df)
+    train_arr = transformer.transform(train_df)
+    model = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0).fit(train_arr[:, :-1], train_arr[:, -1])
+
+    transformer_path, model_path = os.path.join(tmp_path, "transformer.pkl"), os.path.join(tmp_path, "model.pkl")
+    utils.save_object(file_path=transformer_path, obj=transformer)
+    utils.save_object(file_path=model_path, obj=model)
+
+    training_pipeline_config = config_entity.TrainingPipelineConfig()
+    model_evaluation = ModelEvaluation(
+        model_evaluation_config=config_entity.ModelEvaluationConfig(training_pipeline_config=training_pipeline_config),
+        data_ingestion_artifact=artifact_entity.DataIngestionArtifact(feature_store_file_path=test_file_path, train_file_path=test_file_path,
+                                                                      test_file_path=test_file_path, new_rows=0, changed_units=[]),
+        data_transformation_artifact=artifact_entity.DataTransformationArtifact(transformer_object_path=transformer_path, transformed_train_path="",
+                                                                                transformed_test_path="", max_rul=max_rul),
+        model_trainer_artifact=artifact_entity.ModelTrainerArtifact(model_path=model_path, r2_train_score=0.0, r2_test_score=0.0, n_jobs=1,
+                                                                    fit_time=0.0, train_predict_time=0.0, test_predict_time=0.0, flat_model_path=None)
+    )
+
+    y_trues = []
+    get_model_report = model_evaluation.get_model_report
+    def recording_get_model_report(y_true, **kwargs):
+        y_trues.append(y_true)
+        return get_model_report(y_true=y_true, **kwargs)
+    monkeypatch.setattr(model_evaluation, "get_model_report", recording_get_model_report)
+
+    model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
+
+    assert y_trues[0].max() == (199 if max_rul is None else max_rul)
+
+    # Scored against the target the model was trained on, comparable to the training score
+    assert model_evaluation_artifact.current_model_score > 0.5
\ No newline at end of file
@@ -0,0 +1,52 @@
+"Tests of model engine selection of rul.predictor.ModelServer"
+
+
+import os
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from rul import utils
+from rul.entity.config_entity import TRANSFORMER_OBJECT_FILE_NAME, MODEL_FILE_NAME, FLAT_MODEL_FILE_NAME
+from rul.forest import FlatForest
+from rul.predictor import ModelServer
+
+
+@pytest.fixture
+def model_registry(tmp_path) -> str:
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(200, 4)), rng.normal(size=200)
+
+    model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+
+    model_dir_path = os.path.join(tmp_path, "saved_models", "0")
+    utils.save_object(file_path=os.path.join(model_dir_path, "transformer", TRANSFORMER_OBJECT_FILE_NAME), obj=StandardScaler().fit(X))
+    utils.save_object(file_path=os.path.join(model_dir_path, "model", MODEL_FILE_NAME), obj=model)
+    FlatForest.from_estimator(model=model).save(file_path=os.path.join(model_dir_path, "model", FLAT_MODEL_FILE_NAME))
+
+    return os.path.join(tmp_path, "saved_models")
+
+
+def test_flat_model_served_for_small_batches_only(model_registry):
+    model_server = ModelServer(model_registry=model_registry, use_flat_model=True, flat_model_max_rows=64)
+    model_server.load_latest()
+
+    assert isinstance(model_server.get_model(rows=1)[1], FlatForest)
+    assert isinstance(model_server.get_model(rows=64)[1], FlatForest)
+
+    # Sklearn model is only unpickled by the first bigger batch, then kept
+    assert model_server._loaded[2] is None
+
+    model = model_server.get_model(rows=65)[1]
+    assert isinstance(model, RandomForestRegressor)
+    assert model.n_jobs == 1
+    assert model_server.get_model()[1] is model
+
+
+def test_sklearn_model_served_without_flat_model(model_registry):
+    model_server = ModelServer(model_registry=model_registry)
+    model_server.load_latest()
+
+    model = model_server.get_model(rows=1)[1]
+    assert isinstance(model, RandomForestRegressor)
+    assert model.n_jobs == 1
\ No newline at end of file
@@ -0,0 +1,97 @@
+"Tests of FusedTransformer of rul.preprocessing against the sklearn pipeline it is fused from"
+
+
+import numpy as np
+import pandas as pd
+import pytest
+from rul.exception import RULException
+from rul.components.data_transformation import DataTransformation
+from rul.preprocessing import FusedTransformer
+
+
+COLUMNS = ["setting_1", "s_2", "s_3", "s_4", "RUL"]
+
+
+def make_df(rows: int = 300, missing: bool = False, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, len(COLUMNS))) * [0.002, 0.5, 6.0, 9.0, 60.0] + [0.0, 642.0, 1590.0, 1400.0, 100.0], columns=COLUMNS)
+
+    if missing:
+        df.loc[rng.random(rows) < 0.1, "s_3"] = np.nan
+        df.loc[rng.random(rows) < 0.05, "RUL"] = np.nan
+
+    return df
+
+
+def fit(df: pd.DataFrame) -> tuple:
+    pipeline = DataTransformation.get_data_transformer_object().fit(df)
+    return pipeline, FusedTransformer.from_pipeline(pipeline=pipeline)
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_transform_matches_pipeline(missing):
+    pipeline, fused = fit(make_df(missing=missing))
+    current_df = make_df(rows=120, missing=missing, seed=1)
+
+    expected = pipeline.transform(current_df)
+    transformed = fused.transform(current_df)
+
+    assert transformed.dtype == expected.dtype == np.float64
+    assert transformed.shape == expected.shape
+    assert np.array_equal(transformed, expected)
+
+    # Array input takes the same path as the columns checked dataframe
+    assert np.array_equal(fused.transform(current_df.to_numpy()), expected)
+
+
+def test_indicator_columns_only_for_columns_missing_at_fit():
+    pipeline, fused = fit(make_df(missing=True))
+
+    assert fused.transform(make_df(rows=10)).shape[1] == len(COLUMNS) + 2
+
+    # NaN in a column complete at fit time is imputed without an indicator column
+    current_df = make_df(rows=50, seed=2)
+    current_df.loc[::7, "s_2"] = np.nan
+    assert np.array_equal(fused.transform(current_df), pipeline.transform(current_df))
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_inverse_transform_matches_pipeline(missing):
+    pipeline, fused = fit(make_df(missing=missing))
+    transformed = pipeline.transform(make_df(rows=120, missing=missing, seed=1))
+
+    expected = pipeline.inverse_transform(transformed)
+    inversed = fused.inverse_transform(transformed)
+
+    assert inversed.shape == expected.shape == (120, len(COLUMNS))
+    assert np.array_equal(inversed, expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_inverse_transform_of_columns_matches_scaler(missing):
+    pipeline, fused = fit(make_df(missing=missing))
+    transformed = pipeline.transform(make_df(rows=120, missing=missing, seed=1))
+
+    # Scaler inverse of all output columns, before the imputer drops indicator columns
+    expected = pipeline.steps[-1][1].inverse_transform(transformed)
+
+    for columns in [[len(COLUMNS) - 1], [0, 2], list(range(transformed.shape[1]))]:
+        assert np.array_equal(fused.inverse_transform(transformed[:, columns], columns=columns), expected[:, columns])
+
+
+def test_mismatched_feature_names_raise():
+    pipeline, fused = fit(make_df())
+    reordered_df = make_df(rows=10)[COLUMNS[::-1]]
+
+    with pytest.raises(ValueError):
+        pipeline.transform(reordered_df)
+
+    with pytest.raises(RULException, match="don't match columns"):
+        fused.transform(reordered_df)
+
+
+def test_mismatched_feature_count_raises():
+    _, fused = fit(make_df())
+
+    with pytest.raises(RULException, match="features"):
+        fused.transform(make_df(rows=10).to_numpy()[:, :-1])
\ No newline at end of file
@@ -0,0 +1,99 @@
+"Tests of MongoDB collection export of rul.utils against mongomock"
+
+
+import numpy as np
+import pandas as pd
+import pytest
+from rul import utils
+
+mongomock = pytest.importorskip("mongomock")
+
+
+DATABASE_NAME = "rul"
+COLLECTION_NAME = "rul_collect"
+
+
+def make_client(documents: list) -> "mongomock.MongoClient":
+    client = mongomock.MongoClient()
+    if len(documents) > 0:
+        client[DATABASE_NAME][COLLECTION_NAME].insert_many([dict(document) for document in documents])
+    return client
+
+
+def make_documents(units: int = 5, cycles: int = 7) -> list:
+    return [{"unit_number": unit, "time_cycles": cycle, "s_2": unit * 100.0 + cycle, "s_3": float(cycle) / 3}
+            for unit in range(1, units + 1) for cycle in range(1, cycles + 1)]
+
+
+def export(client, **kwargs) -> pd.DataFrame:
+    return utils.get_collection_as_dataframe(database_name=DATABASE_NAME, collection_name=COLLECTION_NAME, client=client, **kwargs)
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 35, 1000])
+def test_batched_export_matches_documents(batch_size):
+    documents = make_documents()
+    df = export(make_client(documents), batch_size=batch_size)
+
+    expected = pd.DataFrame(documents).astype("float64")
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_unit_number_range_filter():
+    df = export(make_client(make_documents()), unit_number_range=(2, 3), batch_size=4)
+
+    assert sorted(df["unit_number"].unique().tolist()) == [2.0, 3.0]
+    assert len(df) == 2 * 7
+
+
+def test_query_and_range_filter_combined():
+    df = export(make_client(make_documents()), unit_number_range=(2, 4), query={"time_cycles": {"$gt": 5}})
+
+    assert sorted(df["unit_number"].unique().tolist()) == [2.0, 3.0, 4.0]
+    assert sorted(df["time_cycles"].unique().tolist()) == [6.0, 7.0]
+
+
+def test_buffer_grows_when_more_documents_arrive_than_counted(monkeypatch):
+    documents = make_documents()
+    client = make_client(documents)
+
+    # Documents inserted between count and read: preallocated buffer of one row has to grow
+    monkeypatch.setattr(type(client[DATABASE_NAME][COLLECTION_NAME]), "count_documents", lambda self, query: 1)
+    df = export(client, batch_size=3)
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame(documents).astype("float64"))
+
+
+def test_columns_are_union_of_document_fields():
+    documents = make_documents(units=2, cycles=3)
+    del documents[0]["s_3"]
+    documents[-1]["s_4"] = 4.5
+
+    df = export(make_client(documents), batch_size=2)
+
+    assert list(df.columns) == ["unit_number", "time_cycles", "s_2", "s_3", "s_4"]
+    assert np.isnan(df["s_3"].iloc[0]) and df["s_3"].iloc[1:].notna().all()
+    assert df["s_4"].iloc[-1] == 4.5 and df["s_4"].iloc[:-1].isna().all()
+
+
+def test_non_numeric_values_become_nan():
+    documents = make_documents(units=1, cycles=3)
+    documents[1]["s_2"] = "na"
+
+    df = export(make_client(documents))
+
+    assert np.isnan(df["s_2"].iloc[1])
+    assert df["s_2"].iloc[[0, 2]].tolist() == [101.0, 103.0]
+
+
+def test_excluded_fields_are_projected_away():
+    documents = [dict(document, dataset="train", fd="FD001") for document in make_documents(units=1, cycles=2)]
+
+    df = export(make_client(documents), exclude_fields=["dataset", "fd"])
+
+    assert list(df.columns) == ["unit_number", "time_cycles", "s_2", "s_3"]
+
+
+def test_empty_collection_gives_empty_dataframe():
+    df = export(make_client([]))
+
+    assert df.shape == (0, 0)
\ No newline at end of file